@@ -0,0 +1,292 @@
+"""
+Compressed sparse adjacency for heterogeneous graph edge types.
+
+``CSR`` stores one edge type grouped by source node: the neighbors of node
+``i`` are ``indices[indptr[i]:indptr[i + 1]]``, sorted ascending, and
+``edge_ids`` maps each entry back to its column in the COO ``edge_index`` so
+edge attributes and times stay addressable. The reverse (CSC) structure of
+an edge type is the ``CSR`` of its transposed edges.
+
+Neighbor queries are O(degree) slices; ``gather`` expands a whole frontier
+of nodes at once without a Python loop, which is what k-hop extraction,
+neighbor sampling and ring clustering build on.
+
+``build_csr_on_disk`` builds the same structure out of core, for edge lists
+that only exist as memory-mapped files (see ``streaming_graph``).
+"""
+
+from typing import Optional, Tuple, Union
+from pathlib import Path
+
+import numpy as np
+
+
+_INT32_MAX = np.iinfo(np.int32).max
+
+
+def index_dtype(size: int) -> np.dtype:
+    """int32 if ``size`` values fit, otherwise int64."""
+    return np.dtype(np.int32 if size <= _INT32_MAX else np.int64)
+
+
+class CSR:
+    """
+    Compressed sparse row adjacency of one edge type.
+
+    Attributes:
+        indptr: int64 [num_rows + 1] offsets into ``indices``
+        indices: Neighbor (column) node of each entry, int32 where the
+            column count allows
+        edge_ids: COO edge position of each entry, int32 where the edge
+            count allows
+        num_cols: Number of column nodes
+    """
+
+    def __init__(
+        self,
+        indptr: np.ndarray,
+        indices: np.ndarray,
+        edge_ids: np.ndarray,
+        num_cols: int
+    ):
+        """
+        Wrap existing CSR arrays.
+
+        Args:
+            indptr: Row offsets
+            indices: Column node per entry
+            edge_ids: COO edge position per entry
+            num_cols: Number of column nodes
+        """
+        self.indptr = indptr
+        self.indices = indices
+        self.edge_ids = edge_ids
+        self.num_cols = num_cols
+
+    @classmethod
+    def from_edges(
+        cls,
+        rows: np.ndarray,
+        cols: np.ndarray,
+        num_rows: int,
+        num_cols: int
+    ) -> "CSR":
+        """
+        Build a CSR from COO edges, sorting neighbors within each row.
+
+        Args:
+            rows: Row (source) node of each edge
+            cols: Column (destination) node of each edge
+            num_rows: Number of row nodes
+            num_cols: Number of column nodes
+
+        Returns:
+            CSR with ``edge_ids`` pointing into the given edge order
+        """
+        num_edges = len(rows)
+        # One sort on the combined (row, col) key orders rows and the
+        # neighbors within them. Parallel edges keep no particular order.
+        key = rows.astype(np.int64) * max(num_cols, 1) + cols
+        order = np.argsort(key)
+        indptr = np.zeros(num_rows + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=num_rows), out=indptr[1:])
+        return cls(
+            indptr,
+            cols[order].astype(index_dtype(num_cols), copy=False),
+            order.astype(index_dtype(num_edges), copy=False),
+            num_cols,
+        )
+
+    @property
+    def num_rows(self) -> int:
+        """Number of row nodes."""
+        return len(self.indptr) - 1
+
+    @property
+    def num_edges(self) -> int:
+        """Number of stored edges."""
+        return len(self.indices)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the arrays in bytes."""
+        return self.indptr.nbytes + self.indices.nbytes + self.edge_ids.nbytes
+
+    def degree(self, nodes: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Out-degree of the given row nodes (all rows by default).
+        """
+        if nodes is None:
+            return np.diff(self.indptr)
+        nodes = np.asarray(nodes)
+        return self.indptr[nodes + 1] - self.indptr[nodes]
+
+    def neighbors(self, node: int) -> np.ndarray:
+        """
+        Sorted neighbors of one row node, as a view (O(degree)).
+        """
+        return self.indices[self.indptr[node]:self.indptr[node + 1]]
+
+    def edges(self, node: int) -> np.ndarray:
+        """
+        COO edge positions of one row node's entries, as a view.
+        """
+        return self.edge_ids[self.indptr[node]:self.indptr[node + 1]]
+
+    def has_edge(self, row: int, col: int) -> bool:
+        """Whether an edge row -> col exists (binary search in the row)."""
+        neighbors = self.neighbors(row)
+        position = np.searchsorted(neighbors, col)
+        return bool(position < len(neighbors) and neighbors[position] == col)
+
+    def gather(self, nodes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Entries of several row nodes at once.
+
+        Args:
+            nodes: Row nodes (duplicates allowed)
+
+        Returns:
+            Tuple of (entry positions into ``indices``/``edge_ids``, index
+            into ``nodes`` of the row each entry belongs to), grouped by
+            node in the given order
+        """
+        nodes = np.asarray(nodes, dtype=np.int64)
+        starts = self.indptr[nodes]
+        counts = self.indptr[nodes + 1] - starts
+        owners = np.repeat(np.arange(len(nodes)), counts)
+        offsets = np.arange(int(counts.sum())) - np.repeat(np.cumsum(counts) - counts, counts)
+        return starts[owners] + offsets, owners
+
+    def merge(
+        self,
+        rows: np.ndarray,
+        cols: np.ndarray,
+        edge_ids: np.ndarray,
+        num_rows: int,
+        num_cols: int
+    ) -> "CSR":
+        """
+        A new CSR with extra edges merged in, keeping rows sorted.
+
+        Only the new edges are sorted; they are then inserted into the
+        existing arrays in one linear pass, so merging a small delta into a
+        large adjacency costs O(num_edges) rather than a full re-sort.
+
+        Args:
+            rows: Row node of each new edge
+            cols: Column node of each new edge
+            edge_ids: COO edge position of each new edge
+            num_rows: Number of row nodes after the merge (>= ``num_rows``)
+            num_cols: Number of column nodes after the merge
+
+        Returns:
+            Merged CSR
+        """
+        width = max(num_cols, 1)
+        key = rows.astype(np.int64) * width + cols
+        order = np.argsort(key, kind="stable")
+        base_rows = np.repeat(np.arange(self.num_rows, dtype=np.int64), np.diff(self.indptr))
+        positions = np.searchsorted(base_rows * width + self.indices, key[order], side="right")
+
+        num_edges = self.num_edges + len(rows)
+        indices = np.insert(
+            self.indices.astype(index_dtype(num_cols), copy=False), positions, cols[order]
+        )
+        merged_ids = np.insert(
+            self.edge_ids.astype(index_dtype(num_edges), copy=False), positions, edge_ids[order]
+        )
+        indptr = np.empty(num_rows + 1, dtype=np.int64)
+        indptr[:self.num_rows + 1] = self.indptr
+        indptr[self.num_rows + 1:] = self.indptr[-1]
+        indptr[1:] += np.cumsum(np.bincount(rows, minlength=num_rows))
+        return CSR(indptr, indices, merged_ids, num_cols)
+
+    def transpose(self) -> "CSR":
+        """
+        The reverse adjacency (CSC of this edge type), with the same edge ids.
+        """
+        rows = np.repeat(np.arange(self.num_rows), np.diff(self.indptr))
+        reverse = CSR.from_edges(self.indices, rows, self.num_cols, self.num_rows)
+        reverse.edge_ids = self.edge_ids[reverse.edge_ids]
+        return reverse
+
+
+def build_csr_on_disk(
+    rows: np.ndarray,
+    cols: np.ndarray,
+    num_rows: int,
+    num_cols: int,
+    directory: Union[str, Path],
+    name: str,
+    block_size: int = 1 << 22
+) -> CSR:
+    """
+    Build a CSR into ``.npy`` files, holding at most ``block_size`` edges
+    (plus one row) in memory at a time.
+
+    A counting pass over blocks of edges sizes the rows, a second pass
+    scatters each block's entries to their row (in edge order within a row),
+    and a final pass sorts the neighbors of runs of rows holding up to
+    ``block_size`` entries. Only ``indptr`` (one entry per row) is kept in
+    memory throughout.
+
+    Args:
+        rows: Row (source) node of each edge, e.g. a memory map
+        cols: Column (destination) node of each edge
+        num_rows: Number of row nodes
+        num_cols: Number of column nodes
+        directory: Directory for ``<name>.indices.npy`` and ``<name>.edge_ids.npy``
+        name: File name prefix
+        block_size: Edges processed per step
+
+    Returns:
+        CSR whose ``indices`` and ``edge_ids`` are writable memory maps;
+        parallel edges are ordered by edge position
+    """
+    directory = Path(directory)
+    num_edges = len(rows)
+    blocks = range(0, num_edges, block_size)
+    counts = np.zeros(num_rows, dtype=np.int64)
+    for start in blocks:
+        counts += np.bincount(rows[start:start + block_size], minlength=num_rows)
+    indptr = np.zeros(num_rows + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+
+    shape = (num_edges,)
+    indices = np.lib.format.open_memmap(
+        directory / f"{name}.indices.npy", mode="w+", dtype=index_dtype(num_cols), shape=shape
+    )
+    edge_ids = np.lib.format.open_memmap(
+        directory / f"{name}.edge_ids.npy", mode="w+", dtype=index_dtype(num_edges), shape=shape
+    )
+    fill = indptr[:-1].copy()
+    for start in blocks:
+        block_rows = np.asarray(rows[start:start + block_size], dtype=np.int64)
+        order = np.argsort(block_rows, kind="stable")
+        ordered = block_rows[order]
+        rank = np.arange(len(ordered)) - np.searchsorted(ordered, ordered, side="left")
+        positions = fill[ordered] + rank
+        indices[positions] = np.asarray(cols[start:start + block_size])[order]
+        edge_ids[positions] = start + order
+        touched, added = np.unique(ordered, return_counts=True)
+        fill[touched] += added
+
+    # Sort neighbors within rows, one run of rows of about block_size entries
+    # at a time (a single row larger than that is sorted on its own).
+    width = max(num_cols, 1)
+    row = 0
+    while row < num_rows:
+        stop = int(np.searchsorted(indptr, indptr[row] + block_size, side="right")) - 1
+        stop = min(max(stop, row + 1), num_rows)
+        lo, hi = int(indptr[row]), int(indptr[stop])
+        if hi - lo > 1:
+            owner = np.repeat(np.arange(stop - row, dtype=np.int64), counts[row:stop])
+            neighbors = np.asarray(indices[lo:hi])
+            order = np.argsort(owner * width + neighbors, kind="stable")
+            indices[lo:hi] = neighbors[order]
+            edge_ids[lo:hi] = np.asarray(edge_ids[lo:hi])[order]
+        row = stop
+    indices.flush()
+    edge_ids.flush()
+    return CSR(indptr, indices, edge_ids, num_cols)
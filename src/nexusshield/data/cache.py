@@ -0,0 +1,305 @@
+"""
+Content-addressed on-disk cache of cleaned tables.
+
+Parsing the raw tables and running ``clean_data`` dominates the start of every
+graph build. ``CleanedTableCache`` stores the cleaned tables in the interim
+data directory as uncompressed Arrow IPC (Feather v2) files, keyed by a hash
+of the input-file fingerprints, the cleaning config and the cleaning code.
+On a hit the files are memory-mapped and converted without re-parsing; old
+entries are evicted least-recently-used first to stay within a size budget.
+
+``write_tables``/``read_tables`` (the table file format) and
+``staged_directory`` (atomic directory writes) are shared with the pipeline
+stages (``pipelines.stages``).
+"""
+
+from typing import Any, Dict, Iterable, Iterator, Optional, Union
+from contextlib import contextmanager
+from pathlib import Path
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+import types
+import uuid
+
+import pandas as pd
+import pyarrow.feather as feather
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_MAX_BYTES = 10 * 1024 ** 3
+
+_ENTRY_PREFIX = "cleaned-"
+_MANIFEST = "manifest.json"
+
+
+def fingerprint_files(paths: Iterable[Union[str, Path]]) -> Dict[str, Any]:
+    """
+    Fingerprint input files by path, size and modification time.
+
+    Directories are expanded to every file beneath them. Missing paths are
+    recorded as missing so that creating them later invalidates the key.
+    File contents are not read, so fingerprinting is cheap for any data size.
+
+    Args:
+        paths: Input files or dataset directories
+
+    Returns:
+        JSON-serializable fingerprint
+    """
+    fingerprint = {}
+    for path in paths:
+        path = Path(path)
+        if path.is_dir():
+            files = sorted(p for p in path.rglob("*") if p.is_file())
+        else:
+            files = [path]
+        for file in files:
+            if file.exists():
+                stat = file.stat()
+                fingerprint[str(file.resolve())] = [stat.st_size, stat.st_mtime_ns]
+            else:
+                fingerprint[str(file)] = None
+    return fingerprint
+
+
+def fingerprint_code(*modules: types.ModuleType) -> str:
+    """
+    Hash the source files of the given modules.
+
+    Args:
+        modules: Modules whose code determines a cached result
+
+    Returns:
+        Hex digest of the concatenated module sources
+    """
+    digest = hashlib.sha256()
+    for module in modules:
+        digest.update(Path(module.__file__).read_bytes())
+    return digest.hexdigest()
+
+
+def hash_payload(payload: Any) -> str:
+    """
+    Hash a JSON-serializable payload into a stable cache key.
+
+    Args:
+        payload: Nested dicts/lists of JSON-serializable values
+
+    Returns:
+        Hex digest of the canonical JSON encoding
+    """
+    encoded = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def write_tables(tables: Dict[str, Optional[pd.DataFrame]], directory: Path) -> Dict[str, bool]:
+    """
+    Write DataFrames to a directory as uncompressed Arrow IPC files.
+
+    Args:
+        tables: Dictionary of table name to DataFrame (or None)
+        directory: Existing directory to write ``<name>.arrow`` files to
+
+    Returns:
+        Table name to whether it was written (False for None tables), the
+        argument of ``read_tables``
+    """
+    for name, df in tables.items():
+        if df is not None:
+            feather.write_feather(df, str(directory / f"{name}.arrow"), compression="uncompressed")
+    return {name: df is not None for name, df in tables.items()}
+
+
+def read_tables(directory: Path, present: Dict[str, bool]) -> Dict[str, Optional[pd.DataFrame]]:
+    """
+    Read tables written by ``write_tables``.
+
+    The Arrow files are memory-mapped; numeric columns without nulls are
+    handed to pandas without copying.
+
+    Args:
+        directory: Directory the tables were written to
+        present: Return value of ``write_tables``
+
+    Returns:
+        Dictionary of table name to DataFrame (None for absent tables)
+    """
+    return {
+        name: feather.read_table(
+            str(directory / f"{name}.arrow"), memory_map=True
+        ).to_pandas(split_blocks=True) if stored else None
+        for name, stored in present.items()
+    }
+
+
+@contextmanager
+def staged_directory(target: Path, replace: bool = True) -> Iterator[Path]:
+    """
+    Write a directory atomically: the block fills a temporary sibling that is
+    renamed to ``target`` once the block completes, and removed if it fails.
+
+    Args:
+        target: Directory to create
+        replace: Remove an existing ``target`` first; otherwise the rename
+            fails with ``OSError`` when ``target`` exists and is not empty
+
+    Yields:
+        The temporary directory (``.tmp-<uuid>`` next to ``target``)
+    """
+    target.parent.mkdir(parents=True, exist_ok=True)
+    staging = target.parent / f".tmp-{uuid.uuid4().hex}"
+    staging.mkdir()
+    try:
+        yield staging
+        if replace and target.exists():
+            shutil.rmtree(target)
+        os.replace(staging, target)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+
+class CleanedTableCache:
+    """
+    LRU-evicted cache of cleaned DataFrames stored as Arrow IPC files.
+
+    Each entry is a directory ``cleaned-<key>`` containing one ``.arrow`` file
+    per table and a manifest. Entries are written to a temporary directory and
+    renamed into place, so readers never observe partial entries.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Union[str, Path],
+        max_bytes: int = DEFAULT_CACHE_MAX_BYTES
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir: Directory holding cache entries (e.g. data/interim)
+            max_bytes: Total size budget for all entries
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+
+    def key(
+        self,
+        input_paths: Iterable[Union[str, Path]],
+        config: Optional[Dict[str, Any]] = None,
+        code_version: str = ""
+    ) -> str:
+        """
+        Compute the cache key for a set of inputs.
+
+        Args:
+            input_paths: Raw input files or dataset directories
+            config: Config values that affect the cleaned output
+            code_version: Fingerprint of the cleaning code (see ``fingerprint_code``)
+
+        Returns:
+            Hex cache key
+        """
+        return hash_payload({
+            'inputs': fingerprint_files(input_paths),
+            'config': config or {},
+            'code': code_version,
+        })
+
+    def _entry_dir(self, key: str) -> Path:
+        return self.cache_dir / f"{_ENTRY_PREFIX}{key}"
+
+    def load(self, key: str) -> Optional[Dict[str, Optional[pd.DataFrame]]]:
+        """
+        Load the tables stored under a key (memory-mapped, see ``read_tables``).
+
+        Args:
+            key: Cache key from ``key``
+
+        Returns:
+            Dictionary of table name to DataFrame (None for tables stored as
+            absent), or None on a cache miss
+        """
+        entry = self._entry_dir(key)
+        manifest_path = entry / _MANIFEST
+        if not manifest_path.exists():
+            return None
+        manifest = json.loads(manifest_path.read_text())
+        tables = read_tables(entry, manifest["tables"])
+        os.utime(manifest_path)
+        logger.info("Cleaned-table cache hit %s", key[:12])
+        return tables
+
+    def store(
+        self,
+        key: str,
+        tables: Dict[str, Optional[pd.DataFrame]]
+    ) -> Path:
+        """
+        Store tables under a key, then evict entries beyond the size budget.
+
+        Args:
+            key: Cache key from ``key``
+            tables: Dictionary of table name to DataFrame (or None)
+
+        Returns:
+            Path of the cache entry
+        """
+        entry = self._entry_dir(key)
+        if entry.exists():
+            return entry
+        try:
+            with staged_directory(entry, replace=False) as staging:
+                manifest = {
+                    'tables': write_tables(tables, staging),
+                    'created_at': time.time(),
+                }
+                (staging / _MANIFEST).write_text(json.dumps(manifest, indent=2))
+        except OSError:
+            # A concurrent writer stored the same entry first.
+            if not entry.exists():
+                raise
+        self.evict()
+        return entry
+
+    def entries(self) -> Dict[Path, Dict[str, float]]:
+        """
+        List cache entries with their size in bytes and last-used time.
+        """
+        result = {}
+        if not self.cache_dir.exists():
+            return result
+        for entry in self.cache_dir.glob(f"{_ENTRY_PREFIX}*"):
+            manifest = entry / _MANIFEST
+            if not manifest.exists():
+                continue
+            size = sum(p.stat().st_size for p in entry.iterdir() if p.is_file())
+            result[entry] = {'bytes': size, 'last_used': manifest.stat().st_mtime}
+        return result
+
+    def evict(self) -> int:
+        """
+        Remove least-recently-used entries until the cache fits ``max_bytes``.
+
+        The most recently used entry is always kept.
+
+        Returns:
+            Number of bytes freed
+        """
+        entries = self.entries()
+        total = sum(info['bytes'] for info in entries.values())
+        freed = 0
+        by_age = sorted(entries.items(), key=lambda item: item[1]['last_used'])
+        for entry, info in by_age[:-1]:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= info['bytes']
+            freed += info['bytes']
+            logger.info("Evicted cleaned-table cache entry %s", entry.name)
+        return freed
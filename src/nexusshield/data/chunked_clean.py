@@ -0,0 +1,376 @@
+"""
+Out-of-core cleaning and deduplication of transaction streams.
+
+Replayed event feeds repeat transaction IDs across files, so duplicates can
+only be found by looking at the whole history, which may not fit in memory.
+``clean_transactions_chunked`` cleans one chunk at a time and writes the
+result to Parquet as it goes. Each chunk is:
+
+1. coerced to the declared column types (``schema.TABLE_SCHEMAS``); values
+   that do not parse become missing
+2. filtered with the same rules as ``clean_data``
+3. deduplicated on ``transaction_id``, keeping the first occurrence
+
+Two deduplication strategies are available:
+
+- ``hash_set``: single pass over the input, preserving input order. Seen IDs
+  are kept as 64-bit hashes in a ``HashSet64`` (8 bytes per distinct ID). Two
+  distinct IDs colliding on 64 bits is vanishingly unlikely for feeds below
+  billions of rows.
+- ``spill``: memory bounded by one chunk plus one partition, whatever the
+  input size. The first pass appends rows to ``spill_partitions`` Arrow files
+  by ID hash. The second pass deduplicates each partition exactly on the
+  IDs. Output rows are grouped by partition, in input order within each.
+
+``clean_chunks`` runs the same cleaning and ``hash_set`` deduplication but
+yields the chunks instead of writing them, for consumers that process each
+chunk as it arrives (``build_graph_pipeline.build_graph_streaming``).
+"""
+
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+from pathlib import Path
+import logging
+import tempfile
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .cleaning import DEFAULT_CLEAN_CONFIG, normalize_ip_addresses, valid_transactions
+from .schema import AMOUNT, CATEGORY, ID, TABLE_SCHEMAS, TIMESTAMP, has_integer_ids
+
+
+logger = logging.getLogger(__name__)
+
+DEDUP_STRATEGIES = ("hash_set", "spill")
+
+# Arrow type of each declared column kind in written chunks.
+_ARROW_TYPES = {
+    ID: pa.string(), CATEGORY: pa.string(), AMOUNT: pa.float64(), TIMESTAMP: pa.int64(),
+}
+
+
+class HashSet64:
+    """
+    Set of uint64 values stored as a few sorted arrays.
+
+    New values are appended as a sorted run; runs are merged whenever the
+    previous one is at most twice as large, so there are O(log n) runs and
+    each value is merged O(log n) times. Membership is a binary search per run.
+    """
+
+    def __init__(self):
+        """Initialize an empty set."""
+        self._runs: List[np.ndarray] = []
+
+    def __len__(self) -> int:
+        return sum(len(run) for run in self._runs)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the set in bytes."""
+        return sum(run.nbytes for run in self._runs)
+
+    def contains(self, values: np.ndarray) -> np.ndarray:
+        """
+        Test membership of each value.
+
+        Args:
+            values: uint64 array
+
+        Returns:
+            Boolean array, True where the value is in the set
+        """
+        found = np.zeros(len(values), dtype=bool)
+        for run in self._runs:
+            position = np.searchsorted(run, values)
+            inside = position < len(run)
+            found[inside] |= run[position[inside]] == values[inside]
+        return found
+
+    def add(self, values: np.ndarray) -> None:
+        """
+        Add values to the set.
+
+        Args:
+            values: uint64 array of values not yet in the set
+        """
+        if len(values) == 0:
+            return
+        self._runs.append(np.unique(values))
+        while len(self._runs) > 1 and len(self._runs[-2]) <= 2 * len(self._runs[-1]):
+            newer = self._runs.pop()
+            older = self._runs.pop()
+            # Timsort detects the two sorted runs and merges them in linear time.
+            self._runs.append(np.sort(np.concatenate([older, newer]), kind="stable"))
+
+
+def hash_ids(column: pd.Series) -> np.ndarray:
+    """
+    64-bit hashes of an ID column, equal for equal ID strings.
+
+    Args:
+        column: Column of IDs
+
+    Returns:
+        uint64 array
+    """
+    return pd.util.hash_pandas_object(column.astype("str"), index=False).to_numpy()
+
+
+def coerce_chunk(chunk: pd.DataFrame, table: str = "transactions") -> pd.DataFrame:
+    """
+    Coerce a raw chunk to the declared column types of a table.
+
+    Integer ID columns become nullable Int64, so integer IDs keep their type
+    and match the entity tables; other ID and category columns become
+    strings (missing values stay missing). Amounts become float64 and
+    timestamps epoch seconds (nullable Int64). Unparseable values become
+    missing, so every chunk of a stream ends up with the same column types.
+
+    Args:
+        chunk: Raw chunk
+        table: Table name, a key of ``TABLE_SCHEMAS``
+
+    Returns:
+        Coerced chunk
+    """
+    schema = TABLE_SCHEMAS[table]
+    columns = {}
+    for name in chunk.columns:
+        column = chunk[name]
+        kind = schema.get(name)
+        if kind == ID and has_integer_ids(column):
+            column = column.astype("Int64")
+        elif kind in (ID, CATEGORY):
+            column = column.astype(object).map(str, na_action="ignore")
+        elif kind == AMOUNT:
+            column = pd.to_numeric(column, errors="coerce").astype(np.float64)
+        elif kind == TIMESTAMP:
+            if pd.api.types.is_integer_dtype(column):
+                column = column.astype("Int64")
+            else:
+                timestamps = pd.to_datetime(
+                    column, utc=True, errors="coerce", format="ISO8601"
+                )
+                column = (timestamps - pd.Timestamp(0, tz="UTC")) // pd.Timedelta(seconds=1)
+                column = column.astype("Int64")
+        columns[name] = column
+    return pd.DataFrame(columns, index=chunk.index)
+
+
+def _clean_chunk(chunk: pd.DataFrame, options: Dict[str, Any]) -> pd.DataFrame:
+    """Coerce, validate and IP-normalize one chunk (no deduplication)."""
+    chunk = coerce_chunk(chunk)
+    keep = valid_transactions(chunk, options)
+    if "transaction_id" in chunk.columns and options['deduplicate']:
+        keep &= chunk["transaction_id"].notna().to_numpy()
+    chunk = chunk[keep].reset_index(drop=True)
+    if "timestamp" in chunk.columns:
+        chunk["timestamp"] = chunk["timestamp"].astype(np.int64)
+    if options['parse_ip'] and "ip_address" in chunk.columns:
+        chunk = chunk.assign(**normalize_ip_addresses(chunk["ip_address"]))
+    return chunk
+
+
+def _declared_schema(schema: pa.Schema) -> pa.Schema:
+    """
+    Arrow schema for every chunk of a stream, from the schema of its first.
+
+    Declared columns take their declared type (integer ID columns stay
+    int64) and other columns that are all missing (Arrow null type) become
+    strings, so a first chunk with an empty column does not fix that column
+    to the null type.
+    """
+    declared = TABLE_SCHEMAS["transactions"]
+    fields = []
+    for field in schema:
+        kind = declared.get(field.name)
+        if kind == ID and pa.types.is_integer(field.type):
+            field = field.with_type(pa.int64())
+        elif kind in _ARROW_TYPES:
+            field = field.with_type(_ARROW_TYPES[kind])
+        elif pa.types.is_null(field.type):
+            field = field.with_type(pa.string())
+        fields.append(field)
+    return pa.schema(fields, metadata=schema.metadata)
+
+
+class _ParquetSink:
+    """Streams tables with a schema fixed by the first one to a Parquet file."""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.writer: Optional[pq.ParquetWriter] = None
+        self.rows = 0
+
+    def write(self, df: pd.DataFrame) -> None:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if self.writer is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.writer = pq.ParquetWriter(str(self.path), _declared_schema(table.schema))
+        table = table.cast(self.writer.schema)
+        self.writer.write_table(table)
+        self.rows += len(df)
+
+    def close(self, empty: pd.DataFrame) -> None:
+        if self.writer is None:
+            self.write(empty)
+        self.writer.close()
+
+
+def clean_chunks(
+    chunks: Iterable[pd.DataFrame],
+    config: Optional[Dict[str, Any]] = None,
+    stats: Optional[Dict[str, int]] = None
+) -> Iterator[pd.DataFrame]:
+    """
+    Clean and deduplicate a stream of transaction chunks, one chunk at a time.
+
+    Duplicates are found against a ``HashSet64`` of the IDs seen so far (the
+    ``hash_set`` strategy), so the stream is consumed in a single pass and
+    chunks keep their input order.
+
+    Args:
+        chunks: Raw transaction chunks, e.g. from ``loaders.stream_transactions``
+        config: Optional ``preprocess`` config section overriding
+            ``DEFAULT_CLEAN_CONFIG``
+        stats: Optional counters to update: rows_read, rows_invalid,
+            rows_duplicate and, at the end, hash_set_bytes
+
+    Yields:
+        Cleaned chunks (possibly empty)
+    """
+    options = {**DEFAULT_CLEAN_CONFIG, **(config or {})}
+    stats = stats if stats is not None else {}
+    for key in ('rows_read', 'rows_invalid', 'rows_duplicate'):
+        stats.setdefault(key, 0)
+    seen = HashSet64()
+    for raw in chunks:
+        stats['rows_read'] += len(raw)
+        chunk = _clean_chunk(raw, options)
+        stats['rows_invalid'] += len(raw) - len(chunk)
+        if options['deduplicate'] and "transaction_id" in chunk.columns:
+            hashes = hash_ids(chunk["transaction_id"])
+            keep = np.zeros(len(chunk), dtype=bool)
+            keep[np.unique(hashes, return_index=True)[1]] = True
+            keep &= ~seen.contains(hashes)
+            seen.add(hashes[keep])
+            stats['rows_duplicate'] += int((~keep).sum())
+            chunk = chunk[keep]
+        yield chunk
+    stats['hash_set_bytes'] = seen.nbytes
+
+
+def _dedup_hash_set(
+    chunks: Iterable[pd.DataFrame],
+    sink: _ParquetSink,
+    stats: Dict[str, int],
+    options: Dict[str, Any]
+) -> pd.DataFrame:
+    """Single-pass deduplication against a set of seen ID hashes."""
+    empty = pd.DataFrame()
+    for chunk in clean_chunks(chunks, options, stats):
+        empty = chunk.iloc[:0]
+        sink.write(chunk)
+    return empty
+
+
+def _dedup_spill(
+    chunks: Iterable[pd.DataFrame],
+    sink: _ParquetSink,
+    stats: Dict[str, int],
+    options: Dict[str, Any]
+) -> pd.DataFrame:
+    """Two-pass deduplication through hash-partitioned spill files."""
+    num_partitions = int(options['spill_partitions'])
+    empty = pd.DataFrame()
+    with tempfile.TemporaryDirectory(prefix="spill-", dir=options['spill_dir']) as tmp:
+        writers: Dict[int, pa.ipc.RecordBatchFileWriter] = {}
+        schema = None
+        for raw in chunks:
+            stats['rows_read'] += len(raw)
+            chunk = _clean_chunk(raw, options)
+            stats['rows_invalid'] += len(raw) - len(chunk)
+            empty = chunk.iloc[:0]
+            if "transaction_id" in chunk.columns:
+                hashes = hash_ids(chunk["transaction_id"])
+                partition = (hashes >> np.uint64(32)) % np.uint64(num_partitions)
+            else:
+                partition = np.zeros(len(chunk), dtype=np.uint64)
+            order = np.argsort(partition, kind="stable")
+            bounds = np.concatenate([[0], np.cumsum(np.bincount(
+                partition.astype(np.int64), minlength=num_partitions
+            ))])
+            table = pa.Table.from_pandas(chunk.iloc[order], preserve_index=False)
+            if schema is None:
+                schema = _declared_schema(table.schema)
+            table = table.cast(schema)
+            for p in np.flatnonzero(np.diff(bounds)):
+                if p not in writers:
+                    writers[p] = pa.ipc.new_file(str(Path(tmp) / f"part-{p:05d}.arrow"), schema)
+                start, stop = int(bounds[p]), int(bounds[p + 1])
+                writers[p].write_table(table.slice(start, stop - start))
+        for writer in writers.values():
+            writer.close()
+
+        for p in sorted(writers):
+            with pa.memory_map(str(Path(tmp) / f"part-{p:05d}.arrow")) as source:
+                part = pa.ipc.open_file(source).read_all().to_pandas()
+            duplicated = np.zeros(len(part), dtype=bool)
+            if "transaction_id" in part.columns:
+                duplicated = part["transaction_id"].duplicated(keep="first").to_numpy()
+            stats['rows_duplicate'] += int(duplicated.sum())
+            sink.write(part[~duplicated])
+    return empty
+
+
+def clean_transactions_chunked(
+    chunks: Iterable[pd.DataFrame],
+    output_path: Union[str, Path],
+    config: Optional[Dict[str, Any]] = None
+) -> Dict[str, int]:
+    """
+    Clean and deduplicate a stream of transaction chunks into a Parquet file.
+
+    Args:
+        chunks: Raw transaction chunks, e.g. from ``loaders.stream_transactions``
+        output_path: Parquet file to write the cleaned transactions to
+        config: Optional ``preprocess`` config section overriding
+            ``DEFAULT_CLEAN_CONFIG``; ``dedup_strategy`` is 'hash_set' or
+            'spill', ``spill_partitions`` and ``spill_dir`` configure the
+            spill files
+
+    Returns:
+        Row counts: rows_read, rows_invalid, rows_duplicate and rows_written
+        (plus hash_set_bytes, the final size of the seen-ID set, for the
+        hash_set strategy)
+
+    Raises:
+        ValueError: If ``dedup_strategy`` is not a supported strategy
+    """
+    options = {**DEFAULT_CLEAN_CONFIG, **(config or {})}
+    strategy = options['dedup_strategy']
+    if strategy not in DEDUP_STRATEGIES:
+        raise ValueError(
+            f"Unsupported dedup_strategy: {strategy}. "
+            f"Supported: {', '.join(DEDUP_STRATEGIES)}"
+        )
+
+    stats = {'rows_read': 0, 'rows_invalid': 0, 'rows_duplicate': 0}
+    sink = _ParquetSink(output_path)
+    if strategy == "spill" and options['deduplicate']:
+        empty = _dedup_spill(chunks, sink, stats, options)
+    else:
+        empty = _dedup_hash_set(chunks, sink, stats, options)
+    sink.close(empty)
+    stats['rows_written'] = sink.rows
+
+    logger.info(
+        "Cleaned %d transactions out of core (%s): %d invalid, %d duplicate, "
+        "%d written to %s",
+        stats['rows_read'], strategy, stats['rows_invalid'],
+        stats['rows_duplicate'], stats['rows_written'], output_path
+    )
+    return stats
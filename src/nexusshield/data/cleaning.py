@@ -0,0 +1,350 @@
+"""
+Cleaning and validation of raw data tables for NexusShield GNN Fraud Ring Detector.
+
+``clean_data`` drops rows without a primary ID, repeated IDs and invalid
+transactions, and adds integer IP and subnet keys
+(``normalize_ip_addresses``). Feature engineering on the cleaned tables is
+in ``preprocess``; keeping the two apart lets cached cleaned tables outlive
+changes to the feature code.
+"""
+
+from typing import Dict, Any, Iterable, Optional, Tuple, Union
+from pathlib import Path
+import tempfile
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+
+# Default cleaning options; overridden by the ``preprocess`` config section.
+DEFAULT_CLEAN_CONFIG: Dict[str, Any] = {
+    'deduplicate': True,
+    'min_amount': 0.0,
+    'parse_ip': True,
+    'dedup_strategy': "hash_set",
+    'spill_partitions': 64,
+    'spill_dir': None,
+    'chunked_output': None,
+}
+
+# IPv4 addresses are stored in the 128-bit key as IPv4-mapped IPv6
+# (::ffff:a.b.c.d) so that one (ip_hi, ip_lo) pair identifies every address.
+_IPV4_MAPPED_LO = np.uint64(0xFFFF << 32)
+# Tag bit separating /48 IPv6 subnet keys from /24 IPv4 subnet keys.
+_IPV6_SUBNET_TAG = np.uint64(1 << 48)
+
+_IPV4_PATTERN = (
+    r"^(?P<a>\d{1,3})\.(?P<b>\d{1,3})\.(?P<c>\d{1,3})\.(?P<d>\d{1,3})(?::\d+)?$"
+)
+_IPV6_EMBEDDED_V4 = (
+    r"^(?P<prefix>.*:)(?P<a>\d{1,3})\.(?P<b>\d{1,3})\.(?P<c>\d{1,3})\.(?P<d>\d{1,3})$"
+)
+
+# Hex digit -> nibble lookup table over byte values.
+_HEX_NIBBLES = np.zeros(256, dtype=np.uint16)
+_HEX_NIBBLES[np.frombuffer(b"0123456789", dtype=np.uint8)] = np.arange(10)
+_HEX_NIBBLES[np.frombuffer(b"abcdef", dtype=np.uint8)] = np.arange(10, 16)
+
+
+def _dotted_quad(match: pa.StructArray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Combine the a/b/c/d octet fields of a regex match into uint32 values.
+
+    Returns:
+        Tuple of (valid mask, uint32 addresses)
+    """
+    octets = np.stack([
+        np.asarray(pc.fill_null(pc.cast(pc.struct_field(match, name), pa.int64()), 0))
+        for name in "abcd"
+    ], axis=1)
+    valid = np.asarray(match.is_valid()) & (octets <= 255).all(axis=1)
+    octets = np.where(valid[:, None], octets, 0).astype(np.uint32)
+    value = (octets[:, 0] << 24) | (octets[:, 1] << 16) | (octets[:, 2] << 8) | octets[:, 3]
+    return valid, value
+
+
+def _parse_ipv4(text: pa.StringArray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Parse dotted-quad strings (optionally with a port) into uint32 values.
+
+    Returns:
+        Tuple of (valid mask, uint32 addresses)
+    """
+    return _dotted_quad(pc.extract_regex(text, _IPV4_PATTERN))
+
+
+def _hextet_values(
+    groups: pa.ListArray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Decode every hextet of a list-of-strings array with numpy.
+
+    Groups are left-padded to four hex digits, so their bytes form an (m, 4)
+    matrix that a lookup table turns into nibbles.
+
+    Returns:
+        Tuple of (row index, position within the row, uint16 value, valid)
+        for each group
+    """
+    flat = groups.flatten()
+    ok = np.asarray(pc.fill_null(pc.match_substring_regex(flat, r"^[0-9a-f]{1,4}$"), False))
+    padded = pc.if_else(pa.array(ok), pc.utf8_lpad(flat, 4, "0"), "0000")
+    padded = padded.combine_chunks() if isinstance(padded, pa.ChunkedArray) else padded
+    offsets = np.frombuffer(padded.buffers()[1], dtype=np.int32)
+    start = offsets[padded.offset]
+    digits = np.frombuffer(padded.buffers()[2], dtype=np.uint8)[start:start + 4 * len(padded)]
+    nibbles = _HEX_NIBBLES[digits.reshape(-1, 4)]
+    values = (nibbles[:, 0] << 12) | (nibbles[:, 1] << 8) | (nibbles[:, 2] << 4) | nibbles[:, 3]
+
+    lengths = np.asarray(pc.list_value_length(groups).fill_null(0))
+    rows = np.repeat(np.arange(len(groups)), lengths)
+    position = np.arange(len(flat)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return rows, position, values, ok
+
+
+def _parse_ipv6(text: pa.StringArray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Parse IPv6 strings into 128-bit (hi, lo) uint64 pairs without per-row Python.
+
+    Handles ``::`` compression, embedded dotted-quad tails, brackets with an
+    optional port and zone suffixes. All string work is done by Arrow compute
+    kernels and hextets are decoded with a numpy lookup table.
+
+    Returns:
+        Tuple of (valid mask, hi words, lo words)
+    """
+    n = len(text)
+    text = pc.replace_substring_regex(text, r"^\[([^\]]+)\](?::\d+)?$", r"\1")
+    text = pc.replace_substring_regex(text, r"%.*$", "")
+
+    # An embedded IPv4 tail becomes two zero hextets; its value is added to lo.
+    embedded = pc.extract_regex(text, _IPV6_EMBEDDED_V4)
+    has_v4_tail = np.asarray(embedded.is_valid())
+    v4_ok, v4_tail = _dotted_quad(embedded)
+    text = pc.if_else(
+        pa.array(has_v4_tail),
+        pc.binary_join_element_wise(pc.struct_field(embedded, "prefix"), "0:0", ""),
+        text
+    )
+
+    separators = np.asarray(pc.count_substring(text, "::").fill_null(2))
+    valid = (
+        np.asarray(pc.fill_null(pc.match_substring_regex(text, r"^[0-9a-f:]+$"), False))
+        & (separators <= 1)
+        & (~has_v4_tail | v4_ok)
+    )
+    compressed = separators == 1
+    head = pc.replace_substring_regex(text, r"::.*$", "")
+    tail = pc.if_else(
+        pa.array(compressed), pc.replace_substring_regex(text, r"^.*?::", ""), ""
+    )
+
+    hextets = np.zeros((n, 8), dtype=np.uint16)
+    counts = []
+    placements = []
+    for part in (head, tail):
+        groups = pc.split_pattern(part, ":")
+        empty = np.asarray(pc.fill_null(pc.equal(part, ""), True))
+        groups = pc.if_else(pa.array(empty), pa.scalar([], type=groups.type), groups)
+        rows, position, values, ok = _hextet_values(groups)
+        np.logical_and.at(valid, rows, ok)
+        counts.append(np.bincount(rows, minlength=n))
+        placements.append((rows, position, values))
+
+    head_count, tail_count = counts
+    total = head_count + tail_count
+    valid &= np.where(compressed, total <= 7, total == 8)
+    for (rows, position, values), shift in zip(placements, (0, 8 - tail_count)):
+        position = position + (shift if np.isscalar(shift) else shift[rows])
+        keep = valid[rows] & (position < 8)
+        hextets[rows[keep], position[keep]] = values[keep]
+
+    words = hextets.astype(np.uint64)
+    hi = (words[:, 0] << 48) | (words[:, 1] << 32) | (words[:, 2] << 16) | words[:, 3]
+    lo = (words[:, 4] << 48) | (words[:, 5] << 32) | (words[:, 6] << 16) | words[:, 7]
+    lo |= np.where(has_v4_tail & valid, v4_tail, 0).astype(np.uint64)
+    return valid, hi, lo
+
+
+def normalize_ip_addresses(ip_address: pd.Series) -> pd.DataFrame:
+    """
+    Parse mixed IPv4/IPv6 address strings into compact integer keys.
+
+    Parsing runs once per distinct string (the categories of a categorical
+    column), using Arrow string kernels and numpy arithmetic rather than
+    per-value Python, and is then broadcast to the rows through the codes.
+    Whitespace, letter case, leading zeros, brackets, ports and zone
+    suffixes are normalized, so different spellings of one address produce
+    the same key. IPv4-mapped IPv6 addresses are treated as IPv4.
+
+    Args:
+        ip_address: Column of IP address strings
+
+    Returns:
+        DataFrame aligned with ``ip_address`` with columns:
+        - ip_version: uint8, 4 or 6 (0 for missing or unparseable values)
+        - ip_v4: uint32 IPv4 address (0 for IPv6)
+        - ip_hi, ip_lo: uint64 halves of the 128-bit address (IPv4 stored as
+          ::ffff:a.b.c.d), a unique key for every valid address
+        - ip_subnet: uint64 key of the /24 (IPv4) or /48 (IPv6) subnet
+    """
+    if isinstance(ip_address.dtype, pd.CategoricalDtype):
+        codes = ip_address.cat.codes.to_numpy()
+        uniques = ip_address.cat.categories
+    else:
+        codes, uniques = pd.factorize(ip_address)
+    text = pa.array(pd.Index(uniques).astype(str), type=pa.string())
+    text = pc.utf8_lower(pc.utf8_trim_whitespace(text))
+
+    is_v4, v4 = _parse_ipv4(text)
+    candidates = ~is_v4 & np.asarray(pc.fill_null(pc.match_substring(text, ":"), False))
+    is_v6 = np.zeros(len(text), dtype=bool)
+    hi = np.zeros(len(text), dtype=np.uint64)
+    lo = np.zeros(len(text), dtype=np.uint64)
+    if candidates.any():
+        (is_v6[candidates], hi[candidates],
+         lo[candidates]) = _parse_ipv6(text.filter(pa.array(candidates)))
+
+    mapped = is_v6 & (hi == 0) & ((lo >> np.uint64(32)) == np.uint64(0xFFFF))
+    v4 = np.where(mapped, (lo & np.uint64(0xFFFFFFFF)).astype(np.uint32), v4)
+    is_v4 |= mapped
+    is_v6 &= ~mapped
+
+    version = np.where(is_v4, 4, np.where(is_v6, 6, 0)).astype(np.uint8)
+    v4 = np.where(is_v4, v4, 0).astype(np.uint32)
+    hi = np.where(is_v6, hi, 0).astype(np.uint64)
+    lo = np.where(is_v4, _IPV4_MAPPED_LO | v4.astype(np.uint64),
+                  np.where(is_v6, lo, 0)).astype(np.uint64)
+    subnet = np.where(
+        is_v4, (v4 >> 8).astype(np.uint64),
+        np.where(is_v6, (hi >> np.uint64(16)) | _IPV6_SUBNET_TAG, 0)
+    ).astype(np.uint64)
+
+    # Append an "invalid" slot so missing values (code -1) map to zeros.
+    def _rows(values: np.ndarray) -> np.ndarray:
+        return np.append(values, values.dtype.type(0))[codes]
+
+    return pd.DataFrame({
+        'ip_version': _rows(version),
+        'ip_v4': _rows(v4),
+        'ip_hi': _rows(hi),
+        'ip_lo': _rows(lo),
+        'ip_subnet': _rows(subnet),
+    }, index=ip_address.index)
+
+
+def _clean_entity_table(
+    df: pd.DataFrame,
+    id_column: str,
+    deduplicate: bool
+) -> pd.DataFrame:
+    """
+    Drop rows without an ID and, optionally, repeated IDs (keeping the first).
+    """
+    if id_column not in df.columns:
+        return df
+    keep = df[id_column].notna()
+    if deduplicate:
+        keep &= ~df[id_column].duplicated(keep="first")
+    if keep.all():
+        return df
+    return df[keep].reset_index(drop=True)
+
+
+def valid_transactions(
+    transactions: pd.DataFrame,
+    options: Dict[str, Any]
+) -> np.ndarray:
+    """
+    Mask of transactions with an account, a timestamp and a valid amount.
+
+    Args:
+        transactions: Raw transaction DataFrame (or chunk)
+        options: Cleaning options (see ``DEFAULT_CLEAN_CONFIG``)
+
+    Returns:
+        Boolean array, True for rows to keep
+    """
+    keep = np.ones(len(transactions), dtype=bool)
+    for column in ("account_id", "timestamp"):
+        if column in transactions.columns:
+            keep &= transactions[column].notna().to_numpy()
+    if "amount" in transactions.columns:
+        amount = pd.to_numeric(transactions["amount"], errors="coerce")
+        amount = amount.to_numpy(dtype=np.float64, na_value=np.nan)
+        keep &= np.isfinite(amount)
+        if options['min_amount'] is not None:
+            keep &= amount >= options['min_amount']
+    return keep
+
+
+def clean_data(
+    transactions: Union[pd.DataFrame, Iterable[pd.DataFrame]],
+    accounts: pd.DataFrame,
+    devices: pd.DataFrame,
+    merchants: pd.DataFrame,
+    config: Optional[Dict[str, Any]] = None
+) -> Dict[str, pd.DataFrame]:
+    """
+    Clean and validate raw data tables.
+
+    Each table loses rows without a primary ID and, if ``deduplicate`` is set,
+    rows repeating an earlier ID. Transactions additionally lose rows with a
+    missing account, a missing timestamp, or a non-finite amount or one below
+    ``min_amount``. If ``parse_ip`` is set, the integer IP and subnet key
+    columns from ``normalize_ip_addresses`` are added to the transactions.
+
+    Transactions may also be given as an iterable of chunks (e.g. from
+    ``loaders.stream_transactions``). They are then cleaned out of core by
+    ``chunked_clean.clean_transactions_chunked``: duplicate transaction IDs
+    are found with a compact hash set or hash-partitioned spill files
+    (``dedup_strategy``), and cleaned chunks are streamed to
+    ``chunked_output`` (a temporary file if unset) before being loaded.
+
+    Args:
+        transactions: Raw transaction DataFrame, or an iterable of chunks
+        accounts: Raw account DataFrame
+        devices: Raw device DataFrame
+        merchants: Raw merchant DataFrame
+        config: Optional ``preprocess`` config section overriding
+            ``DEFAULT_CLEAN_CONFIG``
+
+    Returns:
+        Dictionary with cleaned DataFrames:
+        {
+            'transactions': cleaned_transactions,
+            'accounts': cleaned_accounts,
+            'devices': cleaned_devices,
+            'merchants': cleaned_merchants
+        }
+
+    TODO: Standardize formats (dates, IDs, etc.)
+    """
+    options = {**DEFAULT_CLEAN_CONFIG, **(config or {})}
+    deduplicate = options['deduplicate']
+
+    if not isinstance(transactions, pd.DataFrame):
+        from .chunked_clean import clean_transactions_chunked
+        from .loaders import load_transactions
+        with tempfile.TemporaryDirectory() as tmp:
+            output = options['chunked_output'] or Path(tmp) / "transactions.parquet"
+            clean_transactions_chunked(transactions, output, options)
+            transactions = load_transactions(output, file_format="parquet")
+    else:
+        keep = valid_transactions(transactions, options)
+        if not keep.all():
+            transactions = transactions[keep].reset_index(drop=True)
+        if options['parse_ip'] and "ip_address" in transactions.columns:
+            transactions = transactions.assign(
+                **normalize_ip_addresses(transactions["ip_address"])
+            )
+        transactions = _clean_entity_table(transactions, "transaction_id", deduplicate)
+
+    return {
+        'transactions': transactions,
+        'accounts': _clean_entity_table(accounts, "account_id", deduplicate),
+        'devices': _clean_entity_table(devices, "device_id", deduplicate),
+        'merchants': _clean_entity_table(merchants, "merchant_id", deduplicate),
+    }
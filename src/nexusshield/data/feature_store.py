@@ -0,0 +1,374 @@
+"""
+Versioned, memory-mapped node feature store.
+
+``engineer_features`` output is persisted once per build so that training and
+scoring can open it without re-running preprocessing. Each version is a
+directory holding, per node type:
+
+- ``<node_type>.npy``: the feature matrix, C-ordered float32 or float16 with
+  a 64-byte aligned ``.npy`` header, opened as a read-only memory map
+- ``<node_type>.ids.arrow``: node IDs in row order (Arrow IPC), from which
+  the ID-to-row index is built on first lookup
+
+plus ``manifest.json`` with the format version, feature column names, dtype,
+shapes, optional normalization statistics and the snapshot time (``as_of``).
+Versions are written to a temporary directory and renamed into place, and
+the ``CURRENT`` file names the latest complete version::
+
+    <root>/CURRENT
+    <root>/v00001/manifest.json
+    <root>/v00001/account.npy
+    <root>/v00001/account.ids.arrow
+    ...
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Union
+from pathlib import Path
+import json
+import logging
+import os
+import shutil
+import time
+import uuid
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from .preprocess import ENTITY_TABLES, _prefix
+
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+STORE_DTYPES = ("float32", "float16")
+
+# Numeric columns that are keys or raw timestamps rather than model features.
+NON_FEATURE_COLUMNS = frozenset({
+    "timestamp", "created_at", "first_seen", "last_seen",
+    "ip_version", "ip_v4", "ip_hi", "ip_lo", "ip_subnet",
+})
+
+# ID column of each feature table (keys of ``engineer_features``' output).
+FEATURE_TABLES: Dict[str, str] = {'transactions': "transaction_id", **ENTITY_TABLES}
+
+_MANIFEST = "manifest.json"
+_CURRENT = "CURRENT"
+
+
+def feature_columns(df: pd.DataFrame) -> List[str]:
+    """
+    Names of the numeric model-feature columns of a feature table.
+
+    ID, categorical and string columns, raw timestamps and IP keys are
+    excluded.
+
+    Args:
+        df: Feature DataFrame from ``engineer_features``
+
+    Returns:
+        Column names in table order
+    """
+    return [
+        name for name in df.columns
+        if name not in NON_FEATURE_COLUMNS
+        and not name.endswith("_id")
+        and (pd.api.types.is_numeric_dtype(df[name]) or pd.api.types.is_bool_dtype(df[name]))
+        and not isinstance(df[name].dtype, pd.CategoricalDtype)
+    ]
+
+
+class FeatureSnapshot:
+    """
+    One version of the feature store, opened zero-copy.
+    """
+
+    def __init__(self, directory: Union[str, Path]):
+        """
+        Open a version directory.
+
+        Args:
+            directory: Version directory containing ``manifest.json``
+
+        Raises:
+            ValueError: If the snapshot was written with a newer format
+        """
+        self.directory = Path(directory)
+        self.manifest = json.loads((self.directory / _MANIFEST).read_text())
+        if self.manifest['format_version'] > FORMAT_VERSION:
+            raise ValueError(
+                f"Feature store format {self.manifest['format_version']} is newer "
+                f"than supported format {FORMAT_VERSION}"
+            )
+        self.version = self.manifest['version']
+        self._matrices: Dict[str, np.ndarray] = {}
+        self._ids: Dict[str, pd.Index] = {}
+
+    @property
+    def node_types(self) -> List[str]:
+        """Node types stored in this snapshot."""
+        return list(self.manifest['node_types'])
+
+    def columns(self, node_type: str) -> List[str]:
+        """Feature column names of a node type, in matrix column order."""
+        return self.manifest['node_types'][node_type]['columns']
+
+    def matrix(self, node_type: str) -> np.ndarray:
+        """
+        Read-only memory-mapped feature matrix [num_nodes, num_features].
+
+        ``torch.from_numpy`` on the result shares the mapped pages.
+        """
+        if node_type not in self._matrices:
+            info = self.manifest['node_types'][node_type]
+            self._matrices[node_type] = np.load(
+                self.directory / info['matrix'], mmap_mode="r"
+            )
+        return self._matrices[node_type]
+
+    def ids(self, node_type: str) -> pd.Index:
+        """Node IDs in row order."""
+        if node_type not in self._ids:
+            info = self.manifest['node_types'][node_type]
+            table = feather.read_table(str(self.directory / info['ids']), memory_map=True)
+            self._ids[node_type] = pd.Index(table.column("id").to_pandas())
+        return self._ids[node_type]
+
+    def rows(self, node_type: str, ids: Sequence[Any]) -> np.ndarray:
+        """
+        Row positions of node IDs.
+
+        Args:
+            node_type: Node type, e.g. 'account'
+            ids: Node IDs
+
+        Returns:
+            int64 array of row positions, -1 for unknown IDs
+        """
+        lookup = pd.Index(np.asarray(ids, dtype=object).astype(str))
+        return self.ids(node_type).get_indexer(lookup).astype(np.int64)
+
+    def get(self, node_type: str, ids: Sequence[Any]) -> np.ndarray:
+        """
+        Feature rows for node IDs (zeros for unknown IDs).
+
+        Args:
+            node_type: Node type, e.g. 'account'
+            ids: Node IDs
+
+        Returns:
+            Array of shape [len(ids), num_features] in the stored dtype
+        """
+        rows = self.rows(node_type, ids)
+        matrix = self.matrix(node_type)
+        out = np.zeros((len(rows), matrix.shape[1]), dtype=matrix.dtype)
+        found = rows >= 0
+        out[found] = matrix[rows[found]]
+        return out
+
+
+class FeatureStore:
+    """
+    Directory of versioned feature snapshots.
+
+    Example:
+        store = FeatureStore("data/processed/features")
+        version = store.write(engineer_features(...))
+        snapshot = store.open()
+        x = torch.from_numpy(snapshot.matrix("account"))
+    """
+
+    def __init__(self, root: Union[str, Path]):
+        """
+        Initialize the store.
+
+        Args:
+            root: Store directory (created on first write)
+        """
+        self.root = Path(root)
+
+    def versions(self) -> List[str]:
+        """Complete versions, oldest first."""
+        if not self.root.exists():
+            return []
+        return sorted(
+            p.name for p in self.root.glob("v*") if (p / _MANIFEST).exists()
+        )
+
+    def current(self) -> Optional[str]:
+        """Latest complete version, or None if the store is empty."""
+        pointer = self.root / _CURRENT
+        if pointer.exists():
+            return pointer.read_text().strip()
+        versions = self.versions()
+        return versions[-1] if versions else None
+
+    def version_as_of(self, timestamp: int) -> Optional[str]:
+        """
+        Latest version whose features only use data up to ``timestamp``.
+
+        Args:
+            timestamp: Epoch seconds
+
+        Returns:
+            The version with the greatest ``as_of <= timestamp`` (the newest
+            such version on ties), or None if there is none
+        """
+        best, best_as_of = None, None
+        for version in self.versions():
+            as_of = json.loads((self.root / version / _MANIFEST).read_text())['as_of']
+            if as_of is not None and as_of <= timestamp and (
+                best_as_of is None or as_of >= best_as_of
+            ):
+                best, best_as_of = version, as_of
+        return best
+
+    def write(
+        self,
+        features: Dict[str, pd.DataFrame],
+        dtype: str = "float32",
+        normalize: bool = False,
+        as_of: Optional[int] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """
+        Write a new version and make it current.
+
+        Args:
+            features: Feature tables keyed 'transactions', 'accounts', ...
+                (as returned by ``engineer_features``); each is stored under
+                the node type of its key's ID column (``FEATURE_TABLES``)
+            dtype: 'float32' or 'float16'
+            normalize: Store z-scored columns; the per-column mean and std
+                are recorded in the manifest
+            as_of: Epoch seconds the features are valid at (e.g. the last
+                transaction time)
+            metadata: Extra JSON-serializable manifest entries (e.g. config)
+
+        Returns:
+            The new version name
+
+        Raises:
+            ValueError: If ``dtype`` or a table key is unsupported, a table
+                lacks its ID column, or float16 cannot hold the
+                (unnormalized) values
+        """
+        if dtype not in STORE_DTYPES:
+            raise ValueError(
+                f"Unsupported feature store dtype: {dtype}. "
+                f"Supported: {', '.join(STORE_DTYPES)}"
+            )
+        for table, df in features.items():
+            if table not in FEATURE_TABLES:
+                raise ValueError(
+                    f"Unsupported feature table: {table}. "
+                    f"Supported: {', '.join(FEATURE_TABLES)}"
+                )
+            if FEATURE_TABLES[table] not in df.columns:
+                raise ValueError(f"Feature table {table} has no {FEATURE_TABLES[table]} column")
+        existing = self.versions()
+        version = f"v{int(existing[-1][1:]) + 1 if existing else 1:05d}"
+        self.root.mkdir(parents=True, exist_ok=True)
+        staging = self.root / f".tmp-{uuid.uuid4().hex}"
+        staging.mkdir()
+
+        node_types = {}
+        try:
+            for table, df in features.items():
+                id_column = FEATURE_TABLES[table]
+                node_type = _prefix(id_column)
+                node_types[node_type] = self._write_node_type(
+                    staging, node_type, df, id_column, dtype, normalize
+                )
+            manifest = {
+                'format_version': FORMAT_VERSION,
+                'version': version,
+                'created_at': time.time(),
+                'as_of': as_of,
+                'dtype': dtype,
+                'node_types': node_types,
+                'metadata': metadata or {},
+            }
+            (staging / _MANIFEST).write_text(json.dumps(manifest, indent=2, default=str))
+            os.replace(staging, self.root / version)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        pointer = self.root / f"{_CURRENT}.tmp"
+        pointer.write_text(version)
+        os.replace(pointer, self.root / _CURRENT)
+        logger.info(
+            "Wrote feature store version %s (%s): %s", version, dtype,
+            ", ".join(f"{t} {info['rows']}x{len(info['columns'])}"
+                      for t, info in node_types.items())
+        )
+        return version
+
+    @staticmethod
+    def _write_node_type(
+        directory: Path,
+        node_type: str,
+        df: pd.DataFrame,
+        id_column: str,
+        dtype: str,
+        normalize: bool
+    ) -> Dict[str, Any]:
+        """Write one node type's matrix and ID file; return its manifest entry."""
+        columns = feature_columns(df)
+        matrix = np.lib.format.open_memmap(
+            directory / f"{node_type}.npy", mode="w+", dtype=dtype,
+            shape=(len(df), len(columns))
+        )
+        limit = np.finfo(dtype).max
+        stats = {'mean': [], 'std': []}
+        for j, name in enumerate(columns):
+            values = df[name].to_numpy(dtype=np.float64, na_value=np.nan)
+            values = np.nan_to_num(values, nan=0.0)
+            if normalize:
+                mean, std = float(values.mean()) if len(values) else 0.0, float(values.std())
+                std = std if std > 0 else 1.0
+                values = (values - mean) / std
+                stats['mean'].append(mean)
+                stats['std'].append(std)
+            if np.abs(values).max(initial=0.0) > limit:
+                raise ValueError(
+                    f"Column {name} of {node_type} exceeds the {dtype} range; "
+                    "store with normalize=True or as float32"
+                )
+            matrix[:, j] = values
+        matrix.flush()
+        del matrix
+
+        ids = pa.array(df[id_column].astype(str).to_numpy(), type=pa.string())
+        feather.write_feather(
+            pa.table({'id': ids}), str(directory / f"{node_type}.ids.arrow"),
+            compression="uncompressed"
+        )
+        return {
+            'id_column': id_column,
+            'rows': len(df),
+            'columns': columns,
+            'matrix': f"{node_type}.npy",
+            'ids': f"{node_type}.ids.arrow",
+            'normalization': stats if normalize else None,
+        }
+
+    def open(self, version: Optional[str] = None) -> FeatureSnapshot:
+        """
+        Open a version (the current one by default).
+
+        Args:
+            version: Version name such as 'v00003'
+
+        Returns:
+            FeatureSnapshot
+
+        Raises:
+            FileNotFoundError: If the store is empty or the version is missing
+        """
+        version = version or self.current()
+        if version is None or not (self.root / version / _MANIFEST).exists():
+            raise FileNotFoundError(f"No feature store version {version} in {self.root}")
+        return FeatureSnapshot(self.root / version)
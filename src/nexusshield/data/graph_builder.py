@@ -6,28 +6,430 @@ The graph contains multiple node types (Account, Device, IP, Transaction, Mercha
 and edge types representing relationships between entities.
 """
 
-from typing import Dict, Any, Optional, Tuple
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+import logging
+import time
+
+import numpy as np
 import pandas as pd
 
+from .feature_store import feature_columns
+from .hetero_graph import EdgeType, HeteroGraph, NodeIndex, edge_type_name
+from . import hubs
+from .meta_paths import HUB_POLICIES, shared_entity_edges
+from .schema import entity_codes, to_epoch_seconds
+
+
+logger = logging.getLogger(__name__)
+
+# Node type -> transaction column holding its IDs.
+NODE_COLUMNS: Dict[str, str] = {
+    'transaction': "transaction_id",
+    'account': "account_id",
+    'device': "device_id",
+    'ip': "ip_address",
+    'subnet': "ip_subnet",
+    'merchant': "merchant_id",
+}
+
+# One edge per transaction between the nodes in the two endpoint columns.
+EDGE_TYPES: Tuple[EdgeType, ...] = (
+    ('account', 'uses', 'device'),
+    ('account', 'makes', 'transaction'),
+    ('transaction', 'from', 'ip'),
+    ('transaction', 'with', 'merchant'),
+)
+
+# Transaction-from-Subnet edges, built only with ``subnet_edges`` (from the
+# ``ip_subnet`` key added by ``cleaning.normalize_ip_addresses``).
+SUBNET_EDGE_TYPE: EdgeType = ('transaction', 'from', 'subnet')
+
+DEFAULT_GRAPH_CONFIG = {
+    'coalesce_edges': [],  # Edge type names, e.g. "account__uses__device"
+    'meta_paths': [],  # Shared node types for Account-shares_<type>-Account edges
+    'meta_path_max_degree': 200,  # Accounts kept per shared node
+    'meta_path_hub_policy': "sample",  # "sample" or "drop" nodes above the cap
+    'seed': 0,
+    'subnet_edges': False,  # Also build Subnet nodes and Transaction-from-Subnet edges
+    'compact_fraction': 0.05,  # Delta share of an adjacency that triggers compaction
+    'hub_policies': {},  # Edge type name -> "drop", "sample" or "split" for its hubs
+    'hub_percentile': 99.99,  # Destination nodes above this degree percentile are hubs
+    'hub_min_degree': 10_000,  # ... and above this degree
+    'hub_max_degree': 10_000,  # Edges kept per hub (sample) or per sub-node (split)
+}
+
+# Edge features of coalesced edges (amount columns only with an amount column).
+COALESCED_EDGE_FEATURES = ("count", "amount_sum", "amount_mean")
+
+
+def _integer_key_codes(*keys: np.ndarray) -> np.ndarray:
+    """
+    Factorize one or more integer key columns jointly, without string hashing.
+
+    Args:
+        keys: Integer arrays of equal length forming a composite key
+
+    Returns:
+        int64 codes numbering the distinct composite keys in order of appearance
+    """
+    codes, _ = pd.factorize(keys[0])
+    for key in keys[1:]:
+        key_codes, key_uniques = pd.factorize(key)
+        codes, _ = pd.factorize(codes.astype(np.int64) * len(key_uniques) + key_codes)
+    return codes.astype(np.int64)
+
+
+def _first_occurrences(codes: np.ndarray) -> np.ndarray:
+    """
+    Position of the first row of each code, for codes numbered in order of
+    first appearance (as produced by ``pd.factorize``).
+    """
+    running_max = np.maximum.accumulate(codes) if len(codes) else codes
+    return np.flatnonzero(np.diff(running_max, prepend=-1) > 0)
+
+
+def _id_node_rows(
+    node_index: NodeIndex,
+    node_type: str,
+    column: pd.Series
+) -> np.ndarray:
+    """
+    Node rows of an ID column, adding IDs that occur in it to the index.
+
+    Only distinct IDs are looked up: categorical columns contribute their
+    categories, others are factorized once.
+    """
+    codes, uniques = entity_codes(column)
+    valid = codes >= 0
+    present = np.bincount(codes[valid], minlength=len(uniques)) > 0
+    ids = uniques if present.all() else uniques[present]
+    rows = np.full(len(uniques) + 1, -1, dtype=np.int64)
+    rows[:-1][present] = node_index.add(node_type, ids)
+    return rows[codes]
+
+
+def _key_node_rows(
+    node_index: NodeIndex,
+    node_type: str,
+    transactions: pd.DataFrame,
+    key_columns: Tuple[str, ...]
+) -> np.ndarray:
+    """
+    Node rows of IP or subnet nodes, identified by the normalized integer keys
+    added by ``cleaning.normalize_ip_addresses``; rows whose address could
+    not be parsed get -1.
+    """
+    valid = transactions["ip_version"].to_numpy() != 0
+    keys = [transactions[c].to_numpy()[valid] for c in key_columns]
+    codes = _integer_key_codes(*keys)
+    first = _first_occurrences(codes)
+    if len(keys) > 1:
+        ids = pd.MultiIndex.from_arrays([key[first] for key in keys], names=key_columns)
+    else:
+        ids = pd.Index(keys[0][first], name=key_columns[0])
+    rows = np.full(len(transactions), -1, dtype=np.int64)
+    rows[valid] = node_index.add(node_type, ids)[codes]
+    return rows
+
+
+def _seed_ids(table: pd.DataFrame, id_column: str) -> pd.Index:
+    """
+    Distinct non-missing IDs of an entity table, in table order, keeping
+    their type (integer IDs stay integers).
+    """
+    ids = table[id_column].dropna()
+    return pd.Index(np.asarray(ids.unique()))
+
+
+def index_transactions(
+    transactions: pd.DataFrame,
+    entities: Optional[Dict[str, pd.DataFrame]] = None,
+    node_index: Optional[NodeIndex] = None,
+    node_types: Optional[Sequence[str]] = None
+) -> Tuple[NodeIndex, Dict[str, np.ndarray]]:
+    """
+    Build the global node index and map every transaction to its nodes.
+
+    Each node type is indexed once, from the distinct IDs of its column
+    (categorical categories, or one factorization), never per row. Entity
+    tables seed the index first so that entities without transactions still
+    get a node. IP nodes use the normalized ``ip_hi``/``ip_lo`` keys when
+    present, so different spellings of one address share a node, and subnet
+    nodes use ``ip_subnet``.
+
+    Args:
+        transactions: Transaction DataFrame
+        entities: Optional entity tables keyed by node type (e.g. 'account')
+        node_index: Existing index to extend (a new one by default)
+        node_types: Node types to index (default: all of ``NODE_COLUMNS``
+            whose column is present)
+
+    Returns:
+        Tuple of (node index, node row per transaction for each node type,
+        -1 where the ID is missing or unparseable)
+    """
+    node_index = node_index or NodeIndex()
+    for node_type, table in (entities or {}).items():
+        id_column = NODE_COLUMNS[node_type]
+        if table is not None and id_column in table.columns:
+            node_index.add(node_type, _seed_ids(table, id_column))
+
+    columns = set(transactions.columns)
+    normalized = {"ip_version", "ip_hi", "ip_lo"}.issubset(columns)
+    rows = {}
+    for node_type in node_types or NODE_COLUMNS:
+        column = NODE_COLUMNS[node_type]
+        if node_type == "subnet":
+            if {"ip_version", "ip_subnet"}.issubset(columns):
+                rows[node_type] = _key_node_rows(
+                    node_index, node_type, transactions, ("ip_subnet",)
+                )
+        elif node_type == "ip" and normalized:
+            rows[node_type] = _key_node_rows(
+                node_index, node_type, transactions, ("ip_hi", "ip_lo")
+            )
+        elif column in columns:
+            rows[node_type] = _id_node_rows(node_index, node_type, transactions[column])
+    return node_index, rows
+
+
+def _amounts(transactions: pd.DataFrame) -> Optional[np.ndarray]:
+    """Transaction amounts as float32, or None if there is no amount column."""
+    if "amount" not in transactions.columns:
+        return None
+    return transactions["amount"].to_numpy(dtype=np.float32)
+
+
+def _edge_arrays(
+    src: np.ndarray,
+    dst: np.ndarray,
+    amount: Optional[np.ndarray],
+    dtype: np.dtype = np.dtype(np.int64)
+) -> Tuple[np.ndarray, Optional[np.ndarray], np.ndarray]:
+    """
+    Edges between per-transaction source and destination node rows.
+
+    Rows where either endpoint is missing are skipped. The transaction amount,
+    if given, is the single edge feature.
+
+    Returns:
+        Tuple of (edge_index, edge_attr or None, mask of transactions used)
+    """
+    valid = (src >= 0) & (dst >= 0)
+    edge_index = np.empty((2, int(valid.sum())), dtype=dtype)
+    edge_index[0] = src[valid]
+    edge_index[1] = dst[valid]
+    edge_attr = amount[valid].reshape(-1, 1) if amount is not None else None
+    return edge_index, edge_attr, valid
+
+
+def coalesce_edges(
+    edge_index: np.ndarray,
+    amount: Optional[np.ndarray] = None,
+    timestamp: Optional[np.ndarray] = None
+) -> Tuple[np.ndarray, np.ndarray, Optional[np.ndarray], Optional[np.ndarray]]:
+    """
+    Collapse parallel edges (repeated source, destination pairs) into one.
+
+    The edges are sorted once on the combined (source, destination) key and
+    every statistic is a ``reduceat`` over the runs of equal keys.
+
+    Args:
+        edge_index: [2, num_edges] edge array
+        amount: Optional amount per edge
+        timestamp: Optional int64 epoch seconds per edge
+
+    Returns:
+        Tuple of (edge_index sorted by source then destination, float32
+        edge_attr with the ``COALESCED_EDGE_FEATURES`` columns (count only
+        without amounts), first and last timestamp per edge or None)
+    """
+    num_edges = edge_index.shape[1]
+    num_features = len(COALESCED_EDGE_FEATURES) if amount is not None else 1
+    if num_edges == 0:
+        times = np.empty(0, dtype=np.int64) if timestamp is not None else None
+        return edge_index, np.empty((0, num_features), dtype=np.float32), times, times
+
+    src, dst = edge_index
+    key = src.astype(np.int64) * (int(dst.max()) + 1) + dst
+    order = np.argsort(key)
+    starts = np.flatnonzero(np.diff(key[order], prepend=-1))
+    counts = np.diff(np.append(starts, num_edges))
+
+    edge_attr = np.empty((len(starts), num_features), dtype=np.float32)
+    edge_attr[:, 0] = counts
+    if amount is not None:
+        total = np.add.reduceat(amount[order].astype(np.float64), starts)
+        edge_attr[:, 1] = total
+        edge_attr[:, 2] = total / counts
+    first = last = None
+    if timestamp is not None:
+        ordered = timestamp[order]
+        first = np.minimum.reduceat(ordered, starts)
+        last = np.maximum.reduceat(ordered, starts)
+    return edge_index[:, order[starts]], edge_attr, first, last
+
+
+def _edges_between(
+    transactions: pd.DataFrame,
+    src_type: str,
+    dst_type: str,
+    coalesce: bool = False
+) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Build one edge type on its own, indexing only its two node types.
+    """
+    node_index, rows = index_transactions(transactions, node_types=(src_type, dst_type))
+    amount = _amounts(transactions)
+    edge_index, edge_attr, used = _edge_arrays(
+        rows[src_type], rows[dst_type], amount, node_index.index_dtype
+    )
+    if coalesce:
+        edge_index, edge_attr, _, _ = coalesce_edges(
+            edge_index, amount[used] if amount is not None else None
+        )
+    return edge_index, edge_attr
+
+
+def _time_ordered(
+    transactions: pd.DataFrame,
+    rows: Dict[str, np.ndarray]
+) -> Tuple[Dict[str, np.ndarray], Optional[np.ndarray], Optional[np.ndarray]]:
+    """
+    Per-transaction node rows, amounts and times, in transaction time order.
+
+    Visiting transactions in time order once makes every edge type come out
+    sorted by edge_time without a sort of its own.
+
+    Returns:
+        Tuple of (node rows per node type, amounts or None, epoch seconds
+        or None)
+    """
+    amount = _amounts(transactions)
+    if "timestamp" not in transactions.columns:
+        return rows, amount, None
+    timestamp = to_epoch_seconds(transactions["timestamp"]).to_numpy(dtype=np.int64)
+    if (timestamp[1:] < timestamp[:-1]).any():
+        order = np.argsort(timestamp, kind="stable")
+        timestamp = timestamp[order]
+        amount = amount[order] if amount is not None else None
+        rows = {node_type: node_rows[order] for node_type, node_rows in rows.items()}
+    return rows, amount, timestamp
+
+
+def _node_rows(node_index: NodeIndex, node_type: str, column: pd.Series) -> np.ndarray:
+    """Rows of the IDs in a column (-1 if missing or not indexed)."""
+    codes, uniques = entity_codes(column)
+    rows = np.append(node_index.lookup(node_type, uniques), -1)
+    return rows[codes]
+
+
+def _node_features(
+    table: pd.DataFrame,
+    rows: np.ndarray,
+    num_nodes: int
+) -> Tuple[np.ndarray, list]:
+    """
+    Scatter the feature columns of a table into a [num_nodes, F] float32 matrix.
+    """
+    columns = feature_columns(table)
+    x = np.zeros((num_nodes, len(columns)), dtype=np.float32)
+    found = rows >= 0
+    for j, name in enumerate(columns):
+        values = table[name].to_numpy(dtype=np.float32, na_value=0.0)
+        x[rows[found], j] = values[found]
+    return x, columns
+
+
+def _node_types(options: Dict[str, Any]) -> List[str]:
+    """Node types indexed from the transactions of a build with these options."""
+    return [t for t in NODE_COLUMNS if t != 'subnet' or options['subnet_edges']]
+
+
+def _edge_types(options: Dict[str, Any]) -> Tuple[EdgeType, ...]:
+    """Per-transaction edge types of a build with these options."""
+    return EDGE_TYPES + ((SUBNET_EDGE_TYPE,) if options['subnet_edges'] else ())
+
+
+def graph_options(config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    The ``graph`` config section merged over ``DEFAULT_GRAPH_CONFIG``, validated.
+
+    Raises:
+        ValueError: If an edge type, node type or policy is not supported
+    """
+    options = {**DEFAULT_GRAPH_CONFIG, **(config or {})}
+    edge_names = {edge_type_name(e) for e in _edge_types(options)}
+    unknown = set(options['coalesce_edges'] or ()) - edge_names
+    if unknown:
+        raise ValueError(
+            f"Unknown edge types in coalesce_edges: {', '.join(sorted(unknown))}"
+        )
+    unknown = set(options['meta_paths'] or ()) - (set(_node_types(options)) - {'account'})
+    if unknown:
+        raise ValueError(
+            f"Unknown node types in meta_paths: {', '.join(sorted(unknown))}"
+        )
+    hub_policies = dict(options['hub_policies'] or {})
+    unknown = set(hub_policies) - edge_names
+    unknown |= {f"{name}: {policy}" for name, policy in hub_policies.items()
+                if policy not in hubs.HUB_POLICIES}
+    if unknown:
+        raise ValueError(
+            f"Invalid hub_policies entries: {', '.join(sorted(unknown))}. "
+            f"Policies: {', '.join(hubs.HUB_POLICIES)}"
+        )
+    if options['meta_path_hub_policy'] not in HUB_POLICIES:
+        raise ValueError(
+            f"Unsupported meta_path_hub_policy: {options['meta_path_hub_policy']}. "
+            f"Supported: {', '.join(HUB_POLICIES)}"
+        )
+    return options
+
 
 def build_heterogeneous_graph(
     transactions: pd.DataFrame,
     accounts: pd.DataFrame,
     devices: pd.DataFrame,
     merchants: pd.DataFrame,
-    labels: Optional[pd.DataFrame] = None
-) -> Any:
+    labels: Optional[pd.DataFrame] = None,
+    build_adjacency: bool = True,
+    config: Optional[Dict[str, Any]] = None
+) -> HeteroGraph:
     """
     Construct a heterogeneous graph from processed data tables.
 
     Creates a graph with:
-    - Node types: Account, Device, IP, Transaction, Merchant
-    - Edge types:
+    - Node types: Account, Device, IP, Transaction, Merchant (and Subnet
+      with ``subnet_edges``)
+    - Edge types (see ``EDGE_TYPES``):
       * Account-uses-Device
       * Account-makes-Transaction
       * Transaction-from-IP
       * Transaction-with-Merchant
-      * (and potentially others)
+      * Transaction-from-Subnet (with ``subnet_edges``, when IPs were
+        normalized)
+
+    The node index is built once per node type (``index_transactions``) and
+    every edge type is then sliced out of the same per-transaction node row
+    arrays, so no ID is looked up per row.
+
+    When transactions have timestamps, the edges of every edge type are
+    ordered by ``edge_time`` so ``HeteroGraph.window`` can slice time ranges.
+
+    Degree distributions of every edge type are recorded in
+    ``metadata['degrees']``. Edge types listed in ``hub_policies`` have the
+    hubs on their destination side dropped, sampled or split into virtual
+    sub-nodes (see ``hubs``), with per-type counts in ``metadata['hubs']``.
+
+    Node types listed in ``meta_paths`` (e.g. 'device', 'ip') additionally
+    get derived Account-shares_<type>-Account edges weighted by the number
+    of shared nodes (see ``meta_paths.shared_entity_edges``).
+
+    Edge types listed in ``coalesce_edges`` get one edge per distinct
+    (source, destination) pair instead of one per transaction (see
+    ``coalesce_edges``); the compression ratio of each is recorded in
+    ``metadata['coalesce']``.
 
     Args:
         transactions: Feature-engineered transaction DataFrame
@@ -35,38 +437,390 @@ def build_heterogeneous_graph(
         devices: Feature-engineered device DataFrame
         merchants: Feature-engineered merchant DataFrame
         labels: Optional DataFrame with fraud labels for nodes
+            (entity_id, entity_type, is_fraud)
+        build_adjacency: Also build the sorted CSR and CSC of every edge
+            type (see ``HeteroGraph.adjacency``)
+        config: Optional ``graph`` config section overriding
+            ``DEFAULT_GRAPH_CONFIG``
 
     Returns:
-        Heterogeneous graph object (PyTorch Geometric HeteroData or similar)
-        with node features and edge indices for each node/edge type.
+        HeteroGraph with node features (``feature_store.feature_columns`` of
+        each table), labels, and per edge type an int32 (int64 beyond 2**31
+        nodes) edge_index, the transaction amount as edge_attr and the
+        transaction time as edge_time, plus the CSR/CSC adjacency for
+        O(degree) neighbor queries. ``to_pyg()`` converts it to PyTorch
+        Geometric ``HeteroData``.
+    """
+    options = graph_options(config)
+    coalesce = set(options['coalesce_edges'] or ())
+    hub_policies = dict(options['hub_policies'] or {})
+
+    started = time.perf_counter()
+    entities = {'account': accounts, 'device': devices, 'merchant': merchants}
+    node_index, rows = index_transactions(
+        transactions, entities, node_types=_node_types(options)
+    )
+    graph = HeteroGraph(node_index)
+    dtype = node_index.index_dtype
+
+    edge_rows, amount, timestamp = _time_ordered(transactions, rows)
+    for edge_type in _edge_types(options):
+        src_type, _, dst_type = edge_type
+        if src_type not in rows or dst_type not in rows:
+            continue
+        edge_index, edge_attr, used = _edge_arrays(
+            edge_rows[src_type], edge_rows[dst_type], amount, dtype
+        )
+        if edge_type_name(edge_type) in coalesce:
+            _add_coalesced_edges(graph, edge_type, edge_index, amount, timestamp, used)
+            continue
+        graph.edge_index[edge_type] = edge_index
+        if edge_attr is not None:
+            graph.edge_attr[edge_type] = edge_attr
+            graph.edge_attr_names[edge_type] = ["amount"]
+        if timestamp is not None:
+            graph.edge_time[edge_type] = timestamp[used]
+
+    for shared_type in options['meta_paths'] or ():
+        if 'account' in rows and shared_type in rows:
+            _add_meta_path_edges(graph, rows, shared_type, options)
+    # Coalesced edges come out in (source, destination) order.
+    graph.sort_edges_by_time()
+
+    tables = {'transaction': transactions, **entities}
+    for node_type, table in tables.items():
+        if table is None or NODE_COLUMNS[node_type] not in table.columns:
+            continue
+        if node_type == "transaction":
+            table_rows = rows[node_type]
+        else:
+            table_rows = _node_rows(node_index, node_type, table[NODE_COLUMNS[node_type]])
+        x, names = _node_features(table, table_rows, node_index.num_nodes(node_type))
+        if names:
+            graph.x[node_type] = x
+            graph.feature_names[node_type] = names
+
+    if labels is not None:
+        add_labels(graph, labels)
+
+    _handle_hubs(graph, hub_policies, options)
+
+    if build_adjacency:
+        graph.build_adjacency()
+
+    elapsed = time.perf_counter() - started
+    graph.metadata['build_seconds'] = elapsed
+    logger.info(
+        "Built %r from %d transactions in %.2fs", graph, len(transactions), elapsed
+    )
+    return graph
+
+
+def add_labels(graph: HeteroGraph, labels: pd.DataFrame) -> None:
+    """
+    Set ``graph.y`` (-1 for unlabeled nodes) of every node type in ``labels``.
+
+    Args:
+        graph: Graph to label
+        labels: DataFrame with entity_id, entity_type and is_fraud columns
+    """
+    node_index = graph.node_index
+    for node_type, group in labels.groupby("entity_type", observed=True):
+        if node_type not in node_index.node_types:
+            continue
+        y = np.full(node_index.num_nodes(node_type), -1, dtype=np.int8)
+        label_rows = node_index.lookup(node_type, pd.Index(group["entity_id"]))
+        found = label_rows >= 0
+        y[label_rows[found]] = group["is_fraud"].to_numpy(dtype=np.int8)[found]
+        graph.y[node_type] = y
+
+
+def _add_coalesced_edges(
+    graph: HeteroGraph,
+    edge_type: EdgeType,
+    edge_index: np.ndarray,
+    amount: Optional[np.ndarray],
+    timestamp: Optional[np.ndarray],
+    used: np.ndarray
+) -> None:
+    """Coalesce one edge type's per-transaction edges into the graph."""
+    edge_index, edge_attr, first, last = coalesce_edges(
+        edge_index,
+        amount[used] if amount is not None else None,
+        timestamp[used] if timestamp is not None else None
+    )
+    graph.edge_index[edge_type] = edge_index
+    graph.edge_attr[edge_type] = edge_attr
+    graph.edge_attr_names[edge_type] = list(COALESCED_EDGE_FEATURES[:edge_attr.shape[1]])
+    if first is not None:
+        graph.edge_time[edge_type] = first
+        graph.edge_last_time[edge_type] = last
+
+    num_edges = int(used.sum())
+    ratio = num_edges / edge_index.shape[1] if edge_index.shape[1] else 1.0
+    graph.metadata.setdefault('coalesce', {})[edge_type_name(edge_type)] = {
+        'edges': num_edges,
+        'coalesced_edges': edge_index.shape[1],
+        'compression_ratio': ratio,
+    }
+    logger.info(
+        "Coalesced %s: %d edges -> %d (%.1fx)",
+        edge_type_name(edge_type), num_edges, edge_index.shape[1], ratio
+    )
 
-    TODO: Implement graph construction:
-    - Create nodes for each entity type with their features
-    - Create edges based on relationships in transaction data
-    - Add node labels if provided
-    - Handle edge attributes (e.g., transaction amounts, timestamps)
-    - Return graph in format compatible with PyTorch Geometric
+
+def _handle_hubs(
+    graph: HeteroGraph,
+    hub_policies: Dict[str, str],
+    options: Dict[str, Any]
+) -> None:
+    """
+    Record the degree distributions of every edge type and apply the hub
+    policies (see ``hubs``).
+    """
+    degrees = {}
+    for edge_type in graph.edge_types:
+        src_type, _, dst_type = edge_type
+        src, dst = graph.edge_index[edge_type]
+        degrees[edge_type_name(edge_type)] = {
+            'src': hubs.degree_stats(np.bincount(src, minlength=graph.num_nodes(src_type))),
+            'dst': hubs.degree_stats(np.bincount(dst, minlength=graph.num_nodes(dst_type))),
+        }
+    graph.metadata['degrees'] = degrees
+
+    for edge_type in graph.edge_types:
+        policy = hub_policies.get(edge_type_name(edge_type))
+        if policy is None:
+            continue
+        stats = hubs.apply_hub_policy(
+            graph, edge_type, policy,
+            percentile=options['hub_percentile'],
+            min_degree=options['hub_min_degree'],
+            max_degree=options['hub_max_degree'],
+            seed=options['seed'],
+        )
+        graph.metadata.setdefault('hubs', {})[edge_type_name(edge_type)] = stats
+        if stats['hubs']:
+            logger.info(
+                "%s: %d hubs (%s), %d edges removed, %d virtual nodes",
+                edge_type_name(edge_type), stats['hubs'], policy,
+                stats['edges_removed'], stats['virtual_nodes']
+            )
+
+
+def append_transactions(
+    graph: HeteroGraph,
+    transactions: pd.DataFrame,
+    entities: Optional[Dict[str, pd.DataFrame]] = None,
+    config: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Add a batch of transactions to a built graph without rebuilding it.
+
+    New IDs are appended to the node index (existing rows never move) and
+    new nodes get no label; new transactions take their features from the
+    batch, other new nodes zero features. Transactions whose ID is already
+    in the graph (or repeated within the batch) are skipped, so a batch
+    can be re-appended without duplicating edges. Edges are appended through
+    growable buffers; for coalesced edge types, pairs already in the graph
+    have their count, amount and last time updated in place and only new
+    pairs are appended. The CSR/CSC are not rebuilt: appended edges form a
+    delta segment that neighbor queries scan, and once it exceeds
+    ``compact_fraction`` of an adjacency a background compaction merges it.
+    The cost is proportional to the batch (plus the delta), not the graph.
+
+    Derived meta-path edges and hub policies are not updated; they are
+    applied again by the next full build.
+
+    Args:
+        graph: Graph from ``build_heterogeneous_graph``
+        transactions: New transactions (cleaned, with the same columns as
+            the build's input), ideally later than those in the graph
+        entities: Optional feature tables of new or changed entities, keyed
+            by node type ('account', 'device', 'merchant'); their rows of
+            ``graph.x`` are overwritten
+        config: Optional ``graph`` config section (the one used to build
+            the graph)
+
+    Returns:
+        Statistics: transactions (appended), skipped, new_nodes and
+        new_edges per type, seconds
     """
-    pass
+    options = {**DEFAULT_GRAPH_CONFIG, **(config or {})}
+    coalesce = set(options['coalesce_edges'] or ())
+    started = time.perf_counter()
+    node_index = graph.node_index
+    before = {node_type: node_index.num_nodes(node_type) for node_type in NODE_COLUMNS}
+    batch_size = len(transactions)
+    id_column = NODE_COLUMNS['transaction']
+    if id_column in transactions.columns and 'transaction' in node_index.node_types:
+        ids = transactions[id_column]
+        known = _node_rows(node_index, 'transaction', ids) >= 0
+        repeated = (ids.notna() & ids.duplicated()).to_numpy()
+        if (known | repeated).any():
+            transactions = transactions[~(known | repeated)]
+    _, rows = index_transactions(
+        transactions, entities, node_index=node_index, node_types=_node_types(options)
+    )
+    graph.grow_nodes()
+
+    tables = {'transaction': transactions, **(entities or {})}
+    for node_type, table in tables.items():
+        names = graph.feature_names.get(node_type)
+        if table is None or not names or not set(names).issubset(table.columns):
+            continue
+        if node_type == "transaction":
+            table_rows = rows[node_type]
+        else:
+            table_rows = _node_rows(node_index, node_type, table[NODE_COLUMNS[node_type]])
+        found = table_rows >= 0
+        values = table[names].to_numpy(dtype=np.float32, na_value=0.0)
+        graph.x[node_type][table_rows[found]] = values[found]
+
+    edge_rows, amount, timestamp = _time_ordered(transactions, rows)
+    new_edges = {}
+    for edge_type in _edge_types(options):
+        src_type, _, dst_type = edge_type
+        if src_type not in rows or dst_type not in rows:
+            continue
+        edge_index, edge_attr, used = _edge_arrays(
+            edge_rows[src_type], edge_rows[dst_type], amount, node_index.index_dtype
+        )
+        count = graph.num_edges(edge_type) if edge_type in graph.edge_index else 0
+        if edge_type_name(edge_type) in coalesce:
+            _merge_coalesced_edges(graph, edge_type, edge_index, amount, timestamp, used)
+        else:
+            graph.append_edges(
+                edge_type, edge_index, edge_attr,
+                timestamp[used] if timestamp is not None else None
+            )
+        new_edges[edge_type_name(edge_type)] = graph.num_edges(edge_type) - count
+
+    compact_fraction = options['compact_fraction']
+    if any(graph.delta_edges(e) > compact_fraction * max(graph.num_edges(e), 1)
+           for e in graph.edge_types if e in graph.csr):
+        graph.compact_adjacency(background=True)
+
+    stats = {
+        'transactions': len(transactions),
+        'skipped': batch_size - len(transactions),
+        'new_nodes': {
+            node_type: node_index.num_nodes(node_type) - count
+            for node_type, count in before.items()
+        },
+        'new_edges': new_edges,
+        'seconds': time.perf_counter() - started,
+    }
+    logger.debug("Appended %d transactions in %.4fs", len(transactions), stats['seconds'])
+    return stats
+
+
+def _merge_coalesced_edges(
+    graph: HeteroGraph,
+    edge_type: EdgeType,
+    edge_index: np.ndarray,
+    amount: Optional[np.ndarray],
+    timestamp: Optional[np.ndarray],
+    used: np.ndarray
+) -> None:
+    """Fold a batch of per-transaction edges into a coalesced edge type."""
+    if edge_type not in graph.edge_index:
+        _add_coalesced_edges(graph, edge_type, edge_index, amount, timestamp, used)
+        return
+    edge_index, edge_attr, first, last = coalesce_edges(
+        edge_index,
+        amount[used] if amount is not None else None,
+        timestamp[used] if timestamp is not None else None
+    )
+    existing = graph.find_edges(edge_type, edge_index[0], edge_index[1])
+    found = existing >= 0
+    positions = existing[found]
+
+    attr = graph.edge_attr[edge_type]
+    attr[positions, 0] += edge_attr[found, 0]
+    if attr.shape[1] > 1:
+        attr[positions, 1] += edge_attr[found, 1]
+        attr[positions, 2] = attr[positions, 1] / attr[positions, 0]
+    late = False
+    if first is not None:
+        times = graph.edge_time[edge_type]
+        late = bool((first[found] < times[positions]).any())
+        times[positions] = np.minimum(times[positions], first[found])
+        last_times = graph.edge_last_time[edge_type]
+        last_times[positions] = np.maximum(last_times[positions], last[found])
+        # New pairs are appended in order of their first occurrence.
+        order = np.argsort(first[~found], kind="stable")
+    else:
+        order = np.arange(int((~found).sum()))
+    graph.append_edges(
+        edge_type,
+        edge_index[:, ~found][:, order],
+        edge_attr[~found][order],
+        first[~found][order] if first is not None else None,
+        last[~found][order] if last is not None else None,
+    )
+    if late:
+        graph.sort_edges_by_time([edge_type])
+
+    summary = graph.metadata.setdefault('coalesce', {}).get(edge_type_name(edge_type))
+    if summary is not None:
+        summary['edges'] += int(used.sum())
+        summary['coalesced_edges'] = graph.num_edges(edge_type)
+        summary['compression_ratio'] = summary['edges'] / max(summary['coalesced_edges'], 1)
+
+
+def _add_meta_path_edges(
+    graph: HeteroGraph,
+    rows: Dict[str, np.ndarray],
+    shared_type: str,
+    options: Dict[str, Any]
+) -> None:
+    """Add the Account-shares_<type>-Account edges of one shared node type."""
+    edge_index, weight, stats = shared_entity_edges(
+        rows['account'],
+        rows[shared_type],
+        graph.num_nodes('account'),
+        graph.num_nodes(shared_type),
+        max_degree=options['meta_path_max_degree'],
+        policy=options['meta_path_hub_policy'],
+        seed=options['seed'],
+    )
+    edge_type = ('account', f"shares_{shared_type}", 'account')
+    graph.edge_index[edge_type] = edge_index.astype(graph.node_index.index_dtype)
+    graph.edge_attr[edge_type] = weight
+    graph.edge_attr_names[edge_type] = ["shared_count"]
+    graph.metadata.setdefault('meta_paths', {})[edge_type_name(edge_type)] = stats
+    logger.info(
+        "Derived %d %s edges (%d hubs capped, %d account links dropped)",
+        stats['edges'], edge_type_name(edge_type), stats['hubs'], stats['pairs_dropped']
+    )
 
 
 def create_account_device_edges(
-    transactions: pd.DataFrame
+    transactions: pd.DataFrame,
+    coalesce: bool = False
 ) -> Tuple[Any, Any]:
     """
     Create edges between Account and Device nodes.
 
     Args:
         transactions: Transaction DataFrame with account_id and device_id
+        coalesce: Return one edge per distinct (account, device) pair, with
+            ``COALESCED_EDGE_FEATURES`` as edge features (see
+            ``coalesce_edges``)
 
     Returns:
         Tuple of (edge_index, edge_attr) for Account-Device edges
-        edge_index: [2, num_edges] tensor of (account_idx, device_idx) pairs
-        edge_attr: [num_edges, edge_feat_dim] tensor of edge features
+        edge_index: [2, num_edges] int32 array of (account_idx, device_idx)
+            pairs (int64 beyond 2**31 nodes)
+        edge_attr: [num_edges, edge_feat_dim] float32 array of edge features
+            (the transaction amount), or None if there is no amount column
 
-    TODO: Implement edge creation logic
+        Node indices number the distinct IDs occurring in each column, in
+        category order for categorical columns (see ``index_transactions``).
+        ``build_heterogeneous_graph`` builds all edge types in one pass.
     """
-    pass
+    return _edges_between(transactions, "account", "device", coalesce)
 
 
 def create_account_transaction_edges(
@@ -80,10 +834,8 @@ def create_account_transaction_edges(
 
     Returns:
         Tuple of (edge_index, edge_attr) for Account-Transaction edges
-
-    TODO: Implement edge creation logic
     """
-    pass
+    return _edges_between(transactions, "account", "transaction")
 
 
 def create_transaction_ip_edges(
@@ -98,9 +850,31 @@ def create_transaction_ip_edges(
     Returns:
         Tuple of (edge_index, edge_attr) for Transaction-IP edges
 
-    TODO: Implement edge creation logic
+        If the normalized ``ip_hi``/``ip_lo`` keys from ``clean_data`` are
+        present, IP nodes are indexed by them, so different spellings of one
+        address map to one node and unparseable addresses are skipped.
     """
-    pass
+    return _edges_between(transactions, "transaction", "ip")
+
+
+def create_transaction_subnet_edges(
+    transactions: pd.DataFrame
+) -> Tuple[Any, Any]:
+    """
+    Create edges between Transaction and Subnet nodes.
+
+    Subnet nodes are /24 IPv4 and /48 IPv6 networks, taken from the integer
+    ``ip_subnet`` key produced by ``cleaning.normalize_ip_addresses``, so no
+    strings are hashed.
+
+    Args:
+        transactions: Cleaned transaction DataFrame with transaction_id,
+            ip_version and ip_subnet
+
+    Returns:
+        Tuple of (edge_index, edge_attr) for Transaction-Subnet edges
+    """
+    return _edges_between(transactions, "transaction", "subnet")
 
 
 def create_transaction_merchant_edges(
@@ -114,8 +888,6 @@ def create_transaction_merchant_edges(
 
     Returns:
         Tuple of (edge_index, edge_attr) for Transaction-Merchant edges
-
-    TODO: Implement edge creation logic
     """
-    pass
+    return _edges_between(transactions, "transaction", "merchant")
 
@@ -0,0 +1,255 @@
+"""
+Incrementally maintained graph statistics (``GET /graph/stats``).
+
+``GraphStats`` computes node and edge counts, per edge type degree
+histograms and the number of connected components of a graph once, in
+vectorized form, and then keeps them current as ``HeteroGraph.append_edges``
+adds edges (``graph_stats`` attaches it to the graph):
+
+- Degrees are kept per edge type and side, with a streaming histogram over
+  power-of-two buckets (0, 1, 2-3, 4-7, ...): an appended batch moves each
+  touched node from its old bucket to its new one. New nodes are counted in
+  the zero bucket implicitly, from the live node counts.
+- Components are tracked by a union-find over all node types (initialized
+  from ``scipy.sparse.csgraph.connected_components``); a batch of edges is
+  merged with vectorized find and link-to-smaller-root rounds. Nodes
+  without edges are singleton components.
+
+Appends cost O(batch); ``summary`` costs O(node types + edge types +
+buckets), independent of the graph size.
+"""
+
+from typing import Any, Dict, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.csgraph import connected_components
+
+from .hetero_graph import GROWTH_FACTOR, EdgeType, HeteroGraph, edge_type_name
+
+
+_NUM_BUCKETS = 64
+
+
+def degree_bucket(degree: np.ndarray) -> np.ndarray:
+    """Histogram bucket of each degree: 0 for 0, k for [2^(k-1), 2^k)."""
+    return np.frexp(np.asarray(degree, dtype=np.float64))[1]
+
+
+def _bucket_label(bucket: int) -> str:
+    """Degree range of a bucket, e.g. '4-7'."""
+    if bucket <= 1:
+        return str(bucket)
+    return f"{2 ** (bucket - 1)}-{2 ** bucket - 1}"
+
+
+def _grow(array: np.ndarray, size: int, fill: int = 0) -> np.ndarray:
+    """``array`` with room for at least ``size`` entries (new ones ``fill``)."""
+    if len(array) >= size:
+        return array
+    grown = np.full(max(size, int(len(array) * GROWTH_FACTOR)), fill, dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+
+class GraphStats:
+    """
+    Statistics of one graph, updated as edges are appended.
+
+    Attributes:
+        graph: The graph (node and edge counts are read from it live)
+    """
+
+    def __init__(self, graph: HeteroGraph):
+        """
+        Compute the statistics of a graph.
+
+        Args:
+            graph: Graph to summarize
+        """
+        self.graph = graph
+        # (edge type, side) -> degree per node row, histogram of buckets >= 1, max
+        self._degree: Dict[Tuple[EdgeType, int], np.ndarray] = {}
+        self._histogram: Dict[Tuple[EdgeType, int], np.ndarray] = {}
+        self._max_degree: Dict[Tuple[EdgeType, int], int] = {}
+        for edge_type, edge_index in graph.edge_index.items():
+            for side in (0, 1):
+                node_type = edge_type[2 * side]
+                degree = np.bincount(edge_index[side], minlength=graph.num_nodes(node_type))
+                self._degree[(edge_type, side)] = degree.astype(np.int64)
+                self._histogram[(edge_type, side)] = np.bincount(
+                    degree_bucket(degree), minlength=_NUM_BUCKETS
+                )
+                self._max_degree[(edge_type, side)] = int(degree.max(initial=0))
+
+        # Union-find over all nodes: node type -> union-find id per row
+        # (over-allocated; the first ``_num_rows`` entries are valid).
+        self._uid: Dict[str, np.ndarray] = {}
+        self._num_rows: Dict[str, int] = {}
+        self._num_uids = 0
+        for node_type in graph.node_types:
+            self._allocate(node_type)
+        self._parent = np.arange(self._num_uids, dtype=np.int64)
+        if graph.edge_index:
+            src, dst = self._edge_uids(graph.edge_index)
+            adjacency = sp.coo_matrix(
+                (np.ones(len(src), dtype=np.int8), (src, dst)),
+                shape=(self._num_uids, self._num_uids)
+            )
+            count, labels = connected_components(adjacency, directed=False)
+            _, first = np.unique(labels, return_index=True)
+            self._parent = first[labels].astype(np.int64)
+            self._num_roots = int(count)
+        else:
+            self._num_roots = self._num_uids
+
+    def _allocate(self, node_type: str) -> np.ndarray:
+        """Union-find ids of a node type's rows, allocating ids for new rows."""
+        size = self._num_rows.get(node_type, 0)
+        num_nodes = self.graph.num_nodes(node_type)
+        uids = self._uid.get(node_type, np.zeros(0, dtype=np.int64))
+        if num_nodes > size:
+            uids = _grow(uids, num_nodes)
+            uids[size:num_nodes] = np.arange(self._num_uids, self._num_uids + num_nodes - size)
+            self._num_uids += num_nodes - size
+            self._uid[node_type] = uids
+            self._num_rows[node_type] = num_nodes
+        return uids
+
+    def _edge_uids(
+        self,
+        edge_index: Dict[EdgeType, np.ndarray]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Union-find ids of the endpoints of edges of several types."""
+        src = [self._uid[s][e[0]] for (s, _, _), e in edge_index.items()]
+        dst = [self._uid[d][e[1]] for (_, _, d), e in edge_index.items()]
+        return np.concatenate(src), np.concatenate(dst)
+
+    def _find(self, nodes: np.ndarray) -> np.ndarray:
+        """Roots of union-find ids, compressing their paths."""
+        roots = nodes
+        while True:
+            parents = self._parent[roots]
+            if np.array_equal(parents, roots):
+                break
+            roots = parents
+        self._parent[nodes] = roots
+        return roots
+
+    def _union(self, src: np.ndarray, dst: np.ndarray) -> None:
+        """Merge the components of each (src, dst) pair."""
+        left, right = self._find(src), self._find(dst)
+        while True:
+            differ = left != right
+            if not differ.any():
+                return
+            left, right = left[differ], right[differ]
+            high, low = np.maximum(left, right), np.minimum(left, right)
+            # Each distinct high root links below itself, so no cycles form
+            # and every one of them is a merge.
+            np.minimum.at(self._parent, high, low)
+            self._num_roots -= len(np.unique(high))
+            left, right = self._find(left), self._find(right)
+
+    def add_edges(self, edge_type: EdgeType, edge_index: np.ndarray) -> None:
+        """
+        Account for appended edges (called by ``HeteroGraph.append_edges``).
+
+        Args:
+            edge_type: Edge type
+            edge_index: [2, num_new_edges] node rows
+        """
+        for side in (0, 1):
+            key = (edge_type, side)
+            node_type = edge_type[2 * side]
+            degree = _grow(
+                self._degree.get(key, np.zeros(0, dtype=np.int64)),
+                self.graph.num_nodes(node_type)
+            )
+            histogram = self._histogram.get(key, np.zeros(_NUM_BUCKETS, dtype=np.int64))
+            nodes, added = np.unique(edge_index[side], return_counts=True)
+            old = degree[nodes]
+            new = old + added
+            histogram -= np.bincount(degree_bucket(old), minlength=_NUM_BUCKETS)
+            histogram += np.bincount(degree_bucket(new), minlength=_NUM_BUCKETS)
+            degree[nodes] = new
+            self._degree[key] = degree
+            self._histogram[key] = histogram
+            self._max_degree[key] = max(self._max_degree.get(key, 0), int(new.max(initial=0)))
+
+        src_type, _, dst_type = edge_type
+        before = self._num_uids
+        src, dst = self._allocate(src_type), self._allocate(dst_type)
+        self._parent = _grow(self._parent, self._num_uids)
+        self._parent[before:self._num_uids] = np.arange(before, self._num_uids)
+        self._num_roots += self._num_uids - before
+        self._union(src[edge_index[0]], dst[edge_index[1]])
+
+    @property
+    def num_components(self) -> int:
+        """Number of connected components (isolated nodes included)."""
+        unallocated = sum(
+            self.graph.num_nodes(t) - self._num_rows.get(t, 0) for t in self.graph.node_types
+        )
+        return self._num_roots + unallocated
+
+    def degree_histogram(self, edge_type: EdgeType, reverse: bool = False) -> Dict[str, int]:
+        """
+        Degree histogram of one side of an edge type.
+
+        Args:
+            edge_type: Edge type
+            reverse: Histogram of destination (in-)degrees instead of source
+
+        Returns:
+            Node count per degree range ('0', '1', '2-3', ...), up to the
+            highest non-empty bucket
+        """
+        side = int(reverse)
+        histogram = self._histogram.get((edge_type, side), np.zeros(_NUM_BUCKETS, dtype=np.int64))
+        counts = histogram.tolist()
+        counts[0] = self.graph.num_nodes(edge_type[2 * side]) - sum(counts[1:])
+        top = max((b for b, count in enumerate(counts) if count), default=0)
+        return {_bucket_label(b): counts[b] for b in range(top + 1)}
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        All statistics as a JSON-serializable dictionary.
+
+        Returns:
+            Dictionary with nodes (per type), edges (per type name), degrees
+            (per type name and side: max, mean, histogram) and components
+        """
+        graph = self.graph
+        degrees = {}
+        for edge_type in graph.edge_types:
+            num_edges = graph.num_edges(edge_type)
+            degrees[edge_type_name(edge_type)] = {
+                side_name: {
+                    'max': self._max_degree.get((edge_type, side), 0),
+                    'mean': num_edges / max(graph.num_nodes(edge_type[2 * side]), 1),
+                    'histogram': self.degree_histogram(edge_type, reverse=bool(side)),
+                }
+                for side, side_name in ((0, 'src'), (1, 'dst'))
+            }
+        return {
+            'nodes': {t: graph.num_nodes(t) for t in graph.node_types},
+            'edges': {edge_type_name(e): graph.num_edges(e) for e in graph.edge_types},
+            'degrees': degrees,
+            'components': self.num_components,
+        }
+
+
+def graph_stats(graph: HeteroGraph) -> GraphStats:
+    """
+    The statistics of a graph, computed on first use and then maintained.
+
+    Args:
+        graph: Graph
+
+    Returns:
+        ``graph.stats``, a GraphStats kept current by ``append_edges``
+    """
+    if graph.stats is None:
+        graph.stats = GraphStats(graph)
+    return graph.stats
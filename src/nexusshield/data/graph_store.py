@@ -0,0 +1,246 @@
+"""
+Directory-based on-disk format for ``HeteroGraph``.
+
+A saved graph is a directory of plain arrays plus a JSON manifest, so that
+opening it maps the files instead of reading them:
+
+- ``nodes/<type>.ids.arrow``: node IDs in row order (Arrow IPC; one column
+  per key level for IP nodes), read on first ID lookup
+- ``nodes/<type>.x.npy`` / ``nodes/<type>.y.npy``: features and labels, and
+  ``nodes/<type>.parent.npy`` for types with virtual hub sub-nodes
+- ``edges/<src>__<rel>__<dst>.<array>.npy``: ``edge_index``, ``edge_attr``,
+  ``edge_time``, ``edge_last_time`` and the CSR/CSC arrays
+  (``csr.indptr``, ``csr.indices``, ``csr.edge_ids``, same for ``csc``)
+- ``manifest.json``: format version, node counts, feature and edge feature
+  names, the file of every array and the graph metadata
+
+Arrays are ``.npy`` files opened with ``np.load(mmap_mode=...)``: opening
+costs a few system calls per file regardless of graph size, processes that
+open the same graph share one copy in the page cache, and
+``torch.from_numpy`` on the arrays (as in ``HeteroGraph.to_pyg``) keeps
+sharing the mapped pages. Graphs are written to a temporary directory and
+renamed into place, so readers never see a partial graph.
+"""
+
+from typing import Any, Dict, Optional, Union
+from pathlib import Path
+import functools
+import json
+import logging
+import os
+import shutil
+import time
+import uuid
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from .adjacency import CSR
+from .hetero_graph import HeteroGraph, NodeIndex, edge_type_name
+
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+
+_MANIFEST = "manifest.json"
+_EDGE_ARRAYS = ("edge_index", "edge_attr", "edge_time", "edge_last_time")
+_ADJACENCY_ARRAYS = ("indptr", "indices", "edge_ids")
+
+
+def _write_ids(path: Path, ids: pd.Index) -> None:
+    """
+    Write node IDs as an Arrow table, one column per index level. Integer
+    IDs (also in an object index) are stored as int64, others as strings.
+    """
+    if isinstance(ids, pd.MultiIndex):
+        columns = {name: ids.get_level_values(name).to_numpy() for name in ids.names}
+    else:
+        values = ids.to_numpy()
+        if values.dtype == object and pd.api.types.infer_dtype(ids, skipna=False) == "integer":
+            values = values.astype(np.int64)
+        elif values.dtype == object or pd.api.types.is_string_dtype(ids.dtype):
+            values = pa.array(np.asarray(values, dtype=object).astype(str), type=pa.string())
+        columns = {ids.name or "id": values}
+    feather.write_feather(pa.table(columns), str(path), compression="uncompressed")
+
+
+def read_ids(path: Union[str, Path]) -> pd.Index:
+    """Read node IDs written by ``_write_ids`` (or an Arrow file of the same layout)."""
+    table = feather.read_table(str(path), memory_map=True)
+    if table.num_columns > 1:
+        return pd.MultiIndex.from_arrays(
+            [column.to_numpy() for column in table.columns], names=table.column_names
+        )
+    name = table.column_names[0]
+    return pd.Index(table.column(0).to_pandas(), name=None if name == "id" else name)
+
+
+def save_graph(
+    graph: HeteroGraph,
+    directory: Union[str, Path],
+    overwrite: bool = False
+) -> Path:
+    """
+    Write a graph in the on-disk format.
+
+    Pending appended edges are merged into the adjacency first, so the
+    saved CSR/CSC cover every edge.
+
+    Args:
+        graph: Graph to save
+        directory: Target directory
+        overwrite: Replace an existing graph at ``directory``
+
+    Returns:
+        The graph directory
+
+    Raises:
+        FileExistsError: If ``directory`` exists and ``overwrite`` is not set
+    """
+    directory = Path(directory)
+    if directory.exists() and not overwrite:
+        raise FileExistsError(f"Graph directory already exists: {directory}")
+    directory.parent.mkdir(parents=True, exist_ok=True)
+    staging = directory.parent / f".tmp-{uuid.uuid4().hex}"
+    (staging / "nodes").mkdir(parents=True)
+    (staging / "edges").mkdir()
+
+    try:
+        nodes = {}
+        for node_type in graph.node_types:
+            entry: Dict[str, Any] = {
+                'num_nodes': graph.num_nodes(node_type), 'ids': f"nodes/{node_type}.ids.arrow",
+            }
+            # IDs not read since they were opened are copied as they are.
+            loader = graph.node_index.loader(node_type)
+            if isinstance(loader, functools.partial) and loader.func is read_ids:
+                shutil.copyfile(loader.args[0], staging / entry['ids'])
+            else:
+                _write_ids(staging / entry['ids'], graph.node_index.get_ids(node_type))
+            if node_type in graph.x:
+                entry['x'] = f"nodes/{node_type}.x.npy"
+                entry['feature_names'] = graph.feature_names.get(node_type, [])
+                np.save(staging / entry['x'], np.ascontiguousarray(graph.x[node_type]))
+            if node_type in graph.y:
+                entry['y'] = f"nodes/{node_type}.y.npy"
+                np.save(staging / entry['y'], graph.y[node_type])
+            if node_type in graph.node_parent:
+                entry['parent'] = f"nodes/{node_type}.parent.npy"
+                np.save(staging / entry['parent'], graph.node_parent[node_type])
+            nodes[node_type] = entry
+
+        edges = []
+        for edge_type in graph.edge_types:
+            name = edge_type_name(edge_type)
+            entry = {
+                'edge_type': list(edge_type),
+                'num_edges': graph.num_edges(edge_type),
+                'edge_attr_names': graph.edge_attr_names.get(edge_type),
+                'arrays': {},
+            }
+            for array in _EDGE_ARRAYS:
+                store = getattr(graph, array)
+                if edge_type in store:
+                    entry['arrays'][array] = f"edges/{name}.{array}.npy"
+                    np.save(staging / entry['arrays'][array],
+                            np.ascontiguousarray(store[edge_type]))
+            for kind, store in (("csr", graph.csr), ("csc", graph.csc)):
+                if edge_type not in store:
+                    continue
+                adjacency = graph.adjacency(edge_type, reverse=kind == "csc")
+                for array in _ADJACENCY_ARRAYS:
+                    entry['arrays'][f"{kind}.{array}"] = f"edges/{name}.{kind}.{array}.npy"
+                    np.save(staging / entry['arrays'][f"{kind}.{array}"],
+                            getattr(adjacency, array))
+            edges.append(entry)
+
+        manifest = {
+            'format_version': FORMAT_VERSION,
+            'created_at': time.time(),
+            'nodes': nodes,
+            'edges': edges,
+            'metadata': graph.metadata,
+        }
+        (staging / _MANIFEST).write_text(json.dumps(manifest, indent=2, default=str))
+        if directory.exists():
+            retired = directory.parent / f".old-{uuid.uuid4().hex}"
+            os.replace(directory, retired)
+            os.replace(staging, directory)
+            shutil.rmtree(retired, ignore_errors=True)
+        else:
+            os.replace(staging, directory)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    logger.info("Saved %r to %s", graph, directory)
+    return directory
+
+
+def load_graph(
+    directory: Union[str, Path],
+    mmap_mode: Optional[str] = "r"
+) -> HeteroGraph:
+    """
+    Open a graph saved by ``save_graph``.
+
+    Args:
+        directory: Graph directory
+        mmap_mode: ``np.load`` mode: 'r' (read-only, shared pages; the
+            default), 'c' (copy-on-write, for graphs that will be updated
+            in place with ``append_transactions``) or None to read the
+            arrays into memory
+
+    Returns:
+        HeteroGraph whose arrays are memory maps of the files and whose
+        node IDs are read on first lookup
+
+    Raises:
+        ValueError: If the graph was written with a newer format
+    """
+    directory = Path(directory)
+    manifest = json.loads((directory / _MANIFEST).read_text())
+    if manifest['format_version'] > FORMAT_VERSION:
+        raise ValueError(
+            f"Graph format {manifest['format_version']} is newer than "
+            f"supported format {FORMAT_VERSION}"
+        )
+
+    def load(name: str) -> np.ndarray:
+        return np.load(directory / name, mmap_mode=mmap_mode)
+
+    lazy = {
+        node_type: (entry['num_nodes'], functools.partial(read_ids, directory / entry['ids']))
+        for node_type, entry in manifest['nodes'].items()
+    }
+    graph = HeteroGraph(NodeIndex(lazy=lazy))
+    for node_type, entry in manifest['nodes'].items():
+        if 'x' in entry:
+            graph.x[node_type] = load(entry['x'])
+            graph.feature_names[node_type] = entry['feature_names']
+        if 'y' in entry:
+            graph.y[node_type] = load(entry['y'])
+        if 'parent' in entry:
+            graph.node_parent[node_type] = load(entry['parent'])
+
+    for entry in manifest['edges']:
+        edge_type = tuple(entry['edge_type'])
+        arrays = entry['arrays']
+        for array in _EDGE_ARRAYS:
+            if array in arrays:
+                getattr(graph, array)[edge_type] = load(arrays[array])
+        if entry['edge_attr_names'] is not None:
+            graph.edge_attr_names[edge_type] = entry['edge_attr_names']
+        for kind, store in (("csr", graph.csr), ("csc", graph.csc)):
+            if f"{kind}.indptr" in arrays:
+                src_type, _, dst_type = edge_type
+                num_cols = graph.num_nodes(src_type if kind == "csc" else dst_type)
+                store[edge_type] = CSR(
+                    *(load(arrays[f"{kind}.{array}"]) for array in _ADJACENCY_ARRAYS),
+                    num_cols
+                )
+    graph.metadata = manifest['metadata']
+    return graph
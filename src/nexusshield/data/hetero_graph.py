@@ -0,0 +1,707 @@
+"""
+In-memory heterogeneous graph container.
+
+``HeteroGraph`` holds the graph produced by ``graph_builder`` as plain numpy
+arrays keyed like PyTorch Geometric's ``HeteroData``: node types are strings
+('account', 'device', ...) and edge types are (source, relation, destination)
+triples. It can be built, cached and analysed without torch installed;
+``to_pyg`` converts it when training.
+
+``NodeIndex`` is the global node ID to row mapping, one ``pd.Index`` per node
+type. Row ``i`` of a node type's feature matrix, label vector and edge
+endpoints all refer to the node with ID ``ids[node_type][i]``.
+
+Besides the COO ``edge_index``, each edge type has a CSR (by source) and a
+CSC (by destination, stored as the CSR of the reversed edges) from
+``adjacency``. ``neighbors`` and ``k_hop`` answer neighbor queries in
+O(degree) for the scorer, samplers and visualization.
+
+Edges with times are kept sorted by ``edge_time`` within each edge type, so
+``window`` can return the graph of a time range [t0, t1) as slices located
+by binary search, sharing memory with the full graph.
+
+Graphs grow in place (``graph_builder.append_transactions``): node and edge
+arrays live in over-allocated buffers, so ``append_edges`` and
+``grow_nodes`` copy only the new rows. Edges appended after the CSR/CSC
+were built form a delta segment that neighbor queries scan alongside the
+adjacency until ``compact_adjacency`` merges it, optionally in a background
+thread.
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from concurrent.futures import Future, ThreadPoolExecutor
+import threading
+
+import numpy as np
+import pandas as pd
+
+from .adjacency import CSR, index_dtype
+from .feature_store import FeatureStore
+
+
+EdgeType = Tuple[str, str, str]
+
+# Buffers are over-allocated by this factor when they have to grow.
+GROWTH_FACTOR = 1.5
+
+_compaction_pool: Optional[ThreadPoolExecutor] = None
+
+
+def edge_type_name(edge_type: EdgeType) -> str:
+    """Config and log name of an edge type, e.g. 'account__uses__device'."""
+    return "__".join(edge_type)
+
+
+class NodeIndex:
+    """
+    Global node ID index, one ``pd.Index`` per node type.
+
+    IDs are only ever appended, so existing node rows stay valid as the
+    index grows. Appends to a non-empty type go to a small delta index that
+    is merged into the main one once it exceeds 1/``DELTA_FRACTION`` of it
+    (or when ``ids`` is read), so adding a batch costs O(batch + delta)
+    rather than rebuilding the hash table of the whole type.
+
+    Types can also be registered lazily (``lazy``) with their size and a
+    loader, as ``graph_store.load_graph`` does; their IDs are read on first
+    lookup.
+    """
+
+    DELTA_FRACTION = 16
+    DELTA_MIN = 100_000
+
+    def __init__(
+        self,
+        ids: Optional[Dict[str, pd.Index]] = None,
+        lazy: Optional[Dict[str, Tuple[int, Callable[[], pd.Index]]]] = None
+    ):
+        """
+        Initialize the index.
+
+        Args:
+            ids: Optional initial IDs per node type, in row order
+            lazy: Optional node types whose IDs are loaded on first use, as
+                (number of nodes, loader) pairs
+        """
+        self._base: Dict[str, Optional[pd.Index]] = dict(ids or {})
+        self._delta: Dict[str, pd.Index] = {}
+        self._lazy: Dict[str, Tuple[int, Callable[[], pd.Index]]] = dict(lazy or {})
+        for node_type in self._lazy:
+            # Placeholder that keeps the type's position in node_types.
+            self._base[node_type] = None
+
+    def _load(self, node_type: str) -> Optional[pd.Index]:
+        """Main index of a node type, loading it if it is lazy."""
+        if node_type in self._lazy:
+            _, loader = self._lazy.pop(node_type)
+            self._base[node_type] = loader()
+        return self._base.get(node_type)
+
+    def get_ids(self, node_type: str) -> pd.Index:
+        """IDs of one node type in row order (loading only that type)."""
+        self._load(node_type)
+        self._compact(node_type)
+        return self._base[node_type]
+
+    def loader(self, node_type: str) -> Optional[Callable[[], pd.Index]]:
+        """Loader of a lazy node type whose IDs have not been read yet."""
+        entry = self._lazy.get(node_type)
+        return entry[1] if entry is not None else None
+
+    @property
+    def ids(self) -> Dict[str, pd.Index]:
+        """Node IDs in row order per node type."""
+        for node_type in list(self._lazy):
+            self._load(node_type)
+        for node_type in list(self._delta):
+            self._compact(node_type)
+        return self._base
+
+    @property
+    def node_types(self) -> List[str]:
+        """Indexed node types."""
+        return list(self._base)
+
+    def num_nodes(self, node_type: str) -> int:
+        """Number of nodes of a type (0 if the type is not indexed)."""
+        if node_type in self._lazy:
+            return self._lazy[node_type][0]
+        return len(self._base.get(node_type, ())) + len(self._delta.get(node_type, ()))
+
+    @property
+    def index_dtype(self) -> np.dtype:
+        """int32 if every node type fits, otherwise int64."""
+        return index_dtype(max((self.num_nodes(t) for t in self.node_types), default=0))
+
+    def _compact(self, node_type: str) -> None:
+        """Merge the delta index of a node type into its main index."""
+        delta = self._delta.pop(node_type, None)
+        if delta is not None:
+            self._base[node_type] = self._base[node_type].append(delta)
+
+    def add_level(self, node_type: str, name: str) -> None:
+        """
+        Append an integer index level (0 for every existing node) to a node type.
+
+        Lookups and appends with the original levels keep working: their
+        keys are padded with 0 for the added levels (see ``lookup``).
+
+        Args:
+            node_type: Node type
+            name: Name of the new level
+        """
+        ids = self.get_ids(node_type)
+        levels = ([ids.get_level_values(i) for i in range(ids.nlevels)]
+                  if isinstance(ids, pd.MultiIndex) else [ids])
+        self._base[node_type] = pd.MultiIndex.from_arrays(
+            levels + [np.zeros(len(ids), dtype=np.int64)], names=[*ids.names, name]
+        )
+
+    @staticmethod
+    def _conform(existing: pd.Index, ids: Sequence[Any]) -> Sequence[Any]:
+        """Pad keys with 0 for index levels added by ``add_level``."""
+        if not isinstance(existing, pd.MultiIndex) or not isinstance(ids, pd.Index):
+            return ids
+        levels = ([ids.get_level_values(i) for i in range(ids.nlevels)]
+                  if isinstance(ids, pd.MultiIndex) else [ids])
+        if len(levels) >= existing.nlevels:
+            return ids
+        padding = [np.zeros(len(ids), dtype=np.int64)] * (existing.nlevels - len(levels))
+        return pd.MultiIndex.from_arrays(levels + padding, names=existing.names)
+
+    def add(self, node_type: str, ids: pd.Index) -> np.ndarray:
+        """
+        Append unseen IDs and return the row of every given ID.
+
+        Args:
+            node_type: Node type
+            ids: Unique node IDs
+
+        Returns:
+            int64 array of node rows aligned with ``ids``
+        """
+        existing = self._load(node_type)
+        if existing is None or len(existing) == 0:
+            # Nothing to look up against: every ID is new.
+            self._base[node_type] = ids
+            return np.arange(len(ids), dtype=np.int64)
+        ids = self._conform(existing, ids)
+        positions = self.lookup(node_type, ids)
+        new = positions < 0
+        if new.any():
+            num_nodes = self.num_nodes(node_type)
+            positions[new] = np.arange(num_nodes, num_nodes + int(new.sum()))
+            delta = self._delta.get(node_type)
+            self._delta[node_type] = ids[new] if delta is None else delta.append(ids[new])
+            if len(self._delta[node_type]) > max(
+                self.DELTA_MIN, len(existing) // self.DELTA_FRACTION
+            ):
+                self._compact(node_type)
+        return positions
+
+    def lookup(self, node_type: str, ids: Sequence[Any]) -> np.ndarray:
+        """
+        Rows of node IDs.
+
+        Args:
+            node_type: Node type
+            ids: Node IDs (or an Index / MultiIndex of them)
+
+        Returns:
+            int64 array of node rows, -1 for unknown IDs
+        """
+        existing = self._load(node_type)
+        if existing is None:
+            return np.full(len(ids), -1, dtype=np.int64)
+        ids = self._conform(existing, ids)
+        positions = existing.get_indexer(ids).astype(np.int64)
+        delta = self._delta.get(node_type)
+        missing = positions < 0
+        if delta is not None and missing.any():
+            ids = ids if isinstance(ids, pd.Index) else pd.Index(ids)
+            found = delta.get_indexer(ids[missing])
+            positions[missing] = np.where(found >= 0, found + len(existing), -1)
+        return positions
+
+
+class HeteroGraph:
+    """
+    Heterogeneous graph stored as numpy arrays.
+
+    Attributes:
+        node_index: Global node ID index
+        x: Node feature matrix [num_nodes, num_features] per node type
+            (float32; only for node types with features)
+        feature_names: Feature column names per node type
+        y: Node labels per node type (int8, -1 where unlabeled)
+        node_parent: For node types with virtual sub-nodes (see ``hubs``),
+            the parent row of each node (-1 for real nodes)
+        edge_index: [2, num_edges] int32/int64 array per edge type
+        edge_attr: [num_edges, num_edge_features] float32 array per edge type
+        edge_attr_names: Column names of edge_attr per edge type
+        edge_time: int64 epoch seconds per edge, per edge type (the first
+            occurrence for coalesced edges), ascending within each type
+        edge_last_time: int64 epoch seconds of the last occurrence of each
+            coalesced edge, for coalesced edge types only
+        csr: Adjacency by source node per edge type
+        csc: Adjacency by destination node per edge type
+        metadata: Free-form build information (config, statistics)
+        stats: ``graph_stats.GraphStats`` maintained by ``append_edges``,
+            once requested through ``graph_stats.graph_stats``
+    """
+
+    def __init__(self, node_index: Optional[NodeIndex] = None):
+        """
+        Initialize an empty graph.
+
+        Args:
+            node_index: Optional node index (a new empty one by default)
+        """
+        self.node_index = node_index or NodeIndex()
+        self.x: Dict[str, np.ndarray] = {}
+        self.feature_names: Dict[str, List[str]] = {}
+        self.y: Dict[str, np.ndarray] = {}
+        self.node_parent: Dict[str, np.ndarray] = {}
+        self.edge_index: Dict[EdgeType, np.ndarray] = {}
+        self.edge_attr: Dict[EdgeType, np.ndarray] = {}
+        self.edge_attr_names: Dict[EdgeType, List[str]] = {}
+        self.edge_time: Dict[EdgeType, np.ndarray] = {}
+        self.edge_last_time: Dict[EdgeType, np.ndarray] = {}
+        self.csr: Dict[EdgeType, CSR] = {}
+        self.csc: Dict[EdgeType, CSR] = {}
+        self.metadata: Dict[str, Any] = {}
+        self.stats: Optional[Any] = None
+        # (store name, key) -> (buffer, the view of it currently in the store)
+        self._buffers: Dict[Tuple[str, Any], Tuple[np.ndarray, np.ndarray]] = {}
+        self._lock = threading.Lock()
+        self._compaction: Optional[Future] = None
+
+    @property
+    def node_types(self) -> List[str]:
+        """Node types, in index order."""
+        return self.node_index.node_types
+
+    @property
+    def edge_types(self) -> List[EdgeType]:
+        """Edge types, in insertion order."""
+        return list(self.edge_index)
+
+    def num_nodes(self, node_type: str) -> int:
+        """Number of nodes of a type."""
+        return self.node_index.num_nodes(node_type)
+
+    def num_edges(self, edge_type: EdgeType) -> int:
+        """Number of edges of a type."""
+        return self.edge_index[edge_type].shape[1]
+
+    def _append(
+        self,
+        name: str,
+        store: Dict[Any, np.ndarray],
+        key: Any,
+        values: np.ndarray,
+        axis: int = 0
+    ) -> None:
+        """
+        Append ``values`` to ``store[key]`` along ``axis`` through a growable
+        buffer; only the new values are copied unless the buffer is full.
+        """
+        current = store.get(key)
+        size = current.shape[axis] if current is not None else 0
+        total = size + values.shape[axis]
+        dtype = values.dtype if current is None else np.result_type(current.dtype, values.dtype)
+        buffer, view = self._buffers.get((name, key), (None, None))
+        if (buffer is None or view is not current or buffer.dtype != dtype
+                or buffer.shape[axis] < total):
+            shape = list(values.shape)
+            shape[axis] = max(total, int(total * GROWTH_FACTOR))
+            buffer = np.empty(shape, dtype=dtype)
+            if current is not None:
+                buffer[(slice(None),) * axis + (slice(0, size),)] = current
+        buffer[(slice(None),) * axis + (slice(size, total),)] = values
+        view = buffer[(slice(None),) * axis + (slice(0, total),)]
+        store[key] = view
+        self._buffers[(name, key)] = (buffer, view)
+
+    def grow_nodes(self) -> None:
+        """
+        Extend node features (zeros), labels (-1) and parents (-1) to the
+        current node count.
+        """
+        for store, name, fill in ((self.x, "x", 0.0), (self.y, "y", -1),
+                                  (self.node_parent, "node_parent", -1)):
+            for node_type, values in list(store.items()):
+                missing = self.num_nodes(node_type) - len(values)
+                if missing > 0:
+                    pad = np.full((missing,) + values.shape[1:], fill, dtype=values.dtype)
+                    self._append(name, store, node_type, pad)
+
+    def append_edges(
+        self,
+        edge_type: EdgeType,
+        edge_index: np.ndarray,
+        edge_attr: Optional[np.ndarray] = None,
+        edge_time: Optional[np.ndarray] = None,
+        edge_last_time: Optional[np.ndarray] = None
+    ) -> None:
+        """
+        Append edges of one type, in amortized O(new edges).
+
+        The CSR/CSC are not touched: the new edges form their delta segment
+        until ``compact_adjacency``. Edges should arrive in time order; a
+        batch older than the newest edge makes this type be re-sorted.
+
+        Args:
+            edge_type: (source, relation, destination) triple
+            edge_index: [2, num_new_edges] node rows
+            edge_attr: Edge features, if the type has them
+            edge_time: Epoch seconds per edge, ascending
+            edge_last_time: Last occurrence per edge (coalesced types)
+        """
+        existing_times = self.edge_time.get(edge_type)
+        late = (edge_time is not None and existing_times is not None
+                and len(edge_time) and len(existing_times)
+                and edge_time[0] < existing_times[-1])
+        self._append("edge_index", self.edge_index, edge_type, edge_index, axis=1)
+        for name, store, values in (("edge_attr", self.edge_attr, edge_attr),
+                                    ("edge_time", self.edge_time, edge_time),
+                                    ("edge_last_time", self.edge_last_time, edge_last_time)):
+            if values is not None:
+                self._append(name, store, edge_type, values)
+        if late:
+            self.sort_edges_by_time([edge_type])
+        if self.stats is not None:
+            self.stats.add_edges(edge_type, edge_index)
+
+    def sort_edges_by_time(self, edge_types: Optional[Sequence[EdgeType]] = None) -> None:
+        """
+        Order the edges of timed edge types by ``edge_time`` (stable).
+
+        Args:
+            edge_types: Edge types to sort (default: every timed type)
+
+        Edge types that are already sorted are left untouched; adjacency of
+        reordered types is dropped and rebuilt on next use.
+        """
+        for edge_type in edge_types or list(self.edge_time):
+            times = self.edge_time[edge_type]
+            if len(times) < 2 or (times[1:] >= times[:-1]).all():
+                continue
+            order = np.argsort(times, kind="stable")
+            self.edge_index[edge_type] = self.edge_index[edge_type][:, order]
+            self.edge_time[edge_type] = times[order]
+            for store in (self.edge_attr, self.edge_last_time):
+                if edge_type in store:
+                    store[edge_type] = store[edge_type][order]
+            self.csr.pop(edge_type, None)
+            self.csc.pop(edge_type, None)
+
+    def window(
+        self,
+        start: int,
+        end: int,
+        features: Optional[FeatureStore] = None
+    ) -> "HeteroGraph":
+        """
+        View of the graph restricted to edges with ``start <= edge_time < end``.
+
+        Each timed edge type is cut with two binary searches on its sorted
+        ``edge_time``; the returned arrays are slices of this graph's, not
+        copies. Edge types without times (e.g. derived meta-path edges) are
+        shared whole. Nodes and their rows are unchanged, so node IDs, labels
+        and embeddings line up with the full graph.
+
+        Args:
+            start: Window start, epoch seconds (inclusive)
+            end: Window end, epoch seconds (exclusive)
+            features: Optional feature store; node features are then taken
+                from its latest version with ``as_of < end`` instead of this
+                graph's (which may have been computed on later data)
+
+        Returns:
+            HeteroGraph sharing memory with this one
+        """
+        view = HeteroGraph(self.node_index)
+        view.x = dict(self.x)
+        view.feature_names = dict(self.feature_names)
+        view.y = dict(self.y)
+        view.node_parent = dict(self.node_parent)
+        view.edge_attr_names = dict(self.edge_attr_names)
+        for edge_type, edge_index in self.edge_index.items():
+            times = self.edge_time.get(edge_type)
+            if times is None:
+                view.edge_index[edge_type] = edge_index
+                if edge_type in self.edge_attr:
+                    view.edge_attr[edge_type] = self.edge_attr[edge_type]
+                if edge_type in self.csr:
+                    view.csr[edge_type] = self.csr[edge_type]
+                    view.csc[edge_type] = self.csc[edge_type]
+                continue
+            lo, hi = np.searchsorted(times, [start, end], side="left")
+            view.edge_index[edge_type] = edge_index[:, lo:hi]
+            view.edge_time[edge_type] = times[lo:hi]
+            for source, target in ((self.edge_attr, view.edge_attr),
+                                   (self.edge_last_time, view.edge_last_time)):
+                if edge_type in source:
+                    target[edge_type] = source[edge_type][lo:hi]
+        view.metadata = {**self.metadata, 'window': (int(start), int(end))}
+
+        if features is not None:
+            version = features.version_as_of(end - 1)
+            if version is None:
+                raise ValueError(f"No feature store version as of {end - 1} in {features.root}")
+            snapshot = features.open(version)
+            for node_type in snapshot.node_types:
+                if node_type in self.node_index.ids:
+                    ids = self.node_index.ids[node_type]
+                    view.x[node_type] = snapshot.get(node_type, ids).astype(np.float32)
+                    view.feature_names[node_type] = snapshot.columns(node_type)
+            view.metadata['feature_version'] = version
+        return view
+
+    def _sizes(self, edge_type: EdgeType, reverse: bool) -> Tuple[int, int]:
+        """(row, column) node counts of an edge type's CSR or CSC."""
+        src_type, _, dst_type = edge_type
+        sizes = (self.num_nodes(src_type), self.num_nodes(dst_type))
+        return sizes[::-1] if reverse else sizes
+
+    def _delta(
+        self,
+        edge_type: EdgeType,
+        reverse: bool,
+        adjacency: Optional[CSR]
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        (rows, cols, edge ids) of the edges not yet in ``adjacency``.
+
+        An adjacency always holds a prefix of the edge list, so the delta is
+        the edges from ``adjacency.num_edges`` on.
+        """
+        covered = adjacency.num_edges if adjacency is not None else 0
+        src, dst = self.edge_index[edge_type][:, covered:]
+        ids = np.arange(covered, covered + len(src))
+        return (dst, src, ids) if reverse else (src, dst, ids)
+
+    def adjacency(self, edge_type: EdgeType, reverse: bool = False) -> CSR:
+        """
+        CSR (by source) or, with ``reverse``, CSC (by destination) of an edge type.
+
+        Built on first use if ``build_adjacency`` has not been called; a
+        pending delta segment is merged in first.
+        """
+        store = self.csc if reverse else self.csr
+        num_rows, num_cols = self._sizes(edge_type, reverse)
+        with self._lock:
+            adjacency = store.get(edge_type)
+        rows, cols, ids = self._delta(edge_type, reverse, adjacency)
+        if adjacency is None:
+            adjacency = CSR.from_edges(rows, cols, num_rows, num_cols)
+        elif len(rows) or adjacency.num_rows < num_rows or adjacency.num_cols < num_cols:
+            adjacency = adjacency.merge(rows, cols, ids, num_rows, num_cols)
+        else:
+            return adjacency
+        with self._lock:
+            store[edge_type] = adjacency
+        return adjacency
+
+    def delta_edges(self, edge_type: EdgeType) -> int:
+        """Number of edges appended since the CSR of an edge type was built."""
+        adjacency = self.csr.get(edge_type)
+        covered = adjacency.num_edges if adjacency is not None else 0
+        return self.num_edges(edge_type) - covered
+
+    def compact_adjacency(self, background: bool = False) -> Optional[Future]:
+        """
+        Merge the delta segments into the CSR/CSC of every edge type.
+
+        Args:
+            background: Merge in a worker thread and return immediately;
+                queries keep using the old adjacency plus its delta until
+                the merged one is swapped in
+
+        Returns:
+            The running merge's Future when ``background`` is set
+        """
+        if background and self._compaction is not None and not self._compaction.done():
+            return self._compaction
+        jobs = []
+        for edge_type in self.edge_types:
+            for reverse, store in ((False, self.csr), (True, self.csc)):
+                with self._lock:
+                    adjacency = store.get(edge_type)
+                if adjacency is None:
+                    continue
+                rows, cols, ids = self._delta(edge_type, reverse, adjacency)
+                if len(rows):
+                    jobs.append((store, edge_type, adjacency, rows, cols, ids,
+                                 self._sizes(edge_type, reverse)))
+
+        def run() -> None:
+            for store, edge_type, adjacency, rows, cols, ids, (num_rows, num_cols) in jobs:
+                merged = adjacency.merge(rows, cols, ids, num_rows, num_cols)
+                with self._lock:
+                    # Skip if the adjacency was rebuilt or dropped meanwhile.
+                    if store.get(edge_type) is adjacency:
+                        store[edge_type] = merged
+
+        if not background:
+            run()
+            return None
+        global _compaction_pool
+        if _compaction_pool is None:
+            _compaction_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="compaction")
+        self._compaction = _compaction_pool.submit(run)
+        return self._compaction
+
+    def _expand(
+        self,
+        edge_type: EdgeType,
+        reverse: bool,
+        nodes: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Neighbors of several nodes, from the adjacency and its delta segment.
+
+        Returns:
+            Tuple of (neighbor row, COO edge position) per edge
+        """
+        store = self.csc if reverse else self.csr
+        with self._lock:
+            adjacency = store.get(edge_type)
+        if adjacency is None:
+            adjacency = self.adjacency(edge_type, reverse)
+        inside = nodes[nodes < adjacency.num_rows]
+        entries, _ = adjacency.gather(inside)
+        rows, cols, ids = self._delta(edge_type, reverse, adjacency)
+        if len(rows) == 0:
+            return adjacency.indices[entries], adjacency.edge_ids[entries]
+        extra = np.isin(rows, nodes)
+        return (np.concatenate([adjacency.indices[entries], cols[extra]]),
+                np.concatenate([adjacency.edge_ids[entries], ids[extra]]))
+
+    def find_edges(
+        self,
+        edge_type: EdgeType,
+        src: np.ndarray,
+        dst: np.ndarray
+    ) -> np.ndarray:
+        """
+        COO positions of the edges ``src[i] -> dst[i]`` (-1 where absent).
+
+        Only the neighborhoods of the given sources are searched. With
+        parallel edges, any one of them is returned.
+        """
+        neighbors, ids = self._expand(edge_type, False, np.unique(src))
+        if len(ids) == 0:
+            return np.full(len(src), -1, dtype=np.int64)
+        width = max(self.num_nodes(edge_type[2]), 1)
+        keys = self.edge_index[edge_type][0, ids].astype(np.int64) * width + neighbors
+        order = np.argsort(keys)
+        keys, ids = keys[order], ids[order]
+        query = src.astype(np.int64) * width + dst
+        position = np.minimum(np.searchsorted(keys, query), len(keys) - 1)
+        return np.where(keys[position] == query, ids[position], -1).astype(np.int64)
+
+    def build_adjacency(self) -> None:
+        """Build the CSR and CSC of every edge type."""
+        for edge_type in self.edge_types:
+            self.csr[edge_type] = self.adjacency(edge_type)
+            self.csc[edge_type] = self.csr[edge_type].transpose()
+
+    def neighbors(
+        self,
+        edge_type: EdgeType,
+        node: int,
+        reverse: bool = False
+    ) -> np.ndarray:
+        """
+        Neighbors of one node along an edge type, in O(degree).
+
+        Args:
+            edge_type: (source, relation, destination) triple
+            node: Source node row (destination row if ``reverse``)
+            reverse: Follow edges backwards
+
+        Returns:
+            Sorted neighbor rows
+        """
+        neighbors, _ = self._expand(edge_type, reverse, np.array([node], dtype=np.int64))
+        return np.sort(neighbors)
+
+    def k_hop(
+        self,
+        node_type: str,
+        nodes: Sequence[int],
+        num_hops: int
+    ) -> Dict[str, np.ndarray]:
+        """
+        Nodes within ``num_hops`` of the seeds, following every edge type in
+        both directions.
+
+        Each hop expands the whole frontier per edge type with
+        ``CSR.gather``, so the cost is proportional to the edges touched.
+
+        Args:
+            node_type: Type of the seed nodes
+            nodes: Seed node rows
+            num_hops: Number of hops
+
+        Returns:
+            Sorted node rows per node type, seeds included
+        """
+        reached = {node_type: np.unique(np.asarray(nodes, dtype=np.int64))}
+        frontier = dict(reached)
+        for _ in range(num_hops):
+            found: Dict[str, List[np.ndarray]] = {}
+            for edge_type in self.edge_types:
+                src_type, _, dst_type = edge_type
+                for reverse, start, end in ((False, src_type, dst_type),
+                                            (True, dst_type, src_type)):
+                    if start not in frontier or len(frontier[start]) == 0:
+                        continue
+                    neighbors, _ = self._expand(edge_type, reverse, frontier[start])
+                    found.setdefault(end, []).append(neighbors)
+            frontier = {}
+            for end, parts in found.items():
+                candidates = np.unique(np.concatenate(parts).astype(np.int64))
+                seen = reached.get(end, np.empty(0, dtype=np.int64))
+                new = candidates[~np.isin(candidates, seen, assume_unique=True)]
+                if len(new):
+                    frontier[end] = new
+                    reached[end] = np.union1d(seen, new)
+            if not frontier:
+                break
+        return reached
+
+    def __repr__(self) -> str:
+        nodes = ", ".join(f"{t}={self.num_nodes(t)}" for t in self.node_types)
+        edges = ", ".join(f"{edge_type_name(e)}={self.num_edges(e)}" for e in self.edge_types)
+        return f"HeteroGraph(nodes: {nodes}; edges: {edges})"
+
+    def to_pyg(self) -> Any:
+        """
+        Convert to a PyTorch Geometric ``HeteroData``.
+
+        Arrays are shared with the tensors where dtypes allow; edge indices
+        are widened to int64 as PyG requires.
+
+        Returns:
+            torch_geometric.data.HeteroData
+        """
+        import torch
+        from torch_geometric.data import HeteroData
+
+        data = HeteroData()
+        for node_type in self.node_types:
+            data[node_type].num_nodes = self.num_nodes(node_type)
+            if node_type in self.x:
+                data[node_type].x = torch.from_numpy(self.x[node_type])
+            if node_type in self.y:
+                data[node_type].y = torch.from_numpy(self.y[node_type].astype(np.int64))
+        for edge_type, edge_index in self.edge_index.items():
+            data[edge_type].edge_index = torch.from_numpy(edge_index.astype(np.int64))
+            if edge_type in self.edge_attr:
+                data[edge_type].edge_attr = torch.from_numpy(self.edge_attr[edge_type])
+            if edge_type in self.edge_time:
+                data[edge_type].time = torch.from_numpy(self.edge_time[edge_type])
+        return data
@@ -0,0 +1,211 @@
+"""
+Build-time analysis and handling of hub (super-) nodes.
+
+A popular merchant or a carrier-NAT IP can collect millions of edges, which
+then dominate memory and neighbor aggregation. ``degree_stats`` summarizes
+the degree distribution of every edge type. Nodes whose degree exceeds the
+``hub_percentile`` of their distribution (and ``hub_min_degree``) are hubs,
+and ``apply_hub_policy`` handles the hub side of an edge type with one of:
+
+- ``drop``: remove every edge of a hub
+- ``sample``: keep a seeded uniform sample of ``hub_max_degree`` edges per
+  hub (the result of reservoir sampling, drawn in one vectorized pass)
+- ``split``: keep every edge but spread a hub's edges over virtual
+  sub-nodes of at most ``hub_max_degree`` edges each, in edge (time) order.
+  Sub-nodes are appended to the node index with the ID ``<parent>#<k>``
+  (for the integer-keyed IP and subnet nodes: the parent's key with ``k``
+  in an added ``hub_part`` index level, 0 for real nodes), copy the
+  parent's features and label, and ``graph.node_parent`` maps them back to
+  the parent row
+
+Policies apply to the destination node type of an edge type, which is the
+shared entity (device, IP, subnet, merchant) for every edge type of
+``graph_builder.EDGE_TYPES``.
+"""
+
+from typing import Any, Dict
+
+import numpy as np
+import pandas as pd
+
+from .hetero_graph import EdgeType, HeteroGraph
+
+
+HUB_POLICIES = ("drop", "sample", "split")
+
+_PERCENTILES = (50, 90, 99, 99.9, 99.99)
+
+# Index level holding the sub-node number of keyed (IP, subnet) node IDs.
+_HUB_PART = "hub_part"
+
+
+def random_rank(groups: np.ndarray, seed: int = 0) -> np.ndarray:
+    """
+    Position of each element within its group, in a seeded random order.
+
+    Keeping ``rank < k`` is a uniform sample of ``k`` elements per group.
+
+    Args:
+        groups: Non-negative group of each element
+
+    Returns:
+        int64 rank per element
+    """
+    priority = np.random.default_rng(seed).random(len(groups))
+    return _rank(groups, np.lexsort((priority, groups)))
+
+
+def _rank(groups: np.ndarray, order: np.ndarray) -> np.ndarray:
+    """Rank of each element within its group, given an order sorted by group."""
+    counts = np.bincount(groups, minlength=int(groups.max(initial=-1)) + 1)
+    starts = np.cumsum(counts) - counts
+    rank = np.empty(len(groups), dtype=np.int64)
+    rank[order] = np.arange(len(groups)) - starts[groups[order]]
+    return rank
+
+
+def degree_stats(degree: np.ndarray) -> Dict[str, Any]:
+    """
+    Summary of a degree distribution.
+
+    Args:
+        degree: Degree per node
+
+    Returns:
+        Dictionary with nodes, mean, max and the p50 ... p99.99 percentiles
+    """
+    if len(degree) == 0:
+        return {'nodes': 0, 'mean': 0.0, 'max': 0}
+    percentiles = np.percentile(degree, _PERCENTILES)
+    return {
+        'nodes': len(degree),
+        'mean': float(degree.mean()),
+        'max': int(degree.max()),
+        **{f"p{p:g}": float(v) for p, v in zip(_PERCENTILES, percentiles)},
+    }
+
+
+def find_hubs(degree: np.ndarray, percentile: float, min_degree: int = 0) -> np.ndarray:
+    """
+    Nodes whose degree is above a percentile of the distribution.
+
+    Args:
+        degree: Degree per node
+        percentile: Percentile (0-100) that a hub's degree must exceed
+        min_degree: Degree a hub must also exceed
+
+    Returns:
+        Boolean mask over the nodes
+    """
+    if len(degree) == 0:
+        return np.zeros(0, dtype=bool)
+    threshold = max(float(np.percentile(degree, percentile)), float(min_degree))
+    return degree > threshold
+
+
+def _is_keyed(ids: pd.Index) -> bool:
+    """Whether node IDs are integer keys (IP and subnet nodes), not strings."""
+    return isinstance(ids, pd.MultiIndex) or pd.api.types.is_integer_dtype(ids.dtype)
+
+
+def _virtual_ids(ids: pd.Index, parents: np.ndarray, parts: np.ndarray) -> pd.Index:
+    """
+    IDs of virtual sub-nodes: ``<parent>#<k>``, or for keyed IDs (which
+    have a ``hub_part`` level, see ``_add_virtual_nodes``) the parent's key
+    with ``hub_part`` set to ``k``.
+    """
+    if _is_keyed(ids):
+        levels = [ids.get_level_values(i)[parents] for i in range(ids.nlevels - 1)]
+        return pd.MultiIndex.from_arrays(
+            levels + [np.asarray(parts, dtype=np.int64)], names=ids.names
+        )
+    suffix = pd.Index(parts).astype(str)
+    return pd.Index(ids[parents].astype(str) + "#" + suffix)
+
+
+def _add_virtual_nodes(graph: HeteroGraph, node_type: str, parents: np.ndarray,
+                       parts: np.ndarray) -> np.ndarray:
+    """Append sub-nodes of ``parents`` to a node type; return their rows."""
+    if node_type not in graph.node_parent:
+        graph.node_parent[node_type] = np.full(graph.num_nodes(node_type), -1, dtype=np.int64)
+    ids = graph.node_index.get_ids(node_type)
+    if _is_keyed(ids) and _HUB_PART not in ids.names:
+        graph.node_index.add_level(node_type, _HUB_PART)
+        ids = graph.node_index.get_ids(node_type)
+    ids = _virtual_ids(ids, parents, parts)
+    rows = graph.node_index.add(node_type, ids)
+    graph.grow_nodes()
+    graph.node_parent[node_type][rows] = parents
+    for store in (graph.x, graph.y):
+        if node_type in store:
+            store[node_type][rows] = store[node_type][parents]
+    return rows
+
+
+def apply_hub_policy(
+    graph: HeteroGraph,
+    edge_type: EdgeType,
+    policy: str,
+    percentile: float = 99.99,
+    min_degree: int = 10_000,
+    max_degree: int = 10_000,
+    seed: int = 0
+) -> Dict[str, Any]:
+    """
+    Find the hubs on the destination side of an edge type and handle them.
+
+    Args:
+        graph: Graph to modify in place (before its adjacency is built)
+        edge_type: Edge type
+        policy: 'drop', 'sample' or 'split'
+        percentile: Hub percentile, see ``find_hubs``
+        min_degree: Minimum hub degree, see ``find_hubs``
+        max_degree: Edges kept per hub ('sample') or per sub-node ('split')
+        seed: Random seed for 'sample'
+
+    Returns:
+        Statistics: policy, hubs, edges_removed, virtual_nodes
+
+    Raises:
+        ValueError: If ``policy`` is not a supported policy
+    """
+    if policy not in HUB_POLICIES:
+        raise ValueError(
+            f"Unsupported hub policy: {policy}. Supported: {', '.join(HUB_POLICIES)}"
+        )
+    dst_type = edge_type[2]
+    dst = graph.edge_index[edge_type][1].astype(np.int64)
+    degree = np.bincount(dst, minlength=graph.num_nodes(dst_type))
+    hubs = find_hubs(degree, percentile, min_degree)
+    stats = {'policy': policy, 'hubs': int(hubs.sum()), 'edges_removed': 0, 'virtual_nodes': 0}
+    on_hub = hubs[dst]
+    if not on_hub.any():
+        return stats
+    graph.csr.pop(edge_type, None)
+    graph.csc.pop(edge_type, None)
+
+    if policy == "split":
+        # Rank edges within their hub in edge order; every max_degree block
+        # after the first moves to a new sub-node.
+        rank = _rank(dst, np.argsort(dst, kind="stable"))
+        part = rank // max_degree
+        moved = on_hub & (part > 0)
+        width = int(part.max()) + 1
+        pairs, inverse = np.unique(dst[moved] * width + part[moved], return_inverse=True)
+        rows = _add_virtual_nodes(graph, dst_type, pairs // width, pairs % width)
+        edge_index = graph.edge_index[edge_type].astype(graph.node_index.index_dtype)
+        edge_index[1, moved] = rows[inverse]
+        graph.edge_index[edge_type] = edge_index
+        stats['virtual_nodes'] = len(rows)
+        return stats
+
+    if policy == "drop":
+        keep = ~on_hub
+    else:
+        keep = ~on_hub | (random_rank(dst, seed) < max_degree)
+    for store in (graph.edge_attr, graph.edge_time, graph.edge_last_time):
+        if edge_type in store:
+            store[edge_type] = store[edge_type][keep]
+    graph.edge_index[edge_type] = graph.edge_index[edge_type][:, keep]
+    stats['edges_removed'] = int((~keep).sum())
+    return stats
@@ -0,0 +1,515 @@
+"""
+Incremental per-entity feature aggregation from transaction deltas.
+
+``engineer_features`` recomputes account, device and merchant aggregates from
+the full transaction history. ``IncrementalFeatureAggregator`` keeps the
+sufficient statistics behind those aggregates instead:
+
+- transaction count, amount sum and amount sum of squares
+- first-seen and last-seen timestamps
+- one bottom-k (k minimum values) sketch of 32-bit ID hashes per
+  counterpart column for the distinct counts
+
+A new batch of transactions is folded into the statistics of the entities it
+touches, and only those entities' feature rows are produced. Counts, sums,
+means, standard deviations and seen timestamps match a full rebuild exactly;
+distinct counts are exact up to k distinct values and estimated beyond.
+
+State can live in memory or in a directory of ``.npy`` files opened as memory
+maps, laid out as::
+
+    <state_dir>/<table>/manifest.json     size, capacity, sketch size, ID files
+    <state_dir>/<table>/ids-00000.arrow   entity IDs in row order, one chunk
+                                          per batch that added new entities
+    <state_dir>/<table>/<statistic>.npy   one row per entity
+
+Applying a batch writes only the rows of touched entities (plus appended rows
+for new ones). The manifest is written last, so a batch interrupted before
+``flush`` leaves new rows outside the recorded size; statistics of existing
+entities are updated in place and are not rolled back. Once there are many
+ID chunks they are consolidated into one new file, which the manifest
+(with the last flushed size) points to before the old chunks are removed.
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+from pathlib import Path
+import json
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from .preprocess import (
+    ENTITY_COUNTERPARTS,
+    ENTITY_TABLES,
+    _add_account_age,
+    _amounts,
+    _attach_features,
+    _epoch_seconds,
+    _prefix,
+)
+from .schema import entity_codes
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SKETCH_SIZE = 32
+
+_MANIFEST = "manifest.json"
+_MAX_ID_CHUNKS = 32
+_INITIAL_CAPACITY = 1024
+_NEVER = np.iinfo(np.int64)
+_EMPTY_SLOT = np.uint32(0xFFFFFFFF)
+
+_STATISTICS = {
+    'count': (np.int64, 0),
+    'amount_sum': (np.float64, 0.0),
+    'amount_sum_sq': (np.float64, 0.0),
+    'first_seen': (np.int64, _NEVER.max),
+    'last_seen': (np.int64, _NEVER.min),
+}
+
+
+def _used_ids(column: pd.Series) -> Tuple[np.ndarray, np.ndarray, pd.Index]:
+    """
+    Codes of an ID column and the IDs that actually occur in it.
+
+    A batch sliced from a larger table keeps all categories of its
+    categorical columns; only the codes present in the batch are returned.
+
+    Returns:
+        Tuple of (int64 codes with -1 for missing IDs, used codes, used IDs
+        as strings)
+    """
+    codes, uniques = entity_codes(column)
+    used = np.unique(codes[codes >= 0])
+    return codes, used, pd.Index(uniques[used].astype(str), dtype=object)
+
+
+def _hash_values(column: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Hash an ID column to 32 bits, hashing each distinct ID once.
+
+    The all-ones value marks empty sketch slots and is never produced.
+
+    Returns:
+        Tuple of (int64 codes with -1 for missing IDs, uint32 hash per code)
+    """
+    codes, used, ids = _used_ids(column)
+    hashes = np.zeros(codes.max(initial=-1) + 1, dtype=np.uint32)
+    high = pd.util.hash_array(ids.to_numpy()) >> np.uint64(32)
+    hashes[used] = np.minimum(high, np.uint64(_EMPTY_SLOT - 1))
+    return codes, hashes
+
+
+def merge_sketches(
+    sketches: np.ndarray,
+    rows: np.ndarray,
+    hashes: np.ndarray
+) -> np.ndarray:
+    """
+    Merge hashes into bottom-k sketches.
+
+    Args:
+        sketches: uint32 array of shape [num_sets, k]; each row holds the
+            smallest hashes of its set in ascending order, padded with
+            all-ones
+        rows: Set index of each new hash
+        hashes: New uint32 hashes
+
+    Returns:
+        Merged sketches with the same shape
+    """
+    num_sets, k = sketches.shape
+    all_rows = np.concatenate([np.repeat(np.arange(num_sets), k), rows])
+    all_hashes = np.concatenate([sketches.ravel(), hashes])
+    filled = all_hashes != _EMPTY_SLOT
+    all_rows, all_hashes = all_rows[filled], all_hashes[filled]
+    order = np.lexsort((all_hashes, all_rows))
+    all_rows, all_hashes = all_rows[order], all_hashes[order]
+
+    first = np.ones(len(all_rows), dtype=bool)
+    first[1:] = (all_rows[1:] != all_rows[:-1]) | (all_hashes[1:] != all_hashes[:-1])
+    all_rows, all_hashes = all_rows[first], all_hashes[first]
+    starts = np.searchsorted(all_rows, all_rows, side="left")
+    rank = np.arange(len(all_rows)) - starts
+    kept = rank < k
+
+    merged = np.full((num_sets, k), _EMPTY_SLOT, dtype=np.uint32)
+    merged[all_rows[kept], rank[kept]] = all_hashes[kept]
+    return merged
+
+
+def estimate_distinct(sketches: np.ndarray) -> np.ndarray:
+    """
+    Distinct counts from bottom-k sketches.
+
+    Sets with fewer than k distinct values are counted exactly; larger sets
+    are estimated as (k - 1) / kth-smallest normalized hash, with a relative
+    standard error of about 1 / sqrt(k - 2).
+
+    Args:
+        sketches: uint32 array of shape [num_sets, k] from ``merge_sketches``
+
+    Returns:
+        int64 array of distinct counts
+    """
+    k = sketches.shape[1]
+    filled = (sketches != _EMPTY_SLOT).sum(axis=1)
+    kth = sketches[:, k - 1].astype(np.float64) + 1.0
+    estimate = np.rint((k - 1) * 2.0 ** 32 / kth).astype(np.int64)
+    return np.where(filled < k, filled, np.maximum(estimate, k))
+
+
+class _EntityState:
+    """
+    Sufficient statistics for one entity table, in memory or memory-mapped.
+    """
+
+    def __init__(
+        self,
+        counterparts: Sequence[str],
+        sketch_size: int,
+        directory: Optional[Path] = None
+    ):
+        self.counterparts = list(counterparts)
+        self.sketch_size = sketch_size
+        self.directory = directory
+        self.size = 0
+        self.id_files: List[str] = []
+        self._next_chunk = 0
+        self._flushed_size = 0
+        self.ids = pd.Index([], dtype=object)
+        self.arrays: Dict[str, np.ndarray] = {}
+
+        manifest = directory / _MANIFEST if directory is not None else None
+        if manifest is not None and manifest.exists():
+            self._open(json.loads(manifest.read_text()))
+        else:
+            self._allocate(_INITIAL_CAPACITY)
+
+    def _layout(self) -> Dict[str, tuple]:
+        """Dtype, fill value and row shape of every stored array."""
+        layout = {name: (dtype, fill, ()) for name, (dtype, fill) in _STATISTICS.items()}
+        for column in self.counterparts:
+            layout[f"sketch_{column}"] = (np.uint32, _EMPTY_SLOT, (self.sketch_size,))
+        return layout
+
+    def _new_array(self, name: str, capacity: int) -> np.ndarray:
+        dtype, fill, row_shape = self._layout()[name]
+        shape = (capacity,) + row_shape
+        if self.directory is None:
+            return np.full(shape, fill, dtype=dtype)
+        path = self.directory / f"{name}.npy.tmp"
+        array = np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=shape)
+        array[...] = fill
+        return array
+
+    def _allocate(self, capacity: int) -> None:
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+        for name in self._layout():
+            self.arrays[name] = self._new_array(name, capacity)
+            if self.directory is not None:
+                self._commit_array(name)
+
+    def _commit_array(self, name: str) -> None:
+        """Move a freshly written array file into place and reopen it."""
+        self.arrays[name].flush()
+        path = self.directory / f"{name}.npy"
+        os.replace(self.directory / f"{name}.npy.tmp", path)
+        self.arrays[name] = np.load(path, mmap_mode="r+")
+
+    def _open(self, manifest: Dict[str, Any]) -> None:
+        self.size = self._flushed_size = manifest['size']
+        self.id_files = manifest.get('id_files') or [
+            f"ids-{i:05d}.arrow" for i in range(manifest.get('id_chunks', 0))
+        ]
+        self.sketch_size = manifest['sketch_size']
+        self.counterparts = manifest['counterparts']
+        for name in self._layout():
+            self.arrays[name] = np.load(self.directory / f"{name}.npy", mmap_mode="r+")
+        # Chunks outside the manifest are leftovers of an interrupted batch
+        # or consolidation.
+        for path in self.directory.glob("ids-*.arrow"):
+            if path.name not in self.id_files:
+                path.unlink()
+        self._next_chunk = 1 + max((int(name[4:-6]) for name in self.id_files), default=-1)
+        chunks = [
+            feather.read_table(str(self.directory / name))["id"] for name in self.id_files
+        ]
+        ids = pa.chunked_array(chunks, type=pa.string()) if chunks else []
+        self.ids = pd.Index(np.asarray(ids, dtype=object)[:self.size], dtype=object)
+
+    @property
+    def capacity(self) -> int:
+        return len(self.arrays['count'])
+
+    def _grow(self, needed: int) -> None:
+        """Reallocate every array to hold at least ``needed`` rows."""
+        capacity = max(needed, self.capacity * 3 // 2, _INITIAL_CAPACITY)
+        for name, old in list(self.arrays.items()):
+            array = self._new_array(name, capacity)
+            array[:self.size] = old[:self.size]
+            self.arrays[name] = array
+            if self.directory is not None:
+                del old
+                self._commit_array(name)
+
+    def positions(self, ids: pd.Index) -> np.ndarray:
+        """
+        Row positions of entity IDs, appending rows for unseen IDs.
+        """
+        positions = self.ids.get_indexer(ids)
+        new = positions < 0
+        if new.any():
+            added = pd.Index(ids[new], dtype=object)
+            if self.size + len(added) > self.capacity:
+                self._grow(self.size + len(added))
+            appended = np.arange(self.size, self.size + len(added))
+            # Rows past the recorded size may hold leftovers of an unflushed batch.
+            for name, (_, fill, _) in self._layout().items():
+                self.arrays[name][appended] = fill
+            positions[new] = appended
+            self.ids = self.ids.append(added)
+            self.size += len(added)
+            if self.directory is not None:
+                self._write_ids(added)
+        return positions
+
+    def _write_ids(self, added: pd.Index) -> None:
+        if len(self.id_files) < _MAX_ID_CHUNKS:
+            self.id_files.append(self._write_id_file(added))
+            return
+        # Consolidate the flushed IDs: the new file is complete and recorded
+        # in the manifest before any old chunk is removed. IDs of the
+        # unflushed batch go to a chunk of their own, committed by flush.
+        old_files = self.id_files
+        self.id_files = [self._write_id_file(self.ids[:self._flushed_size])]
+        self._write_manifest(self._flushed_size)
+        for name in old_files:
+            (self.directory / name).unlink(missing_ok=True)
+        self.id_files.append(self._write_id_file(self.ids[self._flushed_size:]))
+
+    def _write_id_file(self, ids: pd.Index) -> str:
+        """Write IDs to the next chunk file; returns its name."""
+        name = f"ids-{self._next_chunk:05d}.arrow"
+        self._next_chunk += 1
+        table = pa.table({'id': pa.array(ids.to_numpy(), type=pa.string())})
+        feather.write_feather(table, str(self.directory / name), compression="uncompressed")
+        return name
+
+    def features(self, rows: np.ndarray) -> pd.DataFrame:
+        """Feature rows (as in ``engineer_features``) for the given positions."""
+        arrays = self.arrays
+        count = arrays['count'][rows]
+        total = arrays['amount_sum'][rows]
+        safe_count = np.maximum(count, 1)
+        mean = total / safe_count
+        variance = arrays['amount_sum_sq'][rows] / safe_count - mean * mean
+        seen = count > 0
+        features = {
+            'txn_count': count,
+            'amount_sum': total.astype(np.float32),
+            'amount_mean': mean.astype(np.float32),
+            'amount_std': np.sqrt(np.maximum(variance, 0.0)).astype(np.float32),
+            'first_seen': np.where(seen, arrays['first_seen'][rows], 0),
+            'last_seen': np.where(seen, arrays['last_seen'][rows], 0),
+        }
+        for column in self.counterparts:
+            sketches = arrays[f"sketch_{column}"][rows]
+            features[f"distinct_{_prefix(column)}s"] = estimate_distinct(sketches)
+        return pd.DataFrame(features, index=self.ids[rows])
+
+    def flush(self) -> None:
+        """Write dirty pages and then the manifest."""
+        if self.directory is None:
+            return
+        for array in self.arrays.values():
+            array.flush()
+        self._write_manifest(self.size)
+        self._flushed_size = self.size
+
+    def _write_manifest(self, size: int) -> None:
+        """Atomically replace the manifest, recording ``size`` rows."""
+        manifest = {
+            'size': size,
+            'capacity': self.capacity,
+            'id_files': self.id_files,
+            'sketch_size': self.sketch_size,
+            'counterparts': self.counterparts,
+        }
+        staging = self.directory / f"{_MANIFEST}.tmp"
+        staging.write_text(json.dumps(manifest, indent=2))
+        os.replace(staging, self.directory / _MANIFEST)
+
+
+class IncrementalFeatureAggregator:
+    """
+    Maintain account, device and merchant features under transaction deltas.
+
+    Example:
+        aggregator = IncrementalFeatureAggregator("data/interim/feature_state")
+        updated = aggregator.apply(new_transactions)
+        aggregator.flush()
+    """
+
+    def __init__(
+        self,
+        state_dir: Optional[Union[str, Path]] = None,
+        config: Optional[Dict[str, Any]] = None
+    ):
+        """
+        Open (or create) aggregator state.
+
+        Args:
+            state_dir: Directory holding the memory-mapped state. None keeps
+                the state in memory.
+            config: Optional ``features`` config section;
+                ``distinct_sketch_size`` sets k for new state (4 * k bytes per
+                entity and counterpart column)
+        """
+        config = config or {}
+        sketch_size = int(config.get('distinct_sketch_size', DEFAULT_SKETCH_SIZE))
+        self.state_dir = Path(state_dir) if state_dir is not None else None
+        self.states: Dict[str, _EntityState] = {}
+        for table, id_column in ENTITY_TABLES.items():
+            directory = self.state_dir / table if self.state_dir is not None else None
+            self.states[table] = _EntityState(
+                ENTITY_COUNTERPARTS[id_column], sketch_size, directory
+            )
+
+    def apply(self, transactions: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+        """
+        Fold a batch of new transactions into the state.
+
+        Args:
+            transactions: Cleaned transactions not previously applied
+
+        Returns:
+            Dictionary with 'accounts', 'devices' and 'merchants' DataFrames
+            holding updated feature rows for the touched entities only,
+            indexed by entity ID
+        """
+        amount = _amounts(transactions)
+        timestamp = _epoch_seconds(transactions)
+        hashed = {
+            column: _hash_values(transactions[column])
+            for column in {c for cs in ENTITY_COUNTERPARTS.values() for c in cs}
+            if column in transactions.columns
+        }
+
+        updated = {}
+        for table, id_column in ENTITY_TABLES.items():
+            state = self.states[table]
+            if id_column not in transactions.columns:
+                updated[table] = state.features(np.array([], dtype=np.int64))
+                continue
+            codes, used, ids = _used_ids(transactions[id_column])
+            valid = codes >= 0
+            lookup = np.zeros(codes.max(initial=-1) + 1, dtype=np.int64)
+            lookup[used] = state.positions(ids)
+            rows = lookup[codes[valid]]
+            touched, inverse = np.unique(rows, return_inverse=True)
+            self._update(state, touched, inverse, amount[valid], timestamp[valid])
+            for column in state.counterparts:
+                if column in hashed:
+                    other, hashes = hashed[column]
+                    other = other[valid]
+                    present = other >= 0
+                    self._update_sketch(
+                        state, column, rows[present], hashes[other[present]]
+                    )
+            updated[table] = state.features(touched)
+            logger.info(
+                "Applied %d transactions to %s: %d touched, %d total",
+                int(valid.sum()), table, len(touched), state.size
+            )
+        return updated
+
+    @staticmethod
+    def _update(
+        state: _EntityState,
+        touched: np.ndarray,
+        inverse: np.ndarray,
+        amount: np.ndarray,
+        timestamp: np.ndarray
+    ) -> None:
+        """Add batch counts, sums and seen timestamps to touched rows."""
+        arrays = state.arrays
+        k = len(touched)
+        arrays['count'][touched] += np.bincount(inverse, minlength=k)
+        arrays['amount_sum'][touched] += np.bincount(inverse, weights=amount, minlength=k)
+        arrays['amount_sum_sq'][touched] += np.bincount(
+            inverse, weights=amount * amount, minlength=k
+        )
+        first = np.full(k, _NEVER.max, dtype=np.int64)
+        last = np.full(k, _NEVER.min, dtype=np.int64)
+        np.minimum.at(first, inverse, timestamp)
+        np.maximum.at(last, inverse, timestamp)
+        arrays['first_seen'][touched] = np.minimum(arrays['first_seen'][touched], first)
+        arrays['last_seen'][touched] = np.maximum(arrays['last_seen'][touched], last)
+
+    @staticmethod
+    def _update_sketch(
+        state: _EntityState,
+        column: str,
+        rows: np.ndarray,
+        hashes: np.ndarray
+    ) -> None:
+        """Merge counterpart hashes into the sketches of ``rows``."""
+        touched, inverse = np.unique(rows, return_inverse=True)
+        sketches = state.arrays[f"sketch_{column}"]
+        sketches[touched] = merge_sketches(sketches[touched], inverse, hashes)
+
+    def features(self, table: str) -> pd.DataFrame:
+        """
+        Current feature rows for every entity seen so far.
+
+        Args:
+            table: 'accounts', 'devices' or 'merchants'
+
+        Returns:
+            Feature DataFrame indexed by entity ID
+        """
+        state = self.states[table]
+        return state.features(np.arange(state.size))
+
+    def attach(self, table: str, entities: pd.DataFrame) -> pd.DataFrame:
+        """
+        An entity table with the current features joined, as the matching
+        ``engineer_features`` table (entities never seen get zeros).
+
+        Args:
+            table: 'accounts', 'devices' or 'merchants'
+            entities: Cleaned entity table
+
+        Returns:
+            Feature-engineered entity table
+        """
+        id_column = ENTITY_TABLES[table]
+        # State keys are the IDs' string forms; match the table's IDs the same
+        # way and index the features by the table's own IDs.
+        _, uniques = entity_codes(entities[id_column])
+        state = self.states[table]
+        rows = state.ids.get_indexer(pd.Index(uniques.astype(str), dtype=object))
+        found = rows >= 0
+        features = state.features(rows[found])
+        features.index = pd.Index(uniques[found])
+        attached = _attach_features(entities, id_column, features)
+        return _add_account_age(attached) if table == "accounts" else attached
+
+    def flush(self) -> None:
+        """
+        Persist the state (no-op for in-memory state).
+        """
+        for state in self.states.values():
+            state.flush()
+
+    @property
+    def num_entities(self) -> Dict[str, int]:
+        """Number of entities tracked per table."""
+        return {table: state.size for table, state in self.states.items()}
@@ -4,23 +4,548 @@ Data loaders for NexusShield GNN Fraud Ring Detector.
 This module provides functions to load raw CSV/Parquet tables containing
 transaction data, account information, device records, merchant data, and fraud labels.
 All loaders return pandas DataFrames for downstream processing.
+
+For tables too large to hold in memory, ``stream_table`` and
+``stream_transactions`` yield bounded-size DataFrame batches instead, reading
+only the requested columns and pushing row filters down into the Parquet reader.
+
+Whole-table loaders convert their output to the compact dtypes declared in
+``schema.TABLE_SCHEMAS`` (categorical IDs, downcast numerics, epoch-second
+timestamps) and record the bytes saved in ``DataFrame.attrs['bytes_saved']``.
+
+CSV files carry no types, so every CSV reader here is given the declared
+types of known columns: IDs and categories are always strings and amounts
+float64, whichever file, partition or batch they come from. Parquet columns
+keep their stored types.
 """
 
-from typing import Optional, Union
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+import os
 import pandas as pd
 from pathlib import Path
 
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.dataset as ds
 
-def load_transactions(
+from .schema import AMOUNT, CATEGORY, ID, TABLE_SCHEMAS, apply_schema
+
+
+SUPPORTED_FORMATS = ("csv", "parquet")
+
+# Defaults for streaming reads: rows per batch and a hard cap on the
+# in-memory (Arrow) size of each yielded batch.
+DEFAULT_BATCH_ROWS = 1_000_000
+DEFAULT_MAX_BATCH_BYTES = 256 * 1024 * 1024
+_MIN_CSV_BLOCK_BYTES = 1024 * 1024
+
+# Arrow types the CSV readers are given for declared columns, which they
+# would otherwise infer per file or per block (where a column may be empty
+# or its IDs may look numeric in one partition and not in the next).
+# Timestamps are left to inference: they arrive as ISO strings or epoch
+# seconds.
+_CSV_TYPES = {ID: pa.string(), CATEGORY: pa.string(), AMOUNT: pa.float64()}
+
+TimeRange = Tuple[Any, Any]
+
+
+def _infer_file_format(
     file_path: Union[str, Path],
     file_format: Optional[str] = None
+) -> str:
+    """
+    Resolve the file format from an explicit value or the file extension.
+
+    Args:
+        file_path: Path to the data file
+        file_format: Explicit format ('csv' or 'parquet'), or None to infer
+
+    Returns:
+        Normalized format name
+
+    Raises:
+        ValueError: If the format is unsupported or cannot be inferred
+    """
+    if file_format is None:
+        suffix = Path(file_path).suffix.lower().lstrip(".")
+        file_format = "parquet" if suffix in ("parquet", "pq") else suffix
+    file_format = file_format.lower()
+    if file_format not in SUPPORTED_FORMATS:
+        raise ValueError(
+            f"Unsupported file format '{file_format}' for {file_path}; "
+            f"expected one of {SUPPORTED_FORMATS}"
+        )
+    return file_format
+
+
+def discover_partitions(
+    root: Union[str, Path],
+    partition_key: str = "dt",
+    time_range: Optional[TimeRange] = None,
+    file_format: Optional[str] = None
+) -> List[Path]:
+    """
+    List the data files of a partitioned dataset directory.
+
+    Files are found recursively, e.g. ``transactions/dt=2026-10-01/part-0.parquet``.
+    When a time range is given, partitions named ``<partition_key>=<date>``
+    are pruned unless the day they cover overlaps [start, end). Files outside
+    any such partition are always kept.
+
+    Args:
+        root: Dataset directory
+        partition_key: Name of the date partition key in directory names
+        time_range: Optional half-open (start, end) range; either bound may be None
+        file_format: Only keep files of this format ('csv' or 'parquet')
+
+    Returns:
+        Sorted list of data file paths
+    """
+    root = Path(root)
+    start = end = None
+    if time_range is not None:
+        start, end = (_naive_utc(bound) for bound in time_range)
+
+    files = []
+    for path in sorted(root.rglob("*")):
+        if not path.is_file() or path.name.startswith((".", "_")):
+            continue
+        try:
+            path_format = _infer_file_format(path)
+        except ValueError:
+            continue
+        if file_format is not None and path_format != file_format:
+            continue
+        if time_range is not None:
+            partition = _partition_value(path.relative_to(root), partition_key)
+            if partition is not None:
+                day = pd.Timestamp(partition).normalize()
+                if end is not None and day >= end:
+                    continue
+                if start is not None and day + pd.Timedelta(days=1) <= start:
+                    continue
+        files.append(path)
+    return files
+
+
+def _naive_utc(value: Any) -> Optional[pd.Timestamp]:
+    """
+    Coerce a time bound to a naive UTC timestamp (None stays None).
+    """
+    if value is None:
+        return None
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is not None:
+        ts = ts.tz_convert("UTC").tz_localize(None)
+    return ts
+
+
+def _partition_value(relative_path: Path, partition_key: str) -> Optional[str]:
+    """
+    Return the value of ``partition_key=value`` in a relative path, if any.
+    """
+    prefix = f"{partition_key}="
+    for part in relative_path.parts[:-1]:
+        if part.startswith(prefix):
+            return part[len(prefix):]
+    return None
+
+
+def _read_arrow_file(
+    file_path: Path,
+    file_format: str,
+    columns: Optional[Sequence[str]],
+    time_column: str,
+    time_range: Optional[TimeRange],
+    column_types: Optional[Dict[str, pa.DataType]] = None
+) -> pa.Table:
+    """
+    Read one file into an Arrow table, applying the column projection and,
+    for Parquet, pushing the time filter down into the scan. CSV columns in
+    ``column_types`` are read with those types.
+    """
+    if file_format == "parquet":
+        dataset = ds.dataset(str(file_path), format="parquet")
+        expression = None
+        if time_range is not None:
+            expression = _time_range_filter(dataset.schema, time_column, time_range)
+        return dataset.to_table(
+            columns=list(columns) if columns else None, filter=expression
+        )
+    table = pa_csv.read_csv(
+        str(file_path),
+        convert_options=pa_csv.ConvertOptions(
+            include_columns=list(columns) if columns else None,
+            column_types=column_types
+        )
+    )
+    if time_range is not None:
+        table = table.filter(_time_range_filter(table.schema, time_column, time_range))
+    return table
+
+
+def _read_partitioned(
+    root: Path,
+    file_format: Optional[str],
+    columns: Optional[Sequence[str]],
+    time_column: str,
+    time_range: Optional[TimeRange],
+    partition_key: str,
+    max_workers: Optional[int],
+    column_types: Optional[Dict[str, pa.DataType]] = None
+) -> pd.DataFrame:
+    """
+    Read every (unpruned) file of a partitioned dataset concurrently.
+
+    Arrow readers release the GIL, so a thread pool scales with the number of
+    cores. The per-file tables are concatenated as chunks without copying and
+    converted to pandas once.
+    """
+    files = discover_partitions(root, partition_key, time_range, file_format)
+    if not files:
+        raise FileNotFoundError(f"No data files found under {root}")
+
+    workers = max_workers or min(len(files), os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        tables = list(pool.map(
+            lambda path: _read_arrow_file(
+                path, _infer_file_format(path), columns, time_column, time_range,
+                column_types
+            ),
+            files
+        ))
+    return pa.concat_tables(tables, promote_options="default").to_pandas()
+
+
+def _read_table(
+    file_path: Union[str, Path],
+    file_format: Optional[str] = None,
+    columns: Optional[Sequence[str]] = None,
+    table: Optional[str] = None,
+    time_range: Optional[TimeRange] = None,
+    partition_key: str = "dt",
+    max_workers: Optional[int] = None,
+    column_types: Optional[Dict[str, pa.DataType]] = None
+) -> pd.DataFrame:
+    """
+    Read a whole CSV or Parquet table into a DataFrame.
+
+    ``file_path`` may be a single file or a partitioned dataset directory (see
+    ``discover_partitions``), whose files are read in a bounded thread pool.
+
+    Args:
+        file_path: Path to the data file or dataset directory
+        file_format: File format ('csv' or 'parquet'). If None, inferred from extension.
+        columns: Optional subset of columns to read
+        table: Table name in ``schema.TABLE_SCHEMAS``; if given, the result is
+            converted to the table's compact dtypes
+        time_range: Optional half-open (start, end) range on ``timestamp``;
+            prunes date partitions and filters rows
+        partition_key: Name of the date partition key in directory names
+        max_workers: Maximum reader threads (defaults to the number of CPUs)
+        column_types: Optional Arrow types of CSV columns; other columns
+            are inferred
+
+    Returns:
+        DataFrame with the requested columns
+    """
+    file_path = Path(file_path)
+    if file_path.is_dir():
+        df = _read_partitioned(
+            file_path, file_format, columns, "timestamp", time_range,
+            partition_key, max_workers, column_types
+        )
+    elif time_range is not None:
+        file_format = _infer_file_format(file_path, file_format)
+        df = _read_arrow_file(
+            file_path, file_format, columns, "timestamp", time_range, column_types
+        ).to_pandas()
+    else:
+        file_format = _infer_file_format(file_path, file_format)
+        if file_format == "parquet":
+            df = pd.read_parquet(file_path, columns=list(columns) if columns else None)
+        else:
+            df = pd.read_csv(
+                file_path,
+                usecols=list(columns) if columns else None,
+                dtype={name: t.to_pandas_dtype() for name, t in (column_types or {}).items()}
+            )
+    if table is not None:
+        df, _ = apply_schema(df, table)
+    return df
+
+
+def _time_range_filter(
+    schema: pa.Schema,
+    time_column: str,
+    time_range: TimeRange
+) -> ds.Expression:
+    """
+    Build a half-open [start, end) filter expression on a time column.
+
+    Bounds are coerced to the column's Arrow type so the expression can be
+    evaluated against Parquet row-group statistics. Integer columns are
+    interpreted as epoch seconds. Either bound may be None.
+
+    Args:
+        schema: Arrow schema of the table being read
+        time_column: Name of the timestamp column
+        time_range: Tuple of (start, end) bounds
+
+    Returns:
+        Arrow dataset expression selecting rows inside the range
+    """
+    field_type = schema.field(time_column).type
+
+    def _bound(value: Any) -> pa.Scalar:
+        ts = pd.Timestamp(value)
+        if pa.types.is_integer(field_type):
+            return pa.scalar(int(ts.timestamp()), type=field_type)
+        if pa.types.is_timestamp(field_type):
+            if ts.tzinfo is None and field_type.tz is not None:
+                ts = ts.tz_localize("UTC")
+            elif ts.tzinfo is not None and field_type.tz is None:
+                ts = ts.tz_convert("UTC").tz_localize(None)
+            return pa.scalar(ts.to_pydatetime(), type=field_type)
+        return pa.scalar(ts.isoformat(), type=field_type)
+
+    start, end = time_range
+    expression = None
+    if start is not None:
+        expression = ds.field(time_column) >= _bound(start)
+    if end is not None:
+        upper = ds.field(time_column) < _bound(end)
+        expression = upper if expression is None else expression & upper
+    return expression
+
+
+def _csv_column_types(table: str) -> Dict[str, pa.DataType]:
+    """Arrow types of the declared columns of a table for the CSV reader."""
+    return {
+        name: _CSV_TYPES[kind]
+        for name, kind in TABLE_SCHEMAS[table].items()
+        if kind in _CSV_TYPES
+    }
+
+
+def _iter_record_batches(
+    file_path: Union[str, Path],
+    file_format: str,
+    columns: Optional[Sequence[str]],
+    time_column: Optional[str],
+    time_range: Optional[TimeRange],
+    batch_rows: int,
+    max_batch_bytes: int,
+    column_types: Optional[Dict[str, pa.DataType]] = None
+) -> Iterator[pa.RecordBatch]:
+    """
+    Yield Arrow record batches of at most ``batch_rows`` rows and roughly
+    ``max_batch_bytes`` bytes from a CSV or Parquet file.
+    """
+    if file_format == "parquet":
+        dataset = ds.dataset(str(file_path), format="parquet")
+        expression = None
+        if time_range is not None:
+            expression = _time_range_filter(dataset.schema, time_column, time_range)
+        rows = min(batch_rows, _rows_within_budget(dataset, columns, max_batch_bytes))
+        batches = dataset.to_batches(
+            columns=list(columns) if columns else None,
+            filter=expression,
+            batch_size=rows
+        )
+    else:
+        # The CSV reader has no predicate pushdown: block_size bounds the raw
+        # text per batch and the time filter is applied batch by batch. The
+        # block must hold at least the header line, so it has a 1 MB floor;
+        # _split_batch enforces the actual cap.
+        reader = pa_csv.open_csv(
+            str(file_path),
+            read_options=pa_csv.ReadOptions(
+                block_size=min(max(max_batch_bytes, _MIN_CSV_BLOCK_BYTES), 2 ** 31 - 1)
+            ),
+            convert_options=pa_csv.ConvertOptions(
+                include_columns=list(columns) if columns else None,
+                column_types=column_types
+            )
+        )
+        expression = None
+        if time_range is not None:
+            expression = _time_range_filter(reader.schema, time_column, time_range)
+        batches = (
+            batch.filter(expression) if expression is not None else batch
+            for batch in reader
+        )
+
+    for batch in batches:
+        yield from _split_batch(batch, batch_rows, max_batch_bytes)
+
+
+def _rows_within_budget(
+    dataset: ds.Dataset,
+    columns: Optional[Sequence[str]],
+    max_batch_bytes: int
+) -> int:
+    """
+    Estimate how many rows fit in ``max_batch_bytes`` using the uncompressed
+    column-chunk sizes recorded in the Parquet footers.
+    """
+    total_bytes = 0
+    total_rows = 0
+    wanted = set(columns) if columns else None
+    for fragment in dataset.get_fragments():
+        metadata = fragment.metadata
+        for rg in range(metadata.num_row_groups):
+            row_group = metadata.row_group(rg)
+            total_rows += row_group.num_rows
+            for col in range(row_group.num_columns):
+                chunk = row_group.column(col)
+                if wanted is None or chunk.path_in_schema in wanted:
+                    total_bytes += chunk.total_uncompressed_size
+        if total_rows >= DEFAULT_BATCH_ROWS:
+            break
+    if total_rows == 0 or total_bytes == 0:
+        return DEFAULT_BATCH_ROWS
+    bytes_per_row = total_bytes / total_rows
+    return max(1, int(max_batch_bytes // bytes_per_row))
+
+
+def _split_batch(
+    batch: pa.RecordBatch,
+    batch_rows: int,
+    max_batch_bytes: int
+) -> Iterator[pa.RecordBatch]:
+    """
+    Slice a record batch (zero-copy) so no piece exceeds the row or byte cap.
+    """
+    if batch.num_rows == 0:
+        return
+    rows = batch_rows
+    if batch.nbytes > max_batch_bytes:
+        bytes_per_row = batch.nbytes / batch.num_rows
+        rows = min(rows, max(1, int(max_batch_bytes // bytes_per_row)))
+    if rows >= batch.num_rows:
+        yield batch
+        return
+    for offset in range(0, batch.num_rows, rows):
+        yield batch.slice(offset, rows)
+
+
+def stream_table(
+    file_path: Union[str, Path],
+    file_format: Optional[str] = None,
+    columns: Optional[Sequence[str]] = None,
+    time_column: str = "timestamp",
+    time_range: Optional[TimeRange] = None,
+    batch_rows: int = DEFAULT_BATCH_ROWS,
+    max_batch_bytes: int = DEFAULT_MAX_BATCH_BYTES,
+    partition_key: str = "dt",
+    column_types: Optional[Dict[str, pa.DataType]] = None
+) -> Iterator[pd.DataFrame]:
+    """
+    Stream a CSV or Parquet table as a sequence of bounded-size DataFrames.
+
+    Only the requested columns are read. For Parquet, the time range is pushed
+    down into the reader so row groups outside it are skipped using their
+    statistics; for CSV it is applied to each batch as it is parsed. A
+    partitioned dataset directory is streamed file by file after pruning its
+    date partitions.
+
+    Args:
+        file_path: Path to the data file or partitioned dataset directory
+        file_format: File format ('csv' or 'parquet'). If None, inferred from extension.
+        columns: Optional subset of columns to read (None reads all columns)
+        time_column: Column the time range applies to
+        time_range: Optional half-open (start, end) range; either bound may be None
+        batch_rows: Maximum number of rows per batch
+        max_batch_bytes: Approximate cap on the in-memory size of each batch
+        partition_key: Name of the date partition key in directory names
+        column_types: Optional Arrow types of CSV columns; other columns
+            are inferred from the first block of each file
+
+    Yields:
+        DataFrames with at most ``batch_rows`` rows each
+    """
+    if columns and time_range is not None and time_column not in columns:
+        raise ValueError(
+            f"time_range filters on '{time_column}', which must be in columns"
+        )
+    if Path(file_path).is_dir():
+        files = discover_partitions(file_path, partition_key, time_range, file_format)
+    else:
+        files = [Path(file_path)]
+    for path in files:
+        for batch in _iter_record_batches(
+            path, _infer_file_format(path, file_format), columns, time_column,
+            time_range, batch_rows, max_batch_bytes, column_types
+        ):
+            yield batch.to_pandas()
+
+
+def stream_transactions(
+    file_path: Union[str, Path],
+    file_format: Optional[str] = None,
+    columns: Optional[Sequence[str]] = None,
+    time_range: Optional[TimeRange] = None,
+    batch_rows: int = DEFAULT_BATCH_ROWS,
+    max_batch_bytes: int = DEFAULT_MAX_BATCH_BYTES,
+    partition_key: str = "dt"
+) -> Iterator[pd.DataFrame]:
+    """
+    Stream transaction data in bounded-size batches.
+
+    Streaming counterpart of ``load_transactions`` for histories that do not
+    fit in memory. See ``stream_table`` for the filtering semantics. CSV
+    columns declared in ``schema.TABLE_SCHEMAS`` are read with fixed types
+    (strings for IDs and categories, float64 amounts).
+
+    Args:
+        file_path: Path to the transaction data file or partitioned dataset directory
+        file_format: File format ('csv' or 'parquet'). If None, inferred from extension.
+        columns: Optional subset of columns to read
+        time_range: Optional half-open (start, end) range on ``timestamp``
+        batch_rows: Maximum number of rows per batch
+        max_batch_bytes: Approximate cap on the in-memory size of each batch
+        partition_key: Name of the date partition key in directory names
+
+    Yields:
+        Transaction DataFrames with at most ``batch_rows`` rows each
+    """
+    yield from stream_table(
+        file_path,
+        file_format=file_format,
+        columns=columns,
+        time_column="timestamp",
+        time_range=time_range,
+        batch_rows=batch_rows,
+        max_batch_bytes=max_batch_bytes,
+        partition_key=partition_key,
+        column_types=_csv_column_types("transactions")
+    )
+
+
+def load_transactions(
+    file_path: Union[str, Path],
+    file_format: Optional[str] = None,
+    columns: Optional[List[str]] = None,
+    compact: bool = True,
+    time_range: Optional[TimeRange] = None,
+    partition_key: str = "dt",
+    max_workers: Optional[int] = None
 ) -> pd.DataFrame:
     """
     Load transaction data from CSV or Parquet file.
 
     Args:
-        file_path: Path to the transaction data file
+        file_path: Path to the transaction data file, or a date-partitioned
+            dataset directory whose files are read concurrently
         file_format: File format ('csv' or 'parquet'). If None, inferred from extension.
+        columns: Optional subset of columns to read
+        compact: Convert to the compact dtypes declared in ``schema.TABLE_SCHEMAS``
+        time_range: Optional half-open (start, end) range on ``timestamp``;
+            prunes date partitions and filters rows
+        partition_key: Name of the date partition key in directory names
+        max_workers: Maximum reader threads (defaults to the number of CPUs)
 
     Returns:
         DataFrame containing transaction records with columns such as:
@@ -34,23 +559,30 @@ def load_transactions(
         - status
         - etc.
 
-    TODO: Implement file format detection and loading logic
     TODO: Add data validation and schema checking
-    TODO: Handle missing values and data type conversions
+    TODO: Handle missing values
     """
-    pass
+    return _read_table(
+        file_path, file_format, columns, "transactions" if compact else None,
+        time_range=time_range, partition_key=partition_key, max_workers=max_workers,
+        column_types=_csv_column_types("transactions")
+    )
 
 
 def load_accounts(
     file_path: Union[str, Path],
-    file_format: Optional[str] = None
+    file_format: Optional[str] = None,
+    columns: Optional[List[str]] = None,
+    compact: bool = True
 ) -> pd.DataFrame:
     """
     Load account data from CSV or Parquet file.
 
     Args:
-        file_path: Path to the account data file
+        file_path: Path to the account data file or dataset directory
         file_format: File format ('csv' or 'parquet'). If None, inferred from extension.
+        columns: Optional subset of columns to read
+        compact: Convert to the compact dtypes declared in ``schema.TABLE_SCHEMAS``
 
     Returns:
         DataFrame containing account records with columns such as:
@@ -61,22 +593,28 @@ def load_accounts(
         - country
         - etc.
 
-    TODO: Implement file format detection and loading logic
     TODO: Add data validation and schema checking
     """
-    pass
+    return _read_table(
+        file_path, file_format, columns, "accounts" if compact else None,
+        column_types=_csv_column_types("accounts")
+    )
 
 
 def load_devices(
     file_path: Union[str, Path],
-    file_format: Optional[str] = None
+    file_format: Optional[str] = None,
+    columns: Optional[List[str]] = None,
+    compact: bool = True
 ) -> pd.DataFrame:
     """
     Load device data from CSV or Parquet file.
 
     Args:
-        file_path: Path to the device data file
+        file_path: Path to the device data file or dataset directory
         file_format: File format ('csv' or 'parquet'). If None, inferred from extension.
+        columns: Optional subset of columns to read
+        compact: Convert to the compact dtypes declared in ``schema.TABLE_SCHEMAS``
 
     Returns:
         DataFrame containing device records with columns such as:
@@ -87,22 +625,28 @@ def load_devices(
         - device_fingerprint
         - etc.
 
-    TODO: Implement file format detection and loading logic
     TODO: Add data validation and schema checking
     """
-    pass
+    return _read_table(
+        file_path, file_format, columns, "devices" if compact else None,
+        column_types=_csv_column_types("devices")
+    )
 
 
 def load_merchants(
     file_path: Union[str, Path],
-    file_format: Optional[str] = None
+    file_format: Optional[str] = None,
+    columns: Optional[List[str]] = None,
+    compact: bool = True
 ) -> pd.DataFrame:
     """
     Load merchant data from CSV or Parquet file.
 
     Args:
-        file_path: Path to the merchant data file
+        file_path: Path to the merchant data file or dataset directory
         file_format: File format ('csv' or 'parquet'). If None, inferred from extension.
+        columns: Optional subset of columns to read
+        compact: Convert to the compact dtypes declared in ``schema.TABLE_SCHEMAS``
 
     Returns:
         DataFrame containing merchant records with columns such as:
@@ -112,22 +656,28 @@ def load_merchants(
         - country
         - etc.
 
-    TODO: Implement file format detection and loading logic
     TODO: Add data validation and schema checking
     """
-    pass
+    return _read_table(
+        file_path, file_format, columns, "merchants" if compact else None,
+        column_types=_csv_column_types("merchants")
+    )
 
 
 def load_labels(
     file_path: Union[str, Path],
-    file_format: Optional[str] = None
+    file_format: Optional[str] = None,
+    columns: Optional[List[str]] = None,
+    compact: bool = True
 ) -> pd.DataFrame:
     """
     Load fraud labels from CSV or Parquet file.
 
     Args:
-        file_path: Path to the labels file
+        file_path: Path to the labels file or dataset directory
         file_format: File format ('csv' or 'parquet'). If None, inferred from extension.
+        columns: Optional subset of columns to read
+        compact: Convert to the compact dtypes declared in ``schema.TABLE_SCHEMAS``
 
     Returns:
         DataFrame containing fraud labels with columns such as:
@@ -137,9 +687,10 @@ def load_labels(
         - fraud_type (optional: type of fraud)
         - etc.
 
-    TODO: Implement file format detection and loading logic
     TODO: Add data validation and schema checking
     TODO: Handle missing labels (semi-supervised learning scenario)
     """
-    pass
-
+    return _read_table(
+        file_path, file_format, columns, "labels" if compact else None,
+        column_types=_csv_column_types("labels")
+    )
@@ -0,0 +1,115 @@
+"""
+Derived account-to-account edges along shared-entity meta-paths.
+
+Device-sharing and IP-sharing rings (``docs/fraud_ring_taxonomy.md``) are
+account-device-account and account-IP-account paths. ``shared_entity_edges``
+materializes them as direct Account-shares_<entity>-Account edges:
+
+1. ``B`` is the binary account x entity incidence matrix (an account used an
+   entity in at least one transaction)
+2. ``B @ B.T`` counts, for every pair of accounts, the entities they share;
+   its off-diagonal entries become edges weighted by that count
+
+An entity used by ``d`` accounts contributes ``d * (d - 1)`` entries, so one
+public Wi-Fi IP with 50k accounts would add billions. Entities with more than
+``max_degree`` accounts are therefore capped first: ``sample`` keeps a
+seeded random ``max_degree`` of their accounts, ``drop`` ignores them.
+"""
+
+from typing import Any, Dict, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+
+from .hubs import random_rank
+
+HUB_POLICIES = ("sample", "drop")
+
+
+def cap_hubs(
+    entities: np.ndarray,
+    max_degree: int,
+    policy: str = "sample",
+    seed: int = 0
+) -> np.ndarray:
+    """
+    Mask of the distinct (account, entity) pairs kept under a per-entity
+    degree cap.
+
+    Args:
+        entities: Entity row of each pair
+        max_degree: Most accounts kept per entity
+        policy: 'sample' keeps a random ``max_degree`` accounts of each hub,
+            'drop' removes hubs entirely
+        seed: Random seed for 'sample'
+
+    Returns:
+        Boolean mask over the pairs
+
+    Raises:
+        ValueError: If ``policy`` is not a supported policy
+    """
+    if policy not in HUB_POLICIES:
+        raise ValueError(
+            f"Unsupported hub policy: {policy}. Supported: {', '.join(HUB_POLICIES)}"
+        )
+    degree = np.bincount(entities, minlength=int(entities.max(initial=-1)) + 1)
+    hub = degree[entities] > max_degree
+    if policy == "drop" or not hub.any():
+        return ~hub
+    return random_rank(entities, seed) < max_degree
+
+
+def shared_entity_edges(
+    account_rows: np.ndarray,
+    entity_rows: np.ndarray,
+    num_accounts: int,
+    num_entities: int,
+    max_degree: int = 200,
+    policy: str = "sample",
+    seed: int = 0
+) -> Tuple[np.ndarray, np.ndarray, Dict[str, Any]]:
+    """
+    Account-to-account edges between accounts that share an entity.
+
+    Args:
+        account_rows: Account node row per transaction (-1 if missing)
+        entity_rows: Entity (device, IP, ...) node row per transaction
+            (-1 if missing)
+        num_accounts: Number of account nodes
+        num_entities: Number of entity nodes
+        max_degree: Hub cap, see ``cap_hubs``
+        policy: Hub policy, see ``cap_hubs``
+        seed: Random seed for hub sampling
+
+    Returns:
+        Tuple of (edge_index [2, num_edges] int64 with both directions of
+        every pair, sorted by source then destination; float32 [num_edges, 1]
+        shared-entity count; statistics: hubs, pairs_dropped, edges)
+    """
+    valid = (account_rows >= 0) & (entity_rows >= 0)
+    incidence = sp.coo_matrix(
+        (np.ones(int(valid.sum()), dtype=np.float32),
+         (account_rows[valid], entity_rows[valid])),
+        shape=(num_accounts, num_entities)
+    ).tocsr()
+    pairs = incidence.tocoo()
+
+    keep = cap_hubs(pairs.col, max_degree, policy, seed)
+    hubs = np.bincount(pairs.col, minlength=num_entities) > max_degree
+    incidence = sp.csr_matrix(
+        (np.ones(int(keep.sum()), dtype=np.float32), (pairs.row[keep], pairs.col[keep])),
+        shape=(num_accounts, num_entities)
+    )
+
+    shared = (incidence @ incidence.T).tocoo()
+    off_diagonal = shared.row != shared.col
+    edge_index = np.vstack([shared.row[off_diagonal], shared.col[off_diagonal]]).astype(np.int64)
+    weight = shared.data[off_diagonal].astype(np.float32).reshape(-1, 1)
+    order = np.lexsort((edge_index[1], edge_index[0]))
+    stats = {
+        'hubs': int(hubs.sum()),
+        'pairs_dropped': int((~keep).sum()),
+        'edges': edge_index.shape[1],
+    }
+    return edge_index[:, order], weight[order], stats
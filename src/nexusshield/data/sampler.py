@@ -0,0 +1,348 @@
+"""
+Heterogeneous neighbor sampling for mini-batch GNN training.
+
+``NeighborSampler`` grows a computation subgraph around a batch of seed
+nodes one layer at a time, GraphSAGE style. At layer ``l`` every node
+reached in the previous layer draws up to ``fanouts[l]`` of its neighbors
+along each edge type, in both directions (incoming edges through the CSC,
+outgoing edges through the CSR), so a model that passes messages along both
+directions sees the inputs it needs.
+
+The cost of a batch is proportional to batch size times fanout, not to the
+graph size or to node degrees:
+
+- neighbors are drawn without replacement by a vectorized Floyd's
+  algorithm, which picks ``k`` of ``d`` CSR entries in O(k) for any degree
+  ``d`` (nodes with at most ``k`` neighbors keep them all), so a hub
+  merchant costs as much as any other node
+- sampled nodes are relabeled to compact local rows by binary search over
+  the (small) sorted set of nodes reached so far; nothing of the size of a
+  node type is allocated
+
+Each batch is a ``MiniBatch``: a ``HeteroGraph`` over the sampled nodes
+(seeds first, then nodes in the order they were reached) with the node
+features, labels and sampled edges (with attributes and times, in the
+original edge order) of the full graph. ``NeighborLoader`` iterates the
+batches of a node set, e.g. the training mask of a split, once per epoch.
+"""
+
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
+import functools
+import math
+
+import numpy as np
+import pandas as pd
+
+from .adjacency import CSR
+from .hetero_graph import EdgeType, HeteroGraph, NodeIndex, edge_type_name
+
+
+def _take_ids(node_index: NodeIndex, node_type: str, rows: np.ndarray) -> pd.Index:
+    """IDs of some rows of a node type (loader of a mini-batch's lazy node index)."""
+    return node_index.get_ids(node_type).take(rows)
+
+
+def sample_entries(
+    csr: CSR,
+    nodes: np.ndarray,
+    fanout: int,
+    rng: np.random.Generator
+) -> np.ndarray:
+    """
+    Up to ``fanout`` uniformly drawn entries of each row node, without replacement.
+
+    Args:
+        csr: Adjacency to sample from
+        nodes: Row nodes
+        fanout: Entries per node (-1 for all of them)
+        rng: Random generator
+
+    Returns:
+        Entry positions into ``csr.indices`` / ``csr.edge_ids``
+    """
+    nodes = np.asarray(nodes, dtype=np.int64)
+    if fanout < 0:
+        return csr.gather(nodes)[0]
+    degree = csr.degree(nodes)
+    small = degree <= fanout
+    entries, _ = csr.gather(nodes[small])
+
+    # Floyd's algorithm, one step for all large nodes at a time: step j
+    # draws t in [0, d - k + j] and takes d - k + j instead if t was taken.
+    large = nodes[~small]
+    degree = degree[~small]
+    chosen = np.empty((len(large), fanout), dtype=np.int64)
+    for step in range(fanout):
+        upper = degree - fanout + step
+        draw = (rng.random(len(large)) * (upper + 1)).astype(np.int64)
+        taken = (chosen[:, :step] == draw[:, None]).any(axis=1)
+        chosen[:, step] = np.where(taken, upper, draw)
+    return np.concatenate([entries, (csr.indptr[large][:, None] + chosen).ravel()])
+
+
+class _Relabel:
+    """Global to local rows of one node type, in order of first appearance."""
+
+    def __init__(self):
+        self.sorted_rows = np.empty(0, dtype=np.int64)
+        self.sorted_local = np.empty(0, dtype=np.int64)
+        self.parts: List[np.ndarray] = []
+        self.size = 0
+
+    def lookup(self, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(local row, found) per global row."""
+        if self.size == 0:
+            return np.full(len(rows), -1, dtype=np.int64), np.zeros(len(rows), dtype=bool)
+        position = np.searchsorted(self.sorted_rows, rows)
+        found = position < len(self.sorted_rows)
+        found[found] = self.sorted_rows[position[found]] == rows[found]
+        local = np.where(found, self.sorted_local[np.minimum(position, self.size - 1)], -1)
+        return local, found
+
+    def add(self, rows: np.ndarray) -> np.ndarray:
+        """Register new global rows (in the given order); returns those not seen before."""
+        rows = pd.unique(np.asarray(rows, dtype=np.int64))
+        if self.size:
+            rows = rows[~self.lookup(rows)[1]]
+        local = np.arange(self.size, self.size + len(rows))
+        merged = np.concatenate([self.sorted_rows, rows])
+        order = np.argsort(merged, kind="stable")
+        self.sorted_rows = merged[order]
+        self.sorted_local = np.concatenate([self.sorted_local, local])[order]
+        self.parts.append(rows)
+        self.size += len(rows)
+        return rows
+
+    def global_rows(self) -> np.ndarray:
+        """Global row of each local row."""
+        return np.concatenate(self.parts) if self.parts else np.empty(0, dtype=np.int64)
+
+
+class MiniBatch:
+    """
+    Sampled computation subgraph of a batch of seed nodes.
+
+    Attributes:
+        graph: Subgraph over the sampled nodes (local rows); its node IDs
+            are the global IDs, read on first use
+        node_type: Type of the seed nodes
+        batch_size: Number of seeds; they are local rows
+            ``0 .. batch_size - 1`` of ``node_type``
+        global_rows: Global row of each local node per node type
+    """
+
+    def __init__(
+        self,
+        graph: HeteroGraph,
+        node_type: str,
+        batch_size: int,
+        global_rows: Dict[str, np.ndarray]
+    ):
+        """
+        Wrap a sampled subgraph.
+
+        Args:
+            graph: Subgraph
+            node_type: Seed node type
+            batch_size: Number of seeds
+            global_rows: Global row per local node and node type
+        """
+        self.graph = graph
+        self.node_type = node_type
+        self.batch_size = batch_size
+        self.global_rows = global_rows
+
+    @property
+    def seeds(self) -> np.ndarray:
+        """Global rows of the seed nodes."""
+        return self.global_rows[self.node_type][:self.batch_size]
+
+    @property
+    def y(self) -> Optional[np.ndarray]:
+        """Labels of the seed nodes (None if the type has no labels)."""
+        y = self.graph.y.get(self.node_type)
+        return y[:self.batch_size] if y is not None else None
+
+    def __repr__(self) -> str:
+        nodes = ", ".join(f"{t}={len(rows)}" for t, rows in self.global_rows.items())
+        return f"MiniBatch(seeds={self.node_type}:{self.batch_size}; nodes: {nodes})"
+
+
+class NeighborSampler:
+    """
+    Samples layer-wise neighborhoods of seed nodes as compact subgraphs.
+
+    Attributes:
+        graph: Graph to sample from
+        num_layers: Number of sampled layers
+    """
+
+    def __init__(
+        self,
+        graph: HeteroGraph,
+        fanouts: Sequence[int],
+        edge_fanouts: Optional[Dict[str, Sequence[int]]] = None,
+        seed: int = 0
+    ):
+        """
+        Initialize the sampler.
+
+        Args:
+            graph: Graph to sample from
+            fanouts: Neighbors drawn per node, edge type and direction at
+                each layer (-1 for all, 0 for none)
+            edge_fanouts: Per-layer fanouts of individual edge types by name
+                (e.g. {'transaction__with__merchant': [2, 0]}), replacing
+                ``fanouts`` for them
+            seed: Random seed
+
+        Raises:
+            ValueError: If a per-type fanout list has another number of
+                layers or names an unknown edge type
+        """
+        self.graph = graph
+        self.num_layers = len(fanouts)
+        names = {edge_type_name(e): e for e in graph.edge_types}
+        self._fanouts: Dict[EdgeType, List[int]] = {e: list(fanouts) for e in graph.edge_types}
+        for name, layers in (edge_fanouts or {}).items():
+            if name not in names:
+                raise ValueError(
+                    f"Unsupported edge type: {name}. Supported: {', '.join(names)}"
+                )
+            if len(layers) != self.num_layers:
+                raise ValueError(
+                    f"Fanouts of {name} have {len(layers)} layers, expected {self.num_layers}"
+                )
+            self._fanouts[names[name]] = list(layers)
+        self._rng = np.random.default_rng(seed)
+
+    def sample(self, node_type: str, seeds: Sequence[int]) -> MiniBatch:
+        """
+        Sample the computation subgraph of a batch of seed nodes.
+
+        Args:
+            node_type: Type of the seed nodes
+            seeds: Global rows of the seed nodes (duplicates are dropped)
+
+        Returns:
+            MiniBatch with the seeds first
+        """
+        graph = self.graph
+        relabel = {t: _Relabel() for t in graph.node_types}
+        frontier = {node_type: relabel[node_type].add(seeds)}
+        batch_size = relabel[node_type].size
+        sampled: Dict[EdgeType, List[np.ndarray]] = {}
+
+        for layer in range(self.num_layers):
+            reached: Dict[str, List[np.ndarray]] = {}
+            for edge_type in graph.edge_types:
+                fanout = self._fanouts[edge_type][layer]
+                if fanout == 0 or graph.num_edges(edge_type) == 0:
+                    continue
+                src_type, _, dst_type = edge_type
+                # Incoming edges of frontier destinations, outgoing edges of sources.
+                for reverse, start, end in ((True, dst_type, src_type),
+                                            (False, src_type, dst_type)):
+                    nodes = frontier.get(start)
+                    if nodes is None or len(nodes) == 0:
+                        continue
+                    csr = graph.adjacency(edge_type, reverse=reverse)
+                    entries = sample_entries(csr, nodes, fanout, self._rng)
+                    sampled.setdefault(edge_type, []).append(csr.edge_ids[entries])
+                    reached.setdefault(end, []).append(csr.indices[entries])
+            frontier = {
+                end: relabel[end].add(np.concatenate(parts)) for end, parts in reached.items()
+            }
+
+        return self._subgraph(node_type, batch_size, relabel, sampled)
+
+    def _subgraph(
+        self,
+        node_type: str,
+        batch_size: int,
+        relabel: Dict[str, _Relabel],
+        sampled: Dict[EdgeType, List[np.ndarray]]
+    ) -> MiniBatch:
+        """Assemble the sampled nodes and edges into a relabeled subgraph."""
+        graph = self.graph
+        global_rows = {t: relabel[t].global_rows() for t in graph.node_types}
+        subgraph = HeteroGraph(NodeIndex(lazy={
+            t: (len(rows), functools.partial(_take_ids, graph.node_index, t, rows))
+            for t, rows in global_rows.items()
+        }))
+        for source, target in ((graph.x, subgraph.x), (graph.y, subgraph.y)):
+            for t, values in source.items():
+                target[t] = values[global_rows[t]]
+        subgraph.feature_names = dict(graph.feature_names)
+        subgraph.edge_attr_names = dict(graph.edge_attr_names)
+
+        dtype = subgraph.node_index.index_dtype
+        for edge_type, parts in sampled.items():
+            # An edge can be drawn from both of its endpoints; keep it once.
+            ids = np.unique(np.concatenate(parts).astype(np.int64))
+            src_type, _, dst_type = edge_type
+            src, dst = graph.edge_index[edge_type][:, ids]
+            subgraph.edge_index[edge_type] = np.vstack([
+                relabel[src_type].lookup(src.astype(np.int64))[0],
+                relabel[dst_type].lookup(dst.astype(np.int64))[0],
+            ]).astype(dtype)
+            for source, target in ((graph.edge_attr, subgraph.edge_attr),
+                                   (graph.edge_time, subgraph.edge_time),
+                                   (graph.edge_last_time, subgraph.edge_last_time)):
+                if edge_type in source:
+                    target[edge_type] = source[edge_type][ids]
+        subgraph.metadata = {'sampled_from': node_type, 'batch_size': batch_size}
+        return MiniBatch(subgraph, node_type, batch_size, global_rows)
+
+
+class NeighborLoader:
+    """
+    Mini-batches of a node set, sampled with a ``NeighborSampler``.
+
+    Iterating yields one epoch of ``MiniBatch`` objects; every node of the
+    set is a seed in exactly one of them.
+
+    Attributes:
+        sampler: Neighbor sampler
+        node_type: Type of the seed nodes
+        nodes: Global rows of the seed nodes
+        batch_size: Seeds per mini-batch
+        shuffle: Whether each epoch visits the nodes in a new random order
+    """
+
+    def __init__(
+        self,
+        sampler: NeighborSampler,
+        node_type: str,
+        nodes: Union[np.ndarray, Sequence[int]],
+        batch_size: int,
+        shuffle: bool = True,
+        seed: int = 0
+    ):
+        """
+        Initialize the loader.
+
+        Args:
+            sampler: Neighbor sampler
+            node_type: Seed node type
+            nodes: Seed node rows, or a boolean mask over the node type
+                (e.g. a split mask from ``data.splits``)
+            batch_size: Seeds per mini-batch
+            shuffle: Shuffle the seeds every epoch
+            seed: Random seed of the shuffling
+        """
+        nodes = np.asarray(nodes)
+        self.sampler = sampler
+        self.node_type = node_type
+        self.nodes = np.flatnonzero(nodes) if nodes.dtype == bool else nodes.astype(np.int64)
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self._rng = np.random.default_rng(seed)
+
+    def __len__(self) -> int:
+        return math.ceil(len(self.nodes) / self.batch_size)
+
+    def __iter__(self) -> Iterator[MiniBatch]:
+        nodes = self._rng.permutation(self.nodes) if self.shuffle else self.nodes
+        for start in range(0, len(nodes), self.batch_size):
+            yield self.sampler.sample(self.node_type, nodes[start:start + self.batch_size])
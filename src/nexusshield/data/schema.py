@@ -0,0 +1,211 @@
+"""
+Declared column schemas for NexusShield data tables.
+
+Raw tables arrive with object-dtype string IDs, float64 amounts and int64
+counters, which is several times larger than needed. Each table declares the
+kind of each known column here, and ``apply_schema`` converts a loaded
+DataFrame to the compact representation:
+
+- ``id`` / ``category``: dictionary-encoded pandas categoricals
+- ``amount``: float32 when every value round-trips to within half a cent,
+  otherwise float64
+- ``counter``: smallest integer type that holds the observed range
+- ``timestamp``: int64 seconds since the Unix epoch (UTC)
+
+Integer columns that are not declared are treated as counters.
+"""
+
+from typing import Dict, Tuple
+import logging
+
+import numpy as np
+import pandas as pd
+
+
+logger = logging.getLogger(__name__)
+
+ID = "id"
+CATEGORY = "category"
+AMOUNT = "amount"
+COUNTER = "counter"
+TIMESTAMP = "timestamp"
+
+TABLE_SCHEMAS: Dict[str, Dict[str, str]] = {
+    "transactions": {
+        "transaction_id": ID,
+        "account_id": ID,
+        "device_id": ID,
+        "ip_address": ID,
+        "merchant_id": ID,
+        "amount": AMOUNT,
+        "timestamp": TIMESTAMP,
+        "status": CATEGORY,
+    },
+    "accounts": {
+        "account_id": ID,
+        "created_at": TIMESTAMP,
+        "account_type": CATEGORY,
+        "verification_status": CATEGORY,
+        "country": CATEGORY,
+    },
+    "devices": {
+        "device_id": ID,
+        "device_type": CATEGORY,
+        "os": CATEGORY,
+        "browser": CATEGORY,
+        "device_fingerprint": ID,
+    },
+    "merchants": {
+        "merchant_id": ID,
+        "merchant_name": CATEGORY,
+        "merchant_category": CATEGORY,
+        "country": CATEGORY,
+    },
+    "labels": {
+        "entity_id": ID,
+        "entity_type": CATEGORY,
+        "is_fraud": COUNTER,
+        "fraud_type": CATEGORY,
+    },
+}
+
+# Largest absolute error tolerated when storing an amount as float32.
+_AMOUNT_TOLERANCE = 0.005
+
+_EPOCH = pd.Timestamp(0, tz="UTC")
+
+
+def to_epoch_seconds(column: pd.Series) -> pd.Series:
+    """
+    Convert a timestamp column to int64 seconds since the Unix epoch.
+
+    Integer columns are assumed to already hold epoch seconds. Naive
+    datetimes are interpreted as UTC. Missing values produce a nullable
+    ``Int64`` column.
+
+    Args:
+        column: Column of datetimes, datetime strings or epoch seconds
+
+    Returns:
+        Column of epoch seconds
+    """
+    if pd.api.types.is_integer_dtype(column):
+        return column.astype("int64")
+    timestamps = pd.to_datetime(column, utc=True)
+    seconds = (timestamps - _EPOCH) // pd.Timedelta(seconds=1)
+    if seconds.isna().any():
+        return seconds.astype("Int64")
+    return seconds.astype("int64")
+
+
+def downcast_amount(column: pd.Series) -> pd.Series:
+    """
+    Downcast a monetary column to float32 if that loses less than half a cent.
+
+    Args:
+        column: Numeric amount column
+
+    Returns:
+        float32 column if safe, otherwise float64
+    """
+    values = column.to_numpy(dtype=np.float64, na_value=np.nan)
+    narrow = values.astype(np.float32)
+    error = np.abs(narrow.astype(np.float64) - values)
+    if np.all(np.isnan(error) | (error <= _AMOUNT_TOLERANCE)):
+        return pd.Series(narrow, index=column.index, name=column.name)
+    return pd.Series(values, index=column.index, name=column.name)
+
+
+def downcast_counter(column: pd.Series) -> pd.Series:
+    """
+    Downcast an integer column to the smallest type holding its range.
+
+    Args:
+        column: Integer column
+
+    Returns:
+        Column with the smallest signed or unsigned integer dtype
+    """
+    if column.isna().any():
+        return column
+    downcast = "unsigned" if len(column) and column.min() >= 0 else "integer"
+    return pd.to_numeric(column, downcast=downcast)
+
+
+def entity_codes(column: pd.Series) -> Tuple[np.ndarray, pd.Index]:
+    """
+    Map an entity ID column to dense integer codes.
+
+    Categorical columns (as produced by ``apply_schema``) are used as-is: their
+    codes index into their categories, so no ID strings are hashed. Other
+    columns are factorized.
+
+    Args:
+        column: Column of entity IDs
+
+    Returns:
+        Tuple of (int64 codes with -1 for missing IDs, IDs in code order)
+    """
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        return column.cat.codes.to_numpy().astype(np.int64), column.cat.categories
+    codes, uniques = pd.factorize(column)
+    return codes.astype(np.int64), pd.Index(uniques)
+
+
+def has_integer_ids(column: pd.Series) -> bool:
+    """
+    Whether an ID column holds integer IDs (an integer dtype, or a
+    categorical with integer categories as ``apply_schema`` makes of one).
+    """
+    dtype = column.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        dtype = dtype.categories.dtype
+    return pd.api.types.is_integer_dtype(dtype)
+
+
+def apply_schema(
+    df: pd.DataFrame,
+    table: str
+) -> Tuple[pd.DataFrame, int]:
+    """
+    Convert a loaded table to its compact declared dtypes.
+
+    Args:
+        df: Loaded DataFrame
+        table: Table name, a key of ``TABLE_SCHEMAS``
+
+    Returns:
+        Tuple of (compacted DataFrame, bytes saved versus the input)
+
+    Raises:
+        KeyError: If the table has no declared schema
+    """
+    schema = TABLE_SCHEMAS[table]
+    before = int(df.memory_usage(deep=True, index=False).sum())
+
+    columns = {}
+    for name in df.columns:
+        column = df[name]
+        kind = schema.get(name)
+        if kind is None and pd.api.types.is_integer_dtype(column):
+            kind = COUNTER
+
+        if kind in (ID, CATEGORY):
+            if not isinstance(column.dtype, pd.CategoricalDtype):
+                column = column.astype("category")
+        elif kind == AMOUNT:
+            column = downcast_amount(column)
+        elif kind == COUNTER:
+            column = downcast_counter(column)
+        elif kind == TIMESTAMP:
+            column = to_epoch_seconds(column)
+        columns[name] = column
+
+    compact = pd.DataFrame(columns, index=df.index)
+    after = int(compact.memory_usage(deep=True, index=False).sum())
+    saved = before - after
+    compact.attrs["bytes_saved"] = saved
+    logger.info(
+        "Compacted %s table: %d -> %d bytes (%d saved)", table, before, after, saved
+    )
+    return compact, saved
@@ -0,0 +1,255 @@
+"""
+Train/validation/test splits as masks over one shared graph.
+
+Splits never copy the graph: each split is a boolean mask over the rows (or
+edges) of the shared ``HeteroGraph`` plus the graph that message passing
+should see for it, which is either the shared graph itself or a view of it
+(see ``HeteroGraph.window``). Node splits cover the labeled nodes
+(``y >= 0``) of each node type:
+
+- ``random``: a seeded uniform shuffle cut at the ratios
+- ``stratified``: the same within each label class, so every split keeps
+  the fraud rate
+- ``temporal``: nodes ordered by first appearance (their earliest edge
+  time); train on the earliest, test on the latest. The message-passing
+  graph of a split is the window of all edges before the next split's
+  first node, so no split sees edges from a later period (node features
+  too, given a feature store).
+
+Edge splits (link prediction) split one edge type. Held-out edges are
+removed from message passing: train and validation propagate over the
+train edges only, test over train and validation edges. Random splits
+re-slice the split edge type alone; every other array is shared. Temporal
+splits cut at times, so their message-passing graphs are windows of the
+graph and copy nothing.
+"""
+
+from typing import Any, Dict, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from .feature_store import FeatureStore
+from .hetero_graph import EdgeType, HeteroGraph, edge_type_name
+from .hubs import random_rank
+
+
+SPLIT_MODES = ("random", "stratified", "temporal")
+EDGE_SPLIT_MODES = ("random", "temporal")
+SPLITS = ("train", "val", "test")
+
+
+def _check_ratios(ratios: Sequence[float]) -> np.ndarray:
+    """Cumulative split boundaries (as fractions) of validated ratios."""
+    ratios = np.asarray(ratios, dtype=np.float64)
+    if (ratios < 0).any() or not np.isclose(ratios.sum(), 1.0):
+        raise ValueError(
+            f"Split ratios must be non-negative and sum to 1, got {ratios.tolist()}"
+        )
+    return np.cumsum(ratios)[:-1]
+
+
+def _check_mode(mode: str, modes: Sequence[str]) -> None:
+    if mode not in modes:
+        raise ValueError(f"Unsupported split mode: {mode}. Supported: {', '.join(modes)}")
+
+
+def _assign(fraction: np.ndarray, bounds: np.ndarray) -> np.ndarray:
+    """Split (0, 1, 2) of elements at the given rank fractions in [0, 1)."""
+    return np.searchsorted(bounds, fraction, side="right")
+
+
+def node_times(graph: HeteroGraph, node_type: str) -> np.ndarray:
+    """
+    First appearance of each node: its earliest incident edge time.
+
+    Args:
+        graph: Graph with ``edge_time``
+        node_type: Node type
+
+    Returns:
+        int64 epoch seconds per node row, the int64 maximum for nodes
+        without timed edges
+    """
+    first = np.full(graph.num_nodes(node_type), np.iinfo(np.int64).max, dtype=np.int64)
+    for edge_type, times in graph.edge_time.items():
+        for side in (0, 1):
+            if edge_type[2 * side] == node_type:
+                np.minimum.at(first, graph.edge_index[edge_type][side], times)
+    return first
+
+
+def _empty_view(graph: HeteroGraph) -> HeteroGraph:
+    """A graph sharing every store of ``graph`` (dictionaries copied shallowly)."""
+    view = HeteroGraph(graph.node_index)
+    for store in ("x", "feature_names", "y", "node_parent", "edge_index", "edge_attr",
+                  "edge_attr_names", "edge_time", "edge_last_time", "csr", "csc"):
+        setattr(view, store, dict(getattr(graph, store)))
+    view.metadata = dict(graph.metadata)
+    return view
+
+
+def _with_edges(graph: HeteroGraph, edge_type: EdgeType, keep: np.ndarray) -> HeteroGraph:
+    """View of ``graph`` in which one edge type keeps only the ``keep`` edges."""
+    view = _empty_view(graph)
+    view.edge_index[edge_type] = graph.edge_index[edge_type][:, keep]
+    for store in ("edge_attr", "edge_time", "edge_last_time"):
+        if edge_type in getattr(graph, store):
+            getattr(view, store)[edge_type] = getattr(graph, store)[edge_type][keep]
+    # Rebuilt on first use over the remaining edges.
+    view.csr.pop(edge_type, None)
+    view.csc.pop(edge_type, None)
+    return view
+
+
+def split_nodes(
+    graph: HeteroGraph,
+    ratios: Tuple[float, float, float] = (0.7, 0.15, 0.15),
+    mode: str = "random",
+    node_types: Optional[Sequence[str]] = None,
+    seed: int = 0,
+    features: Optional[FeatureStore] = None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Split the labeled nodes of a graph for node classification.
+
+    Args:
+        graph: Graph with labels (``graph.y``)
+        ratios: Train, validation and test fractions (summing to 1)
+        mode: 'random', 'stratified' or 'temporal'
+        node_types: Node types to split (default: every labeled type)
+        seed: Random seed ('random' and 'stratified')
+        features: Optional feature store; temporal message-passing graphs
+            then take node features as of their window end (see
+            ``HeteroGraph.window``)
+
+    Returns:
+        Per split ('train', 'val', 'test') a dictionary with 'nodes' (a
+        boolean mask per node type over the graph's rows) and 'graph' (the
+        graph to run message passing on; ``graph`` itself except in
+        temporal mode). Temporal splits also record their 'start' time (the
+        first appearance of their earliest node).
+
+    Raises:
+        ValueError: If the ratios or mode are invalid or no node type has labels
+    """
+    bounds = _check_ratios(ratios)
+    _check_mode(mode, SPLIT_MODES)
+    node_types = [t for t in (node_types or graph.y) if t in graph.y]
+    if not node_types:
+        raise ValueError("Node splits need labels (graph.y) for at least one node type")
+
+    splits: Dict[str, Dict[str, Any]] = {name: {'nodes': {}} for name in SPLITS}
+    starts = np.full(len(SPLITS), np.iinfo(np.int64).max, dtype=np.int64)
+    for offset, node_type in enumerate(node_types):
+        y = np.asarray(graph.y[node_type])
+        labeled = np.flatnonzero(y >= 0)
+        part = np.full(len(y), -1, dtype=np.int64)
+        if mode == "temporal":
+            times = node_times(graph, node_type)[labeled]
+            seen = times < np.iinfo(np.int64).max
+            labeled, times = labeled[seen], times[seen]
+            order = np.argsort(times, kind="stable")
+            fraction = np.empty(len(labeled))
+            fraction[order] = np.arange(len(labeled)) / max(len(labeled), 1)
+            assigned = _assign(fraction, bounds)
+            # Nodes tied with the last node of an earlier split join it, so
+            # every split starts strictly after the previous one.
+            for k in (1, 2):
+                earlier = assigned < k
+                if earlier.any():
+                    assigned[(assigned >= k) & (times <= times[earlier].max())] = k - 1
+            for k in range(len(SPLITS)):
+                if (assigned == k).any():
+                    starts[k] = min(starts[k], int(times[assigned == k].min()))
+        else:
+            groups = y[labeled] if mode == "stratified" else np.zeros(len(labeled), np.int64)
+            groups = groups.astype(np.int64)
+            rank = random_rank(groups, seed + offset)
+            sizes = np.bincount(groups)[groups]
+            assigned = _assign(rank / np.maximum(sizes, 1), bounds)
+        part[labeled] = assigned
+        for k, name in enumerate(SPLITS):
+            splits[name]['nodes'][node_type] = part == k
+
+    for k, name in enumerate(SPLITS):
+        splits[name]['graph'] = graph
+        if mode == "temporal":
+            splits[name]['start'] = int(starts[k])
+            # Message passing stops where the next split starts.
+            end = int(starts[k + 1:].min()) if k + 1 < len(SPLITS) else None
+            if end is not None and end < np.iinfo(np.int64).max:
+                splits[name]['graph'] = graph.window(np.iinfo(np.int64).min, end, features)
+    return splits
+
+
+def split_edges(
+    graph: HeteroGraph,
+    edge_type: Union[EdgeType, str],
+    ratios: Tuple[float, float, float] = (0.7, 0.15, 0.15),
+    mode: str = "random",
+    seed: int = 0
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Split the edges of one edge type for link prediction.
+
+    Args:
+        graph: Graph
+        edge_type: Edge type (or its name, e.g. 'account__uses__device') to split
+        ratios: Train, validation and test fractions (summing to 1)
+        mode: 'random' or 'temporal' (by ``edge_time``)
+        seed: Random seed ('random')
+
+    Returns:
+        Per split ('train', 'val', 'test') a dictionary with 'edges' (a
+        boolean mask over the edges of ``edge_type``, the positive examples
+        of the split) and 'graph' (the graph to run message passing on:
+        without validation and test edges for train and val, without test
+        edges for test). Temporal splits also record their 'start' time.
+
+    Raises:
+        ValueError: If the edge type is unknown, the ratios or mode are
+            invalid, or 'temporal' is asked for an edge type without times
+    """
+    bounds = _check_ratios(ratios)
+    _check_mode(mode, EDGE_SPLIT_MODES)
+    names = {edge_type_name(e): e for e in graph.edge_types}
+    edge_type = names.get(edge_type, edge_type)
+    if edge_type not in graph.edge_index:
+        raise ValueError(
+            f"Unsupported edge type: {edge_type}. Supported: {', '.join(names)}"
+        )
+    num_edges = graph.num_edges(edge_type)
+    splits: Dict[str, Dict[str, Any]] = {name: {} for name in SPLITS}
+
+    if mode == "temporal":
+        times = graph.edge_time.get(edge_type)
+        if times is None:
+            raise ValueError(f"Temporal split of an edge type without edge_time: {edge_type}")
+        # Edges are sorted by time; cut at times so ties stay together.
+        cuts = np.searchsorted(times, times[np.minimum(
+            (bounds * num_edges).astype(np.int64), max(num_edges - 1, 0)
+        )], side="left") if num_edges else np.zeros(2, dtype=np.int64)
+        edges = np.concatenate([[0], cuts, [num_edges]])
+        for k, name in enumerate(SPLITS):
+            mask = np.zeros(num_edges, dtype=bool)
+            mask[edges[k]:edges[k + 1]] = True
+            start = int(times[edges[k]]) if edges[k] < num_edges else None
+            splits[name] = {'edges': mask, 'start': start}
+        # train and val see the edges before val; test those before test.
+        views = []
+        for later in (("val", "test"), ("test",)):
+            starts = [splits[name]['start'] for name in later if splits[name]['start'] is not None]
+            views.append(graph.window(np.iinfo(np.int64).min, min(starts)) if starts else graph)
+        splits['train']['graph'] = splits['val']['graph'] = views[0]
+        splits['test']['graph'] = views[1]
+        return splits
+
+    rank = random_rank(np.zeros(num_edges, dtype=np.int64), seed)
+    assigned = _assign(rank / max(num_edges, 1), bounds)
+    for k, name in enumerate(SPLITS):
+        splits[name]['edges'] = assigned == k
+    train_graph = _with_edges(graph, edge_type, assigned == 0)
+    splits['train']['graph'] = train_graph
+    splits['val']['graph'] = train_graph
+    splits['test']['graph'] = _with_edges(graph, edge_type, assigned <= 1)
+    return splits
@@ -0,0 +1,410 @@
+"""
+Bounded-memory graph construction from a stream of transaction chunks.
+
+``build_heterogeneous_graph`` needs every transaction in memory at once.
+``StreamingGraphBuilder`` builds the same graph from cleaned, featurized
+chunks (e.g. ``chunked_clean.clean_chunks`` followed by
+``preprocess.stream_transaction_features``), keeping in memory only what
+grows with the number of nodes:
+
+- the index of the entity node types (account, device, IP, merchant and,
+  with ``subnet_edges``, subnet), extended chunk by chunk exactly as by ``append_transactions``
+  (entity tables seed it first)
+- the edges of coalesced edge types, one per distinct pair, merged per
+  chunk as by ``append_transactions``
+
+Per-transaction data goes to spools in a work directory: the endpoints,
+amount and time of every edge of the other edge types and the transaction
+feature rows (``DiskArray``), and the transaction IDs (an Arrow file in the
+``graph_store`` ID layout). Transaction nodes are numbered in arrival order
+without an in-memory index, so transaction IDs must be unique across the
+stream, as ``chunked_clean.clean_chunks`` makes them.
+
+``finish`` turns the spools into the edge arrays and out-of-core CSR/CSC
+(``adjacency.build_csr_on_disk``), attaches the final entity features and
+labels, and writes the graph in the ``graph_store`` format. Peak memory is
+set by the chunk size, the entity count and ``block_size``, not by the
+number of transactions.
+
+Edges come out in time order when the chunks are in time order. A chunk
+older than the end of the previous one is accepted, but the affected edge
+types are then sorted in memory at the end.
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Union
+from pathlib import Path
+import functools
+import logging
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from .adjacency import build_csr_on_disk
+from .feature_store import feature_columns
+from .graph_builder import (
+    NODE_COLUMNS,
+    _edge_arrays,
+    _edge_types,
+    _merge_coalesced_edges,
+    _node_features,
+    _node_rows,
+    _node_types,
+    _time_ordered,
+    add_labels,
+    graph_options,
+    index_transactions,
+)
+from .graph_store import load_graph, read_ids, save_graph
+from .hetero_graph import EdgeType, HeteroGraph, NodeIndex, edge_type_name
+from .hubs import degree_stats
+from .schema import has_integer_ids
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BLOCK_SIZE = 1 << 22
+
+
+class DiskArray:
+    """
+    Append-only array backed by a raw file that grows with every append.
+
+    Attributes:
+        path: Backing file
+        dtype: Element type
+        shape: Shape of one row
+        length: Rows written so far
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        dtype: Any,
+        shape: Sequence[int] = ()
+    ):
+        """
+        Create (or truncate) the backing file.
+
+        Args:
+            path: Backing file
+            dtype: Element type
+            shape: Shape of one row
+        """
+        self.path = Path(path)
+        self.dtype = np.dtype(dtype)
+        self.shape = tuple(shape)
+        self.length = 0
+        self._file = open(self.path, "wb")
+
+    def __len__(self) -> int:
+        return self.length
+
+    def append(self, values: np.ndarray) -> None:
+        """Append rows (cast to ``dtype``)."""
+        values = np.ascontiguousarray(values, dtype=self.dtype).reshape((-1,) + self.shape)
+        values.tofile(self._file)
+        self.length += len(values)
+
+    def open(self, mode: str = "r") -> np.ndarray:
+        """
+        The rows written so far as a memory map, closing the file for appends.
+        """
+        if not self._file.closed:
+            self._file.close()
+        if self.length == 0:
+            return np.empty((0,) + self.shape, dtype=self.dtype)
+        return np.memmap(self.path, dtype=self.dtype, mode=mode, shape=(self.length,) + self.shape)
+
+
+class _EdgeSpool:
+    """Per-transaction edges of one edge type, spooled to disk."""
+
+    def __init__(self, directory: Path, name: str, timed: bool, attributed: bool):
+        self.src = DiskArray(directory / f"{name}.src", np.int64)
+        self.dst = DiskArray(directory / f"{name}.dst", np.int64)
+        self.time = DiskArray(directory / f"{name}.time", np.int64) if timed else None
+        self.attr = DiskArray(directory / f"{name}.attr", np.float32, (1,)) if attributed else None
+        self.ordered = True
+        self._last_time: Optional[int] = None
+
+    def append(
+        self,
+        edge_index: np.ndarray,
+        edge_attr: Optional[np.ndarray],
+        edge_time: Optional[np.ndarray]
+    ) -> None:
+        self.src.append(edge_index[0])
+        self.dst.append(edge_index[1])
+        if self.attr is not None:
+            self.attr.append(edge_attr)
+        if self.time is not None and len(edge_time):
+            if self._last_time is not None and edge_time[0] < self._last_time:
+                self.ordered = False
+            self._last_time = int(edge_time[-1])
+            self.time.append(edge_time)
+
+
+class StreamingGraphBuilder:
+    """
+    Build a ``HeteroGraph`` chunk by chunk with memory bounded by the node count.
+
+    Example:
+        builder = StreamingGraphBuilder("data/interim/stream", entities)
+        for chunk in stream_transaction_features(clean_chunks(raw_chunks)):
+            builder.add(chunk)
+        graph = builder.finish("data/processed/graph", feature_tables, labels)
+
+    Attributes:
+        work_dir: Directory of the spools (removed by ``finish``)
+        node_index: Index of the entity node types built so far
+        num_transactions: Transactions added so far
+    """
+
+    def __init__(
+        self,
+        work_dir: Union[str, Path],
+        entities: Optional[Dict[str, pd.DataFrame]] = None,
+        config: Optional[Dict[str, Any]] = None,
+        block_size: int = DEFAULT_BLOCK_SIZE
+    ):
+        """
+        Start a build.
+
+        Args:
+            work_dir: Directory for the spools (created; its previous
+                content is replaced)
+            entities: Optional entity tables keyed by node type ('account',
+                'device', 'merchant') seeding the node index, so entities
+                without transactions get a node
+            config: Optional ``graph`` config section overriding
+                ``graph_builder.DEFAULT_GRAPH_CONFIG``
+            block_size: Edges per step of the out-of-core CSR/CSC build
+
+        Raises:
+            ValueError: If the config is invalid or asks for meta-path edges
+                or hub policies (which need every edge at once) or for
+                coalesced transaction edges
+        """
+        self.options = graph_options(config)
+        unsupported = [key for key in ('meta_paths', 'hub_policies') if self.options[key]]
+        unsupported += [name for name in self.options['coalesce_edges'] or ()
+                        if 'transaction' in name.split("__")[::2]]
+        if unsupported:
+            raise ValueError(
+                f"Unsupported in a streaming build: {', '.join(unsupported)}. "
+                f"Use build_heterogeneous_graph instead"
+            )
+        self.work_dir = Path(work_dir)
+        if self.work_dir.exists():
+            shutil.rmtree(self.work_dir)
+        self.work_dir.mkdir(parents=True)
+        self.block_size = block_size
+        self.node_index = NodeIndex()
+        index_transactions(pd.DataFrame(), entities, node_index=self.node_index)
+        self.num_transactions = 0
+        self._ids: Optional[pa.ipc.RecordBatchFileWriter] = None
+        self._id_type = pa.string()
+        self._coalesce = set(self.options['coalesce_edges'] or ())
+        self._coalesced = HeteroGraph(self.node_index)
+        self._spools: Dict[EdgeType, _EdgeSpool] = {}
+        self._x: Optional[DiskArray] = None
+        self._feature_names: List[str] = []
+        self._started = time.perf_counter()
+
+    def add(self, transactions: pd.DataFrame) -> None:
+        """
+        Add a chunk of cleaned, feature-engineered transactions.
+
+        Args:
+            transactions: Chunk with the columns ``build_heterogeneous_graph``
+                takes; the transaction features of the first chunk fix the
+                feature columns
+        """
+        _, rows = index_transactions(
+            transactions, node_index=self.node_index,
+            node_types=[t for t in _node_types(self.options) if t != 'transaction']
+        )
+        self.num_transactions += len(transactions)
+        if NODE_COLUMNS['transaction'] in transactions.columns:
+            rows['transaction'] = self._add_transactions(transactions)
+
+        edge_rows, amount, timestamp = _time_ordered(transactions, rows)
+        for edge_type in _edge_types(self.options):
+            src_type, _, dst_type = edge_type
+            if src_type not in rows or dst_type not in rows:
+                continue
+            edge_index, edge_attr, used = _edge_arrays(
+                edge_rows[src_type], edge_rows[dst_type], amount
+            )
+            name = edge_type_name(edge_type)
+            if name in self._coalesce:
+                _merge_coalesced_edges(self._coalesced, edge_type, edge_index, amount,
+                                       timestamp, used)
+                continue
+            if edge_type not in self._spools:
+                self._spools[edge_type] = _EdgeSpool(
+                    self.work_dir, name, timestamp is not None, edge_attr is not None
+                )
+            self._spools[edge_type].append(
+                edge_index, edge_attr, timestamp[used] if timestamp is not None else None
+            )
+
+    def _add_transactions(self, transactions: pd.DataFrame) -> np.ndarray:
+        """
+        Number the chunk's transactions and spool their IDs and feature rows.
+
+        Returns:
+            Node row per transaction (-1 without an ID)
+        """
+        ids = transactions[NODE_COLUMNS['transaction']]
+        valid = ids.notna().to_numpy()
+        if self._ids is None:
+            # Integer IDs stay integers, as in build_heterogeneous_graph.
+            self._id_type = pa.int64() if has_integer_ids(ids) else pa.string()
+            schema = pa.schema([("id", self._id_type)])
+            self._ids = pa.ipc.new_file(str(self.work_dir / "transaction.ids.arrow"), schema)
+            self._feature_names = feature_columns(transactions)
+            self._x = DiskArray(
+                self.work_dir / "transaction.x", np.float32, (len(self._feature_names),)
+            )
+        if pa.types.is_integer(self._id_type):
+            values = ids[valid].to_numpy(dtype=np.int64)
+        else:
+            values = np.asarray(ids[valid]).astype(str)
+        self._ids.write_table(pa.table({'id': pa.array(values, self._id_type)}))
+
+        x = np.zeros((int(valid.sum()), len(self._feature_names)), dtype=np.float32)
+        for j, name in enumerate(self._feature_names):
+            if name in transactions.columns:
+                x[:, j] = transactions[name].to_numpy(dtype=np.float32, na_value=0.0)[valid]
+        start = len(self._x)
+        self._x.append(x)
+        rows = np.full(len(transactions), -1, dtype=np.int64)
+        rows[valid] = np.arange(start, start + len(x))
+        return rows
+
+    def _spooled_edges(self, graph: HeteroGraph, edge_type: EdgeType) -> None:
+        """Move one edge type's spool into ``graph`` (as memory maps) with its CSR/CSC."""
+        spool = self._spools[edge_type]
+        name = edge_type_name(edge_type)
+        src, dst = spool.src.open(), spool.dst.open()
+        num_edges = len(src)
+        edge_index = np.lib.format.open_memmap(
+            self.work_dir / f"{name}.edge_index.npy", mode="w+",
+            dtype=graph.node_index.index_dtype, shape=(2, num_edges)
+        )
+        edge_time = spool.time.open(mode="r+") if spool.time is not None else None
+        edge_attr = spool.attr.open(mode="r+") if spool.attr is not None else None
+        if edge_time is not None and not spool.ordered:
+            logger.warning("%s: chunks out of time order, sorting in memory", name)
+            order = np.argsort(edge_time, kind="stable")
+            src, dst = src[order], dst[order]
+            edge_time[:] = edge_time[order]
+            if edge_attr is not None:
+                edge_attr[:] = edge_attr[order]
+        for start in range(0, num_edges, self.block_size):
+            stop = start + self.block_size
+            edge_index[0, start:stop] = src[start:stop]
+            edge_index[1, start:stop] = dst[start:stop]
+        graph.edge_index[edge_type] = edge_index
+        if edge_attr is not None:
+            graph.edge_attr[edge_type] = edge_attr
+            graph.edge_attr_names[edge_type] = ["amount"]
+        if edge_time is not None:
+            graph.edge_time[edge_type] = edge_time
+
+        src_type, _, dst_type = edge_type
+        sizes = (graph.num_nodes(src_type), graph.num_nodes(dst_type))
+        graph.csr[edge_type] = build_csr_on_disk(
+            edge_index[0], edge_index[1], *sizes, self.work_dir, f"{name}.csr", self.block_size
+        )
+        graph.csc[edge_type] = build_csr_on_disk(
+            edge_index[1], edge_index[0], *sizes[::-1], self.work_dir, f"{name}.csc",
+            self.block_size
+        )
+
+    def finish(
+        self,
+        output_dir: Union[str, Path],
+        entities: Optional[Dict[str, pd.DataFrame]] = None,
+        labels: Optional[pd.DataFrame] = None,
+        overwrite: bool = False
+    ) -> HeteroGraph:
+        """
+        Write the graph and remove the spools.
+
+        Args:
+            output_dir: Graph directory (``graph_store`` format)
+            entities: Optional feature-engineered entity tables keyed by
+                node type, e.g. from ``IncrementalFeatureAggregator.attach``
+            labels: Optional DataFrame with fraud labels for nodes
+                (entity_id, entity_type, is_fraud)
+            overwrite: Replace an existing graph at ``output_dir``
+
+        Returns:
+            The saved graph, opened memory-mapped (``graph_store.load_graph``)
+        """
+        lazy = {}
+        if self._ids is not None:
+            self._ids.close()
+            lazy['transaction'] = (
+                len(self._x), functools.partial(read_ids, self.work_dir / "transaction.ids.arrow")
+            )
+        node_index = NodeIndex(
+            {t: self.node_index.get_ids(t) for t in self.node_index.node_types}, lazy
+        )
+        graph = HeteroGraph(node_index)
+        if self._x is not None and self._feature_names:
+            graph.x['transaction'] = self._x.open()
+            graph.feature_names['transaction'] = self._feature_names
+        for node_type, table in (entities or {}).items():
+            if table is None or NODE_COLUMNS[node_type] not in table.columns:
+                continue
+            table_rows = _node_rows(self.node_index, node_type, table[NODE_COLUMNS[node_type]])
+            x, names = _node_features(table, table_rows, self.node_index.num_nodes(node_type))
+            if names:
+                graph.x[node_type] = x
+                graph.feature_names[node_type] = names
+        if labels is not None:
+            add_labels(graph, labels)
+
+        coalesced = self._coalesced
+        for edge_type in _edge_types(self.options):
+            if edge_type in coalesced.edge_index:
+                graph.edge_index[edge_type] = coalesced.edge_index[edge_type].astype(
+                    node_index.index_dtype
+                )
+                for store in ('edge_attr', 'edge_attr_names', 'edge_time', 'edge_last_time'):
+                    if edge_type in getattr(coalesced, store):
+                        getattr(graph, store)[edge_type] = getattr(coalesced, store)[edge_type]
+                # Coalesced edges come out in (source, destination) order.
+                graph.sort_edges_by_time([edge_type])
+                graph.adjacency(edge_type)
+                graph.adjacency(edge_type, reverse=True)
+            elif edge_type in self._spools:
+                self._spooled_edges(graph, edge_type)
+
+        graph.metadata['degrees'] = {
+            edge_type_name(edge_type): {
+                'src': degree_stats(graph.csr[edge_type].degree()),
+                'dst': degree_stats(graph.csc[edge_type].degree()),
+            }
+            for edge_type in graph.edge_types
+        }
+        if 'coalesce' in coalesced.metadata:
+            graph.metadata['coalesce'] = coalesced.metadata['coalesce']
+        elapsed = time.perf_counter() - self._started
+        graph.metadata['build_seconds'] = elapsed
+        graph.metadata['streaming'] = {'transactions': self.num_transactions}
+
+        save_graph(graph, output_dir, overwrite=overwrite)
+        del graph
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+        logger.info(
+            "Built graph from %d streamed transactions in %.2fs",
+            self.num_transactions, elapsed
+        )
+        return load_graph(output_dir)
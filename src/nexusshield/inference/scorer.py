@@ -5,10 +5,14 @@ This module provides functions to load trained models and score accounts/devices
 for fraud risk. The scorer can be used for real-time inference or batch scoring.
 """
 
-from typing import Dict, Any, Optional, Union
+from typing import Dict, Any, List, Optional, Union
 from pathlib import Path
 import torch
 
+from ..data.feature_store import FeatureSnapshot, FeatureStore
+from ..data.graph_stats import graph_stats
+from ..data.graph_store import load_graph
+from ..data.hetero_graph import HeteroGraph
 from ..models.nexusshield_gnn import NexusShieldGNN
 
 
@@ -26,7 +30,10 @@ class NexusShieldScorer:
     def __init__(
         self,
         model_path: Union[str, Path],
-        device: str = "cuda"
+        device: str = "cuda",
+        feature_store: Optional[Union[str, Path]] = None,
+        feature_version: Optional[str] = None,
+        graph_dir: Optional[Union[str, Path]] = None
     ):
         """
         Initialize scorer with trained model.
@@ -34,6 +41,11 @@ class NexusShieldScorer:
         Args:
             model_path: Path to saved model checkpoint
             device: Device to run inference on ('cuda' or 'cpu')
+            feature_store: Optional feature store directory; node features
+                are memory-mapped from it instead of being recomputed
+            feature_version: Store version to open (default: current)
+            graph_dir: Optional graph saved by ``graph_store.save_graph``;
+                it is memory-mapped, so scorer processes share one copy
 
         TODO: Implement initialization:
         - Load model checkpoint
@@ -42,7 +54,118 @@ class NexusShieldScorer:
         """
         self.model = None
         self.device = device
-        pass
+        self.features: Optional[FeatureSnapshot] = None
+        self.graph: Optional[HeteroGraph] = None
+        if feature_store is not None:
+            self.load_features(feature_store, feature_version)
+        if graph_dir is not None:
+            self.load_graph(graph_dir)
+
+    def load_graph(self, graph_dir: Union[str, Path]) -> HeteroGraph:
+        """
+        Open a saved graph read-only and memory-mapped.
+
+        Args:
+            graph_dir: Directory written by ``graph_store.save_graph``
+                (``graph.save_dir``)
+
+        Returns:
+            The opened graph
+        """
+        self.graph = load_graph(graph_dir)
+        return self.graph
+
+    def load_features(
+        self,
+        store_dir: Union[str, Path],
+        version: Optional[str] = None
+    ) -> FeatureSnapshot:
+        """
+        Open node features from the feature store without copying them.
+
+        Args:
+            store_dir: Feature store directory (``features.store_dir``)
+            version: Store version to open (default: current)
+
+        Returns:
+            The opened feature snapshot
+        """
+        self.features = FeatureStore(store_dir).open(version)
+        return self.features
+
+    def node_features(
+        self,
+        node_type: str,
+        ids: list
+    ) -> torch.Tensor:
+        """
+        Stored feature rows for nodes (zeros for IDs not in the store).
+
+        Args:
+            node_type: Node type, e.g. 'account'
+            ids: Node identifiers
+
+        Returns:
+            Float tensor [len(ids), num_features] on the scorer's device
+
+        Raises:
+            RuntimeError: If no feature store has been loaded
+        """
+        if self.features is None:
+            raise RuntimeError("No feature store loaded; call load_features first")
+        rows = self.features.get(node_type, ids)
+        return torch.from_numpy(rows).float().to(self.device)
+
+    def graph_stats(self) -> Dict[str, Any]:
+        """
+        Statistics of the loaded graph, for ``GET /graph/stats``.
+
+        Computed on the first call and kept current as edges are appended
+        (see ``data.graph_stats``), so later calls cost O(1) in graph size.
+
+        Returns:
+            Node and edge counts, degree histograms and component count
+
+        Raises:
+            RuntimeError: If no graph has been loaded
+        """
+        if self.graph is None:
+            raise RuntimeError("No graph loaded; call load_graph first")
+        return graph_stats(self.graph).summary()
+
+    def neighborhood(
+        self,
+        graph: HeteroGraph,
+        node_type: str,
+        node_id: Any,
+        num_hops: int = 2
+    ) -> Dict[str, List[Any]]:
+        """
+        IDs of the nodes within ``num_hops`` of one node, per node type.
+
+        Uses the graph's CSR/CSC adjacency, so the cost is proportional to
+        the size of the neighborhood rather than the graph.
+
+        Args:
+            graph: Graph built by ``build_heterogeneous_graph``
+            node_type: Type of the node, e.g. 'account'
+            node_id: Node identifier
+            num_hops: Number of hops
+
+        Returns:
+            Dictionary of node type to node IDs (the node itself included)
+
+        Raises:
+            KeyError: If the node is not in the graph
+        """
+        row = graph.node_index.lookup(node_type, [node_id])[0]
+        if row < 0:
+            raise KeyError(f"Unknown {node_type}: {node_id}")
+        reached = graph.k_hop(node_type, [row], num_hops)
+        return {
+            reached_type: graph.node_index.ids[reached_type][rows].tolist()
+            for reached_type, rows in reached.items()
+        }
 
     def load_model(
         self,
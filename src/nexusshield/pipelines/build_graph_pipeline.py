@@ -5,18 +5,68 @@ This pipeline chains together data loading, preprocessing, and graph constructio
 to transform raw data tables into a heterogeneous graph ready for GNN training.
 """
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from pathlib import Path
+import logging
 
+from ..data import (
+    adjacency,
+    chunked_clean,
+    cleaning,
+    feature_store,
+    graph_builder,
+    graph_store,
+    hetero_graph,
+    hubs,
+    loaders,
+    meta_paths,
+    parallel_features,
+    preprocess,
+    schema,
+    streaming_graph
+)
+from ..data.cache import (
+    CleanedTableCache,
+    fingerprint_code,
+    fingerprint_files,
+    DEFAULT_CACHE_MAX_BYTES
+)
 from ..data.loaders import (
     load_transactions,
     load_accounts,
     load_devices,
     load_merchants,
-    load_labels
+    load_labels,
+    stream_transactions,
+    DEFAULT_BATCH_ROWS,
+    DEFAULT_MAX_BATCH_BYTES
 )
-from ..data.preprocess import clean_data, engineer_features
+from ..data.chunked_clean import clean_chunks
+from ..data.incremental_features import IncrementalFeatureAggregator
+from ..data.cleaning import _clean_entity_table, clean_data
+from ..data.preprocess import engineer_features, stream_transaction_features
+from ..data.feature_store import FeatureStore
+from ..data.schema import to_epoch_seconds
 from ..data.graph_builder import build_heterogeneous_graph
+from ..data.graph_store import load_graph, save_graph
+from ..data.partition import partition_graph, save_partitions
+from ..data.streaming_graph import StreamingGraphBuilder
+from .stages import Stage, StageRunner, load_tables, save_tables
+
+
+logger = logging.getLogger(__name__)
+
+# Keys of the ``graph`` config section that only control where the graph is
+# exported or the streaming build (which bypasses the stages), not what the
+# graph stage builds.
+_GRAPH_EXPORT_KEYS = (
+    "save_dir", "num_partitions", "partition_dir", "partition_iterations",
+    "partition_imbalance", "streaming", "streaming_dir", "streaming_block_size",
+)
+
+# Keys of the ``data`` config section and modules the cleaned tables depend on.
+_CLEAN_DATA_KEYS = ("time_range", "partition_key", "stream_transactions", "stream_columns")
+_CLEAN_CODE = (loaders, schema, cleaning, chunked_clean)
 
 
 def build_graph_pipeline(
@@ -33,21 +83,360 @@ def build_graph_pipeline(
     4. Construct heterogeneous graph
     5. Return graph object ready for GNN training
 
+    Depending on the config, steps 1-4 run as resumable stages
+    (``graph_stages``), chunk by chunk in bounded memory
+    (``build_graph_streaming``), or directly with only the cleaned tables
+    cached (``load_cleaned_data``). The graph is then saved and partitioned
+    if configured; a reused graph stage skips both unless their output is
+    missing.
+
     Args:
         data_dir: Directory containing raw data files
-        config: Optional configuration dictionary with paths and parameters
+        config: Optional configuration dictionary with paths and parameters.
+            Keys read here:
+
+            - ``data.stage_dir``: run steps 1-4 as stages persisted there,
+              keeping ``data.stage_keep`` artifacts per stage
+            - ``data.cache_enabled``: without stages, cache the cleaned
+              tables in ``data.interim_dir``
+            - ``graph.streaming``: build in bounded memory instead
+            - ``features.store_dir``: also write the engineered features
+              to this feature store (``store_features``)
+            - ``graph.save_dir``: save the graph there in the memory-mappable
+              ``data.graph_store`` format
+            - ``graph.num_partitions``: above 1, also write that many parts
+              with their halos to ``graph.partition_dir`` (``data.partition``)
 
     Returns:
         Heterogeneous graph object (PyTorch Geometric HeteroData or similar)
+    """
+    config = config or {}
+    data_config = config.get("data", {})
+    graph_config = config.get("graph", {})
+    stage_dir = data_config.get("stage_dir")
+    if graph_config.get("streaming", False):
+        graph = build_graph_streaming(data_dir, config)
+        rebuilt = True
+    elif stage_dir:
+        runner = StageRunner(
+            graph_stages(data_dir, config), stage_dir, keep=data_config.get("stage_keep", 2)
+        )
+        graph = runner.run("graph")
+        rebuilt = "graph" in runner.ran
+    else:
+        cleaned = load_cleaned_data(data_dir, config)
+        labels = cleaned.pop('labels', None)
+        features = engineer_features(**cleaned, config=config.get("features"))
+        store_features(features, config)
+        graph = build_heterogeneous_graph(**features, labels=labels, config=graph_config)
+        rebuilt = True
+
+    save_dir = graph_config.get("save_dir")
+    if save_dir and not graph_config.get("streaming", False) and (
+            rebuilt or not Path(save_dir).exists()):
+        save_graph(graph, save_dir, overwrite=True)
+    num_partitions = graph_config.get("num_partitions", 1)
+    partition_dir = graph_config.get("partition_dir", "data/processed/partitions")
+    if num_partitions > 1 and (rebuilt or not Path(partition_dir).exists()):
+        parts = partition_graph(
+            graph,
+            num_partitions,
+            num_iterations=graph_config.get("partition_iterations", 20),
+            imbalance=graph_config.get("partition_imbalance", 0.05),
+            seed=graph_config.get("seed", 0)
+        )
+        save_partitions(graph, parts, partition_dir, overwrite=True)
+    return graph
+
+
+def build_graph_streaming(
+    data_dir: Path,
+    config: Optional[Dict[str, Any]] = None
+) -> Any:
+    """
+    Build the graph from streamed transactions with bounded memory.
+
+    Transactions are read in batches of ``data.stream_batch_rows`` (see
+    ``loaders.stream_transactions``), and each batch is cleaned and
+    deduplicated (``chunked_clean.clean_chunks``), gets its transaction
+    features (``preprocess.stream_transaction_features``), is folded into
+    the account, device and merchant aggregates
+    (``IncrementalFeatureAggregator``) and is added to a
+    ``StreamingGraphBuilder``, which spools its edges to
+    ``graph.streaming_dir``. The entity features are joined once the stream
+    ends and the graph is written to ``graph.save_dir``. Peak memory is set
+    by the batch size and the node count, not the transaction count.
+
+    Transaction batches should come in time order (e.g. a date-partitioned
+    dataset, or a file sorted by time): velocity features look back only
+    over earlier batches, and out-of-order batches make the edges be sorted
+    in memory at the end. Distinct counts of the entity features are exact
+    up to ``features.distinct_sketch_size`` values and estimated beyond.
+    Meta-path edges and hub policies are not supported.
+
+    Args:
+        data_dir: Directory containing raw data files
+        config: Optional configuration dictionary
+
+    Returns:
+        The graph, opened memory-mapped from ``graph.save_dir``
+
+    Raises:
+        ValueError: If ``graph.save_dir`` is not set
+    """
+    config = config or {}
+    data_config = config.get("data", {})
+    clean_config = config.get("preprocess", {})
+    graph_config = config.get("graph", {})
+    save_dir = graph_config.get("save_dir")
+    if not save_dir:
+        raise ValueError("A streaming graph build requires graph.save_dir")
+    paths = resolve_table_paths(data_dir, config)
+    deduplicate = {**cleaning.DEFAULT_CLEAN_CONFIG, **clean_config}['deduplicate']
+    entities = {
+        'account': _clean_entity_table(load_accounts(paths['accounts']), "account_id",
+                                       deduplicate),
+        'device': _clean_entity_table(load_devices(paths['devices']), "device_id",
+                                      deduplicate),
+        'merchant': _clean_entity_table(load_merchants(paths['merchants']), "merchant_id",
+                                        deduplicate),
+    }
+    time_range = data_config.get("time_range")
+    chunks = stream_transactions(
+        paths['transactions'],
+        columns=data_config.get("stream_columns"),
+        time_range=tuple(time_range) if time_range else None,
+        batch_rows=data_config.get("stream_batch_rows", DEFAULT_BATCH_ROWS),
+        max_batch_bytes=data_config.get("stream_max_batch_bytes", DEFAULT_MAX_BATCH_BYTES),
+        partition_key=data_config.get("partition_key", "dt")
+    )
+
+    builder = StreamingGraphBuilder(
+        graph_config.get("streaming_dir") or Path(save_dir).parent / ".streaming",
+        entities,
+        config=graph_config,
+        block_size=graph_config.get(
+            "streaming_block_size", streaming_graph.DEFAULT_BLOCK_SIZE
+        )
+    )
+    aggregator = IncrementalFeatureAggregator(config=config.get("features"))
+    stats: Dict[str, int] = {}
+    for chunk in stream_transaction_features(
+            clean_chunks(chunks, clean_config, stats), config.get("features")):
+        if not len(chunk):
+            continue
+        aggregator.apply(chunk)
+        builder.add(chunk)
+    logger.info(
+        "Streamed %d transactions: %d invalid, %d duplicate",
+        stats.get('rows_read', 0), stats.get('rows_invalid', 0),
+        stats.get('rows_duplicate', 0)
+    )
+
+    features = {
+        node_type: aggregator.attach(f"{node_type}s", table)
+        for node_type, table in entities.items()
+    }
+    labels = load_labels(paths['labels']) if paths['labels'].exists() else None
+    return builder.finish(save_dir, features, labels, overwrite=True)
+
+
+def graph_stages(
+    data_dir: Path,
+    config: Optional[Dict[str, Any]] = None
+) -> List[Stage]:
+    """
+    The stages of ``build_graph_pipeline``.
+
+    - ``clean``: load and clean the raw tables; keyed by the raw file
+      fingerprints, the ``data`` read options and the ``preprocess`` section
+    - ``features``: engineer features (and write them to the feature store);
+      keyed by ``clean`` and the ``features`` section
+    - ``graph``: build the graph; keyed by ``features`` and the ``graph``
+      section (except its export keys), stored in ``graph_store`` format
+
+    Each stage is also keyed by the source of the modules it runs.
+
+    Args:
+        data_dir: Directory containing raw data files
+        config: Optional configuration dictionary
+
+    Returns:
+        Stage definitions for ``StageRunner``
+    """
+    config = config or {}
+    graph_config = config.get("graph", {})
+
+    def clean() -> Dict[str, Any]:
+        return _clean_tables(data_dir, config)
+
+    def features(clean: Dict[str, Any]) -> Dict[str, Any]:
+        tables = {name: df for name, df in clean.items() if name != 'labels'}
+        engineered = engineer_features(**tables, config=config.get("features"))
+        store_features(engineered, config)
+        return {**engineered, 'labels': clean.get('labels')}
+
+    def graph(features: Dict[str, Any]) -> Any:
+        tables = {name: df for name, df in features.items() if name != 'labels'}
+        return build_heterogeneous_graph(
+            **tables, labels=features.get('labels'), config=graph_config
+        )
+
+    return [
+        Stage(
+            "clean", clean, save_tables, load_tables,
+            inputs=fingerprint_files(resolve_table_paths(data_dir, config).values()),
+            config=_clean_config(config),
+            code=_CLEAN_CODE,
+        ),
+        Stage(
+            "features", features, save_tables, load_tables, deps=["clean"],
+            config=config.get("features", {}),
+            code=(preprocess, parallel_features, schema),
+        ),
+        Stage(
+            "graph", graph,
+            lambda built, directory: save_graph(built, directory / "graph"),
+            lambda directory: load_graph(directory / "graph"),
+            deps=["features"],
+            config={
+                key: value for key, value in graph_config.items()
+                if key not in _GRAPH_EXPORT_KEYS
+            },
+            code=(graph_builder, hetero_graph, adjacency, hubs, meta_paths, graph_store,
+                  feature_store, schema),
+        ),
+    ]
+
 
-    TODO: Implement pipeline:
-    - Load all data tables using loaders
-    - Clean data using preprocess.clean_data
-    - Engineer features using preprocess.engineer_features
-    - Build graph using graph_builder.build_heterogeneous_graph
-    - Return constructed graph
+def store_features(
+    features: Dict[str, Any],
+    config: Optional[Dict[str, Any]] = None
+) -> Optional[str]:
+    """
+    Persist engineered features to the feature store, if one is configured.
+
+    The store lives in ``features.store_dir``; each call writes a new version
+    (see ``data.feature_store``) stamped with the last transaction time, so
+    training and ``NexusShieldScorer`` can open the features memory-mapped
+    instead of recomputing them.
+
+    Args:
+        features: Feature tables from ``engineer_features``
+        config: Optional configuration dictionary
+
+    Returns:
+        The written version, or None if no store is configured
+    """
+    features_config = (config or {}).get("features", {})
+    store_dir = features_config.get("store_dir")
+    if not store_dir:
+        return None
+    transactions = features['transactions']
+    as_of = None
+    if "timestamp" in transactions.columns and len(transactions):
+        as_of = int(to_epoch_seconds(transactions["timestamp"]).max())
+    return FeatureStore(store_dir).write(
+        features,
+        dtype=features_config.get("store_dtype", "float32"),
+        normalize=features_config.get("store_normalize", False),
+        as_of=as_of,
+        metadata={'features': features_config},
+    )
+
+
+def resolve_table_paths(
+    data_dir: Path,
+    config: Optional[Dict[str, Any]] = None
+) -> Dict[str, Path]:
+    """
+    Resolve the input path of each raw table.
+
+    Paths come from the ``data.<table>_file`` config keys. If the configured
+    file does not exist, a directory named after the table (a partitioned
+    dataset) is used instead.
+
+    Args:
+        data_dir: Directory containing data files
+        config: Optional configuration with file paths
+
+    Returns:
+        Dictionary mapping table name to file or directory path
+    """
+    data_dir = Path(data_dir)
+    data_config = (config or {}).get("data", {})
+    paths = {}
+    for table in ("transactions", "accounts", "devices", "merchants", "labels"):
+        path = data_dir / data_config.get(f"{table}_file", f"{table}.csv")
+        if not path.exists() and (data_dir / table).is_dir():
+            path = data_dir / table
+        paths[table] = path
+    return paths
+
+
+def load_cleaned_data(
+    data_dir: Path,
+    config: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Load and clean all tables, reusing the on-disk cache when possible.
+
+    Args:
+        data_dir: Directory containing raw data files
+        config: Optional configuration dictionary
+
+    Returns:
+        Dictionary with cleaned 'transactions', 'accounts', 'devices' and
+        'merchants' DataFrames plus the raw 'labels' (or None)
     """
-    pass
+    config = config or {}
+    data_config = config.get("data", {})
+
+    cache = None
+    if data_config.get("cache_enabled", False):
+        cache = CleanedTableCache(
+            data_config.get("interim_dir", "data/interim"),
+            data_config.get("cache_max_bytes", DEFAULT_CACHE_MAX_BYTES)
+        )
+        key = cache.key(
+            resolve_table_paths(data_dir, config).values(),
+            config=_clean_config(config),
+            code_version=fingerprint_code(*_CLEAN_CODE)
+        )
+        cached = cache.load(key)
+        if cached is not None:
+            return cached
+
+    cleaned = _clean_tables(data_dir, config)
+    if cache is not None:
+        cache.store(key, cleaned)
+    return cleaned
+
+
+def _clean_config(config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Config values the cleaned tables depend on (key of the cleaned-table
+    cache and of the 'clean' stage).
+    """
+    data_config = config.get("data", {})
+    return {
+        'data': {key: data_config.get(key) for key in _CLEAN_DATA_KEYS},
+        'preprocess': config.get("preprocess", {}),
+    }
+
+
+def _clean_tables(data_dir: Path, config: Dict[str, Any]) -> Dict[str, Any]:
+    """Load and clean all tables, adding the raw 'labels' (or None)."""
+    raw_data = load_all_data(data_dir, config)
+    cleaned = clean_data(
+        raw_data['transactions'],
+        raw_data['accounts'],
+        raw_data['devices'],
+        raw_data['merchants'],
+        config=config.get("preprocess", {})
+    )
+    cleaned['labels'] = raw_data.get('labels')
+    return cleaned
 
 
 def load_all_data(
@@ -71,24 +460,75 @@ def load_all_data(
             'labels': ... (optional)
         }
 
-    TODO: Implement data loading
+        When ``data.stream_transactions`` is enabled in the config,
+        'transactions' is an iterator of bounded-size DataFrame batches
+        (see ``loaders.stream_transactions``) instead of a single DataFrame.
+        'labels' is None if the labels file does not exist.
+
+    Each table may be a single file or a date-partitioned directory such as
+    ``transactions/dt=2026-10-01/part-*.parquet`` (see ``resolve_table_paths``).
+    Transaction partitions outside ``data.time_range`` are pruned and the
+    remaining files are read concurrently (up to ``data.max_read_workers``
+    threads).
     """
-    pass
+    data_config = (config or {}).get("data", {})
+    paths = resolve_table_paths(data_dir, config)
+
+    time_range = data_config.get("time_range")
+    time_range = tuple(time_range) if time_range else None
+    partition_key = data_config.get("partition_key", "dt")
+    max_workers = data_config.get("max_read_workers")
+
+    if data_config.get("stream_transactions", False):
+        transactions = stream_transactions(
+            paths['transactions'],
+            columns=data_config.get("stream_columns"),
+            time_range=time_range,
+            batch_rows=data_config.get("stream_batch_rows", DEFAULT_BATCH_ROWS),
+            max_batch_bytes=data_config.get(
+                "stream_max_batch_bytes", DEFAULT_MAX_BATCH_BYTES
+            ),
+            partition_key=partition_key
+        )
+    else:
+        transactions = load_transactions(
+            paths['transactions'],
+            time_range=time_range,
+            partition_key=partition_key,
+            max_workers=max_workers
+        )
+
+    return {
+        'transactions': transactions,
+        'accounts': load_accounts(paths['accounts']),
+        'devices': load_devices(paths['devices']),
+        'merchants': load_merchants(paths['merchants']),
+        'labels': load_labels(paths['labels']) if paths['labels'].exists() else None
+    }
 
 
 def process_data(
-    raw_data: Dict[str, Any]
+    raw_data: Dict[str, Any],
+    config: Optional[Dict[str, Any]] = None
 ) -> Dict[str, Any]:
     """
     Process raw data (clean + feature engineering).
 
     Args:
         raw_data: Dictionary with raw DataFrames
+        config: Optional configuration dictionary
 
     Returns:
-        Dictionary with processed DataFrames
-
-    TODO: Implement data processing pipeline
+        Dictionary with processed DataFrames (and the raw 'labels', if any)
     """
-    pass
+    cleaned = clean_data(
+        raw_data['transactions'],
+        raw_data['accounts'],
+        raw_data['devices'],
+        raw_data['merchants'],
+        config=(config or {}).get("preprocess", {})
+    )
+    processed = engineer_features(**cleaned, config=(config or {}).get("features"))
+    processed['labels'] = raw_data.get('labels')
+    return processed
 
@@ -0,0 +1,223 @@
+"""
+Fingerprinted, resumable pipeline stages.
+
+A ``Stage`` is one step of a pipeline with a persisted output. Its key is a
+hash of the keys of the stages it depends on, its external inputs (e.g. raw
+file fingerprints), its config section and the source of its code modules,
+so a key changes exactly when something that could change the output does.
+
+``StageRunner`` resolves a target stage on demand: a stage whose artifact
+for the current key exists is loaded instead of run, and its upstream stages
+are not even loaded. Artifacts are written to a temporary directory and
+renamed into place once complete, so a crash leaves every finished stage
+reusable and the next run resumes from there. One pipeline run should write
+to a stage directory at a time. Layout::
+
+    <stage_dir>/<stage>/<key>/      stage output (format chosen by the stage)
+    <stage_dir>/<stage>/<key>/stage.json   key payload, run time, creation time
+"""
+
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+from pathlib import Path
+import json
+import logging
+import os
+import shutil
+import time
+import types
+
+import pandas as pd
+
+from ..data.cache import (
+    fingerprint_code,
+    hash_payload,
+    read_tables,
+    staged_directory,
+    write_tables,
+)
+
+
+logger = logging.getLogger(__name__)
+
+_STAGE_MANIFEST = "stage.json"
+
+
+class Stage:
+    """
+    One pipeline step with a persisted, fingerprinted output.
+
+    Attributes:
+        name: Stage name (also its artifact directory)
+        deps: Names of the stages whose outputs ``compute`` receives
+        compute: Function of the dependency outputs (as keyword arguments
+            named after the stages) returning the stage output
+        save: Function writing an output to an existing directory
+        load: Function reading an output back from its directory
+        config: Config values the output depends on
+        code: Modules whose source the output depends on
+        inputs: Fingerprint of external inputs (e.g. raw files)
+    """
+
+    def __init__(
+        self,
+        name: str,
+        compute: Callable[..., Any],
+        save: Callable[[Any, Path], None],
+        load: Callable[[Path], Any],
+        deps: Iterable[str] = (),
+        config: Optional[Dict[str, Any]] = None,
+        code: Iterable[types.ModuleType] = (),
+        inputs: Any = None
+    ):
+        """
+        Define a stage.
+
+        Args:
+            name: Stage name
+            compute: Output from the dependency outputs
+            save: Writer of the output into a directory
+            load: Reader of the output from a directory
+            deps: Upstream stage names
+            config: Config values that affect the output
+            code: Modules whose code affects the output
+            inputs: Fingerprint of external inputs
+        """
+        self.name = name
+        self.compute = compute
+        self.save = save
+        self.load = load
+        self.deps = list(deps)
+        self.config = config or {}
+        self.code = list(code)
+        self.inputs = inputs
+
+
+class StageRunner:
+    """
+    Runs stages on demand, reusing persisted outputs with matching keys.
+
+    Attributes:
+        stage_dir: Root directory of the stage artifacts
+        keep: Artifacts kept per stage (older ones are removed after a run)
+        ran: Names of the stages computed (not loaded) so far
+    """
+
+    def __init__(
+        self,
+        stages: Iterable[Stage],
+        stage_dir: Union[str, Path],
+        keep: int = 2
+    ):
+        """
+        Initialize the runner.
+
+        Args:
+            stages: Stage definitions (dependencies before dependents)
+            stage_dir: Root directory of the stage artifacts
+            keep: Artifacts kept per stage
+        """
+        self.stages = {stage.name: stage for stage in stages}
+        self.stage_dir = Path(stage_dir)
+        self.keep = keep
+        self.ran: List[str] = []
+        self._keys: Dict[str, str] = {}
+        self._outputs: Dict[str, Any] = {}
+
+    def key(self, name: str) -> str:
+        """
+        Fingerprint of a stage: its dependencies' keys, inputs, config and code.
+        """
+        if name not in self._keys:
+            stage = self.stages[name]
+            self._keys[name] = hash_payload(self._payload(stage))
+        return self._keys[name]
+
+    def _payload(self, stage: Stage) -> Dict[str, Any]:
+        return {
+            'stage': stage.name,
+            'deps': {dep: self.key(dep) for dep in stage.deps},
+            'inputs': stage.inputs,
+            'config': stage.config,
+            'code': fingerprint_code(*stage.code) if stage.code else "",
+        }
+
+    def artifact_dir(self, name: str) -> Path:
+        """Directory of a stage's artifact for its current key."""
+        return self.stage_dir / name / self.key(name)
+
+    def is_complete(self, name: str) -> bool:
+        """Whether the artifact for a stage's current key exists."""
+        return (self.artifact_dir(name) / _STAGE_MANIFEST).exists()
+
+    def run(self, name: str) -> Any:
+        """
+        Output of a stage, loaded if its artifact exists and computed (with
+        its dependencies resolved the same way) otherwise.
+
+        Args:
+            name: Stage name
+
+        Returns:
+            The stage output
+        """
+        if name in self._outputs:
+            return self._outputs[name]
+        stage = self.stages[name]
+        directory = self.artifact_dir(name)
+        if self.is_complete(name):
+            logger.info("Stage %s: reusing %s", name, directory)
+            os.utime(directory / _STAGE_MANIFEST)
+            output = stage.load(directory)
+        else:
+            inputs = {dep: self.run(dep) for dep in stage.deps}
+            started = time.perf_counter()
+            output = stage.compute(**inputs)
+            seconds = time.perf_counter() - started
+            self._persist(stage, output, seconds)
+            self.ran.append(name)
+            logger.info("Stage %s: computed in %.1fs", name, seconds)
+        self._outputs[name] = output
+        return output
+
+    def _persist(self, stage: Stage, output: Any, seconds: float) -> None:
+        """Write an output to its artifact directory, atomically."""
+        with staged_directory(self.artifact_dir(stage.name)) as staging:
+            stage.save(output, staging)
+            manifest = {
+                'key': self.key(stage.name),
+                'payload': self._payload(stage),
+                'seconds': seconds,
+                'created_at': time.time(),
+            }
+            (staging / _STAGE_MANIFEST).write_text(json.dumps(manifest, indent=2, default=str))
+        self._evict(stage.name)
+
+    def _evict(self, name: str) -> None:
+        """
+        Remove all but the ``keep`` most recently used artifacts of a stage,
+        and staging directories left by crashed runs.
+        """
+        root = self.stage_dir / name
+        for path in root.glob(".tmp-*"):
+            shutil.rmtree(path, ignore_errors=True)
+        artifacts = sorted(
+            (path for path in root.iterdir() if (path / _STAGE_MANIFEST).exists()),
+            key=lambda path: (path / _STAGE_MANIFEST).stat().st_mtime,
+            reverse=True
+        )
+        for path in artifacts[self.keep:]:
+            shutil.rmtree(path, ignore_errors=True)
+            logger.info("Stage %s: removed old artifact %s", name, path.name)
+
+
+def save_tables(tables: Dict[str, Optional[pd.DataFrame]], directory: Path) -> None:
+    """
+    Write DataFrames as uncompressed Arrow IPC files (see
+    ``cache.write_tables``; None tables are recorded as absent).
+    """
+    (directory / "tables.json").write_text(json.dumps(write_tables(tables, directory)))
+
+
+def load_tables(directory: Path) -> Dict[str, Optional[pd.DataFrame]]:
+    """Read tables written by ``save_tables`` (memory-mapped)."""
+    return read_tables(directory, json.loads((directory / "tables.json").read_text()))
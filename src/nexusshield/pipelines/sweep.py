@@ -0,0 +1,373 @@
+"""
+Hyperparameter sweeps over one shared graph.
+
+``run_sweep`` trains many configurations of the model against a single
+built graph instead of calling ``train_eval_pipeline`` (and rebuilding the
+graph) once per configuration:
+
+- the graph is saved once to a shared-memory directory (``/dev/shm`` when
+  available) and every worker process memory-maps it with ``load_graph``,
+  so all trials read the same physical pages
+- trials run concurrently in a process pool; each worker is limited to
+  ``threads_per_trial`` intra-op threads (torch and BLAS) so the trials do
+  not oversubscribe the CPUs
+- successive halving stops weak trials early: every trial is trained for
+  ``min_epochs``, the best ``1 / reduction_factor`` continue for
+  ``reduction_factor`` times as many epochs, and so on up to
+  ``max_epochs``. Each rung calls the trial function again with the
+  cumulative epoch budget and the trial's checkpoint directory; resuming
+  from that directory instead of retraining is up to the trial function.
+
+The trial function is always given explicitly. ``train_trial`` wires up the
+training stack of this package, which needs ``torch_geometric``, the
+``models`` package and the training loops.
+
+Every evaluation (trial and rung) is one row of the returned results table.
+"""
+
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+import copy
+import importlib
+import itertools
+import logging
+import math
+import multiprocessing
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from .build_graph_pipeline import build_graph_pipeline
+from ..data.graph_store import load_graph, save_graph
+from ..data.hetero_graph import HeteroGraph
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SWEEP_CONFIG: Dict[str, Any] = {
+    'space': {},  # dotted config key (e.g. 'model.dropout') -> candidate values
+    'num_workers': None,  # defaults to the CPU count / threads_per_trial
+    'threads_per_trial': 1,
+    'min_epochs': 1,  # epochs of the first rung
+    'max_epochs': None,  # defaults to training.num_epochs
+    'reduction_factor': 3,
+    'metric': "val_loss",
+    'mode': "min",
+    'work_dir': None,  # trial checkpoints; defaults to <training.checkpoint_dir>/sweep
+    'shared_dir': None,
+}
+
+SWEEP_MODES = ("min", "max")
+
+_SHARED_MEMORY_DIR = Path("/dev/shm")
+
+_THREAD_ENV = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+
+# A trial: (graph, config, cumulative epochs, checkpoint directory) -> metrics
+TrialFn = Callable[[HeteroGraph, Dict[str, Any], int, str], Dict[str, float]]
+
+# Graph of the current worker process, opened once by ``_init_worker``.
+_worker_graph: Optional[HeteroGraph] = None
+
+
+def trial_grid(space: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    """
+    All combinations of a search space.
+
+    Args:
+        space: Dotted config key to candidate values
+
+    Returns:
+        One dictionary of dotted key to value per combination
+    """
+    keys = list(space)
+    return [dict(zip(keys, values)) for values in itertools.product(*space.values())]
+
+
+def apply_overrides(config: Dict[str, Any], overrides: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Copy of a config with dotted keys (e.g. 'model.dropout') replaced.
+
+    Args:
+        config: Full configuration
+        overrides: Dotted key to value
+
+    Returns:
+        New configuration; ``config`` is not modified
+    """
+    config = copy.deepcopy(config)
+    for key, value in overrides.items():
+        *sections, name = key.split(".")
+        target = config
+        for section in sections:
+            target = target.setdefault(section, {})
+        target[name] = value
+    return config
+
+
+def halving_rungs(min_epochs: int, max_epochs: int, reduction_factor: int) -> List[int]:
+    """
+    Cumulative epochs of each successive-halving rung.
+
+    Args:
+        min_epochs: Epochs of the first rung
+        max_epochs: Epochs of the last rung
+        reduction_factor: Growth of the budget (and shrinkage of the
+            surviving trials) from one rung to the next
+
+    Returns:
+        Increasing epoch budgets, ending with ``max_epochs``
+    """
+    rungs = [min(min_epochs, max_epochs)]
+    while rungs[-1] < max_epochs:
+        rungs.append(min(rungs[-1] * reduction_factor, max_epochs))
+    return rungs
+
+
+@contextmanager
+def _thread_budget(threads: int) -> Iterator[None]:
+    """Limit the BLAS/OpenMP threads of processes started in this block."""
+    saved = {name: os.environ.get(name) for name in _THREAD_ENV}
+    os.environ.update({name: str(threads) for name in _THREAD_ENV})
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def _init_worker(graph_dir: str, threads: int) -> None:
+    """Open the shared graph and set the thread budget of a worker process."""
+    global _worker_graph
+    import torch
+
+    torch.set_num_threads(threads)
+    _worker_graph = load_graph(graph_dir)
+
+
+def _run_trial(
+    trial_fn: TrialFn,
+    config: Dict[str, Any],
+    epochs: int,
+    checkpoint_dir: str
+) -> Tuple[Dict[str, float], float]:
+    """Run one trial rung in a worker; returns its metrics and wall time."""
+    started = time.perf_counter()
+    metrics = trial_fn(_worker_graph, config, epochs, checkpoint_dir)
+    return metrics, time.perf_counter() - started
+
+
+def train_trial(
+    graph: HeteroGraph,
+    config: Dict[str, Any],
+    epochs: int,
+    checkpoint_dir: str
+) -> Dict[str, float]:
+    """
+    Train one configuration for node classification or link prediction.
+
+    Args:
+        graph: Shared graph
+        config: Full configuration of the trial
+        epochs: Total epochs to train for (each rung trains from scratch)
+        checkpoint_dir: Checkpoint directory of the trial
+
+    Returns:
+        Final training and validation loss and accuracy
+
+    Raises:
+        RuntimeError: If the training loop returns no history
+    """
+    # Imported here: the model stack is only needed inside the workers.
+    from .train_eval_pipeline import initialize_model, split_graph
+    from ..training.train_link_prediction import train_link_prediction
+    from ..training.train_node_classification import (
+        create_node_loaders,
+        train_node_classification,
+    )
+
+    training = config['training']
+    task = training.get('task', "node_classification")
+    splits = split_graph(
+        graph,
+        training['train_ratio'], training['val_ratio'], training['test_ratio'],
+        task=task,
+        mode=training.get('split_mode', "random"),
+        edge_type=training.get('split_edge_type'),
+        seed=training.get('split_seed', 0)
+    )
+    if task == "node_classification":
+        train = train_node_classification
+        loaders = create_node_loaders(splits, config)
+    else:
+        train = train_link_prediction
+        loaders = splits
+    history = train(
+        initialize_model(config, graph),
+        loaders['train'],
+        loaders['val'],
+        num_epochs=epochs,
+        learning_rate=training['learning_rate'],
+        device=config.get('inference', {}).get('device', "cpu"),
+        checkpoint_dir=checkpoint_dir
+    )
+    if not history:
+        raise RuntimeError(f"{train.__name__} returned no training history")
+    return {
+        name: float(history[name][-1])
+        for name in ('train_loss', 'val_loss', 'train_acc', 'val_acc')
+        if history.get(name)
+    }
+
+
+def _check_training_stack() -> None:
+    """Fail before starting any worker if ``train_trial`` cannot run here."""
+    try:
+        importlib.import_module(".train_eval_pipeline", __package__)
+    except ImportError as error:
+        raise ImportError(
+            f"train_trial needs the model training stack, which is unavailable: {error}"
+        ) from error
+
+
+def run_sweep(
+    graph: HeteroGraph,
+    config: Dict[str, Any],
+    trial_fn: TrialFn
+) -> pd.DataFrame:
+    """
+    Run a successive-halving sweep over the ``sweep.space`` of a config.
+
+    Args:
+        graph: Built graph shared by all trials
+        config: Full configuration with a ``sweep`` section (see
+            ``DEFAULT_SWEEP_CONFIG``)
+        trial_fn: Module-level (picklable) function training one trial,
+            e.g. ``train_trial``
+
+    Returns:
+        One row per evaluated rung of each trial with columns trial, rung,
+        epochs, the swept keys, the trial's metrics, seconds and status
+        ('continued', 'stopped', 'completed' or 'failed'); the last rung
+        comes first, ordered from best to worst metric
+
+    Raises:
+        ValueError: If the mode is unsupported or the space is empty
+        ImportError: If ``trial_fn`` is ``train_trial`` and the training
+            stack cannot be imported
+        RuntimeError: If every trial fails in the first rung
+    """
+    options = {**DEFAULT_SWEEP_CONFIG, **(config.get('sweep') or {})}
+    if options['mode'] not in SWEEP_MODES:
+        raise ValueError(
+            f"Unsupported sweep mode: {options['mode']}. Supported: {', '.join(SWEEP_MODES)}"
+        )
+    trials = trial_grid(options['space'])
+    if not options['space'] or not trials:
+        raise ValueError("Sweep space is empty: set sweep.space to lists of values")
+    training = config.get('training', {})
+    max_epochs = options['max_epochs'] or training.get('num_epochs', 100)
+    reduction_factor = max(int(options['reduction_factor']), 2)
+    rungs = halving_rungs(options['min_epochs'], max_epochs, reduction_factor)
+    threads = max(1, options['threads_per_trial'])
+    num_workers = options['num_workers'] or max(1, (os.cpu_count() or 1) // threads)
+    work_dir = Path(
+        options['work_dir'] or Path(training.get('checkpoint_dir', "checkpoints")) / "sweep"
+    )
+    configs = [apply_overrides(config, overrides) for overrides in trials]
+    if trial_fn is train_trial:
+        _check_training_stack()
+    sign = 1.0 if options['mode'] == "min" else -1.0
+
+    shared_dir = options['shared_dir']
+    if shared_dir is None and _SHARED_MEMORY_DIR.is_dir():
+        shared_dir = _SHARED_MEMORY_DIR
+    rows: List[Dict[str, Any]] = []
+    started = time.perf_counter()
+    with tempfile.TemporaryDirectory(prefix="nexusshield-sweep-", dir=shared_dir) as tmp:
+        graph_dir = save_graph(graph, Path(tmp) / "graph")
+        # Spawned workers avoid forking a process with live Arrow thread pools.
+        context = multiprocessing.get_context("spawn")
+        with _thread_budget(threads), ProcessPoolExecutor(
+            max_workers=min(num_workers, len(trials)),
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(str(graph_dir), threads)
+        ) as pool:
+            alive = list(range(len(trials)))
+            for rung, epochs in enumerate(rungs):
+                futures = {
+                    trial: pool.submit(
+                        _run_trial, trial_fn, configs[trial], epochs,
+                        str(work_dir / f"trial-{trial:04d}")
+                    )
+                    for trial in alive
+                }
+                scores = {}
+                errors = []
+                for trial, future in futures.items():
+                    row = {'trial': trial, 'rung': rung, 'epochs': epochs, **trials[trial]}
+                    try:
+                        metrics, seconds = future.result()
+                    except Exception as error:
+                        logger.warning("Sweep trial %d failed: %s", trial, error)
+                        rows.append({**row, 'status': "failed", 'error': repr(error)})
+                        errors.append(error)
+                        continue
+                    score = metrics.get(options['metric'], math.nan)
+                    scores[trial] = sign * score if not math.isnan(score) else math.inf
+                    rows.append({**row, **metrics, 'seconds': seconds, 'status': "completed"})
+                if rung == 0 and not scores:
+                    raise RuntimeError(
+                        f"All {len(trials)} sweep trials failed, first with: {errors[0]!r}"
+                    ) from errors[0]
+
+                last = rung == len(rungs) - 1
+                keep = max(1, math.ceil(len(alive) / reduction_factor))
+                alive = sorted(scores, key=scores.get)[:keep] if not last else []
+                for row in rows:
+                    if row['rung'] == rung and row['status'] == "completed" and not last:
+                        row['status'] = "continued" if row['trial'] in alive else "stopped"
+                logger.info(
+                    "Sweep rung %d (%d epochs): %d trials, %d continue",
+                    rung, epochs, len(futures), len(alive)
+                )
+
+    # Trials that got furthest first, best metric first within a rung.
+    results = pd.DataFrame(rows)
+    if options['metric'] in results.columns:
+        results = results.assign(_order=results[options['metric']] * sign).sort_values(
+            ['rung', '_order', 'trial'], ascending=[False, True, True], na_position="last"
+        ).drop(columns="_order").reset_index(drop=True)
+    logger.info(
+        "Sweep: %d trials, %d evaluations in %.1fs",
+        len(trials), len(results), time.perf_counter() - started
+    )
+    return results
+
+
+def sweep_pipeline(
+    data_dir: Path,
+    config: Dict[str, Any],
+    trial_fn: TrialFn
+) -> pd.DataFrame:
+    """
+    Build the graph once and run the configured sweep over it.
+
+    Args:
+        data_dir: Directory containing raw data files
+        config: Full configuration with a ``sweep`` section
+        trial_fn: Function training one trial
+
+    Returns:
+        Results table of ``run_sweep``
+    """
+    graph = build_graph_pipeline(data_dir, config)
+    return run_sweep(graph, config, trial_fn)
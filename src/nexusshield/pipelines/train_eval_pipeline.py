@@ -5,10 +5,12 @@ This pipeline chains together graph building, model training, and evaluation
 to provide an end-to-end workflow for training and evaluating fraud detection models.
 """
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Union
 from pathlib import Path
 
 from .build_graph_pipeline import build_graph_pipeline
+from ..data.hetero_graph import EdgeType
+from ..data.splits import split_edges, split_nodes
 from ..models.nexusshield_gnn import NexusShieldGNN
 from ..training.train_node_classification import train_node_classification
 from ..training.train_link_prediction import train_link_prediction
@@ -64,31 +66,50 @@ def split_graph(
     graph: Any,
     train_ratio: float = 0.7,
     val_ratio: float = 0.15,
-    test_ratio: float = 0.15
+    test_ratio: float = 0.15,
+    task: str = "node_classification",
+    mode: str = "random",
+    edge_type: Optional[Union[EdgeType, str]] = None,
+    seed: int = 0
 ) -> Dict[str, Any]:
     """
     Split graph into train/validation/test sets.
 
+    Splits are masks over the one shared graph (see ``data.splits``), never
+    copies of it.
+
     Args:
         graph: Heterogeneous graph object
         train_ratio: Fraction of data for training
         val_ratio: Fraction of data for validation
         test_ratio: Fraction of data for testing
+        task: 'node_classification' (split labeled nodes) or
+            'link_prediction' (split the edges of ``edge_type``)
+        mode: 'random', 'stratified' (nodes only) or 'temporal'
+        edge_type: Edge type (or name) to split for link prediction
+        seed: Random seed
 
     Returns:
-        Dictionary with split graphs:
+        Dictionary with one entry per split:
         {
-            'train': train_graph,
-            'val': val_graph,
-            'test': test_graph
+            'train': {'nodes' or 'edges': masks, 'graph': message-passing graph},
+            'val': {...},
+            'test': {...}
         }
 
-    TODO: Implement graph splitting:
-    - Split nodes (for node classification) or edges (for link prediction)
-    - Create subgraphs for each split
-    - Ensure no data leakage between splits
+    Raises:
+        ValueError: If the task is unsupported or link prediction has no edge type
     """
-    pass
+    ratios = (train_ratio, val_ratio, test_ratio)
+    if task == "node_classification":
+        return split_nodes(graph, ratios, mode=mode, seed=seed)
+    if task == "link_prediction":
+        if edge_type is None:
+            raise ValueError("Link prediction splits need an edge_type")
+        return split_edges(graph, edge_type, ratios, mode=mode, seed=seed)
+    raise ValueError(
+        f"Unsupported task: {task}. Supported: node_classification, link_prediction"
+    )
 
 
 def initialize_model(
@@ -4,6 +4,11 @@ Training loop for node classification task.
 This module provides the training skeleton for classifying nodes (accounts, devices)
 as fraud or legitimate. The training loop handles data loading, forward/backward passes,
 optimization, and checkpointing.
+
+Graphs too large for full-batch training are trained in neighbor-sampled
+mini-batches: ``create_node_loaders`` turns the split masks of
+``split_graph`` into ``NeighborLoader`` objects whose ``MiniBatch``es are the
+``train_loader`` / ``val_loader`` of the training loop.
 """
 
 from typing import Dict, Any, Optional
@@ -11,6 +16,51 @@ import torch
 import torch.nn as nn
 import torch.optim as optim
 
+from ..data.sampler import NeighborLoader, NeighborSampler
+
+
+def create_node_loaders(
+    splits: Dict[str, Any],
+    config: Dict[str, Any],
+    node_type: Optional[str] = None
+) -> Dict[str, NeighborLoader]:
+    """
+    Neighbor-sampled mini-batch loaders of node classification splits.
+
+    Each split samples from its own message-passing graph, so temporal
+    splits never reach edges of a later period.
+
+    Args:
+        splits: Output of ``split_graph`` for node classification
+        config: Configuration; ``training.fanouts`` (default:
+            ``model.graphsage_num_samples`` for each of
+            ``model.num_gnn_layers`` layers), ``training.edge_fanouts``,
+            ``training.batch_size`` and ``training.target_node_type`` are read
+        node_type: Seed node type (default: ``training.target_node_type``)
+
+    Returns:
+        Loader per split ('train' shuffled every epoch, 'val' and 'test' not)
+    """
+    model_config = config.get('model', {})
+    training = config.get('training', {})
+    node_type = node_type or training.get('target_node_type', "account")
+    fanouts = training.get('fanouts') or (
+        [model_config.get('graphsage_num_samples', 5)] * model_config.get('num_gnn_layers', 2)
+    )
+    seed = training.get('split_seed', 0)
+    loaders = {}
+    for name, split in splits.items():
+        sampler = NeighborSampler(
+            split['graph'], fanouts, training.get('edge_fanouts'), seed=seed
+        )
+        loaders[name] = NeighborLoader(
+            sampler, node_type, split['nodes'][node_type],
+            batch_size=training.get('batch_size', 32),
+            shuffle=name == "train",
+            seed=seed
+        )
+    return loaders
+
 
 def train_node_classification(
     model: nn.Module,
@@ -34,8 +84,8 @@ def train_node_classification(
 
     Args:
         model: NexusShieldGNN model instance
-        train_loader: DataLoader for training data
-        val_loader: Optional DataLoader for validation data
+        train_loader: Training mini-batches (e.g. a ``NeighborLoader``)
+        val_loader: Optional validation mini-batches
         num_epochs: Number of training epochs
         learning_rate: Learning rate for optimizer
         device: Device to train on ('cuda' or 'cpu')
@@ -3,6 +3,8 @@ Tests for data loading and preprocessing modules.
 """
 
 import pytest
+import numpy as np
+import pandas as pd
 from pathlib import Path
 
 from src.nexusshield.data.loaders import (
@@ -10,21 +12,174 @@ from src.nexusshield.data.loaders import (
     load_accounts,
     load_devices,
     load_merchants,
-    load_labels
+    load_labels,
+    stream_transactions,
+    discover_partitions
 )
-from src.nexusshield.data.preprocess import clean_data, engineer_features
+from src.nexusshield.data.cleaning import clean_data, normalize_ip_addresses
+from src.nexusshield.data.preprocess import engineer_features, compute_velocity_features
+from src.nexusshield.data.schema import apply_schema, has_integer_ids
+from src.nexusshield.data.cache import CleanedTableCache, staged_directory
+from src.nexusshield.data.chunked_clean import clean_transactions_chunked
+from src.nexusshield.data.feature_store import FeatureStore
+from src.nexusshield.data.incremental_features import IncrementalFeatureAggregator
 
 
-def test_load_transactions():
+def _sample_transactions(num_rows: int = 100) -> pd.DataFrame:
+    """Build a small transaction table spanning ``num_rows`` hours."""
+    return pd.DataFrame({
+        'transaction_id': [f"t{i}" for i in range(num_rows)],
+        'account_id': [f"a{i % 7}" for i in range(num_rows)],
+        'device_id': [f"d{i % 5}" for i in range(num_rows)],
+        'ip_address': [f"10.0.{i % 3}.{i % 11}" for i in range(num_rows)],
+        'merchant_id': [f"m{i % 4}" for i in range(num_rows)],
+        'amount': [float(i) for i in range(num_rows)],
+        'timestamp': pd.date_range("2026-10-01", periods=num_rows, freq="h"),
+    })
+
+
+def test_load_transactions(tmp_path):
     """
     Test loading transaction data.
+    """
+    df = _sample_transactions()
+    df.to_csv(tmp_path / "transactions.csv", index=False)
+    df.to_parquet(tmp_path / "transactions.parquet", index=False)
+
+    from_csv = load_transactions(tmp_path / "transactions.csv")
+    from_parquet = load_transactions(tmp_path / "transactions.parquet")
+    assert from_csv.shape == df.shape
+    assert list(from_parquet.columns) == list(df.columns)
+    assert from_csv.attrs["bytes_saved"] > 0
+    assert isinstance(from_csv["account_id"].dtype, pd.CategoricalDtype)
+    assert from_csv["timestamp"].tolist() == from_parquet["timestamp"].tolist()
+
+    raw = load_transactions(tmp_path / "transactions.csv", compact=False)
+    assert not isinstance(raw["account_id"].dtype, pd.CategoricalDtype)
+
+    with pytest.raises(ValueError):
+        load_transactions(tmp_path / "transactions.json")
 
-    TODO: Implement test:
-    - Create sample transaction data file
-    - Load using load_transactions
-    - Assert correct shape and columns
+
+def test_load_partitioned_transactions(tmp_path):
     """
-    pass
+    Test partition discovery, date pruning and concurrent multi-file loading.
+    """
+    df = _sample_transactions(96)
+    root = tmp_path / "transactions"
+    for day, part in df.groupby(df["timestamp"].dt.strftime("%Y-%m-%d")):
+        partition = root / f"dt={day}"
+        partition.mkdir(parents=True)
+        half = len(part) // 2
+        part.iloc[:half].to_parquet(partition / "part-0.parquet", index=False)
+        part.iloc[half:].to_parquet(partition / "part-1.parquet", index=False)
+
+    assert len(discover_partitions(root)) == 8
+    pruned = discover_partitions(root, time_range=("2026-10-02", "2026-10-03"))
+    assert [path.parent.name for path in pruned] == ["dt=2026-10-02"] * 2
+
+    loaded = load_transactions(root, max_workers=4)
+    assert len(loaded) == len(df)
+    assert sorted(loaded["transaction_id"].astype(str)) == sorted(df["transaction_id"])
+
+    window = load_transactions(root, time_range=("2026-10-02 12:00", "2026-10-03"))
+    assert len(window) == 12
+
+
+def test_load_partitioned_csv_types(tmp_path):
+    """
+    Test that CSV partitions whose IDs look numeric in only some files load together.
+    """
+    root = tmp_path / "transactions"
+    days = {"2026-10-01": ["7", "8"], "2026-10-02": ["d7", "d8"]}
+    for i, (day, devices) in enumerate(days.items()):
+        partition = root / f"dt={day}"
+        partition.mkdir(parents=True)
+        pd.DataFrame({
+            'transaction_id': [f"t{i}0", f"t{i}1"],
+            'account_id': ["a0", "a1"],
+            'device_id': devices,
+            'amount': [1, 2],
+            'timestamp': [f"{day}T00:00:00", f"{day}T01:00:00"],
+        }).to_csv(partition / "part-0.csv", index=False)
+
+    loaded = load_transactions(root)
+    assert sorted(loaded["device_id"]) == ["7", "8", "d7", "d8"]
+    window = load_transactions(root / "dt=2026-10-01" / "part-0.csv",
+                               time_range=("2026-10-01", "2026-10-02"))
+    single = load_transactions(root / "dt=2026-10-01" / "part-0.csv")
+    assert window["device_id"].tolist() == single["device_id"].tolist() == ["7", "8"]
+
+
+def test_apply_schema():
+    """
+    Test compact dtypes: categorical IDs, downcast numerics, epoch timestamps.
+    """
+    df = _sample_transactions()
+    df["retry_count"] = 3
+    compact, saved = apply_schema(df, "transactions")
+
+    assert saved > 0
+    assert isinstance(compact["transaction_id"].dtype, pd.CategoricalDtype)
+    assert compact["amount"].dtype == "float32"
+    assert compact["retry_count"].dtype == "uint8"
+    assert compact["timestamp"].dtype == "int64"
+    assert compact["timestamp"].iloc[0] == int(pd.Timestamp("2026-10-01", tz="UTC").timestamp())
+
+    df["amount"] = 1e9 + 0.01
+    compact, _ = apply_schema(df, "transactions")
+    assert compact["amount"].dtype == "float64"
+
+
+@pytest.mark.parametrize("suffix", ["csv", "parquet"])
+def test_stream_transactions(tmp_path, suffix):
+    """
+    Test streaming with column projection, time-range pushdown and batch caps.
+    """
+    df = _sample_transactions()
+    path = tmp_path / f"transactions.{suffix}"
+    if suffix == "csv":
+        df.to_csv(path, index=False)
+    else:
+        df.to_parquet(path, index=False, row_group_size=10)
+
+    batches = list(stream_transactions(
+        path,
+        columns=["transaction_id", "amount", "timestamp"],
+        time_range=("2026-10-02", "2026-10-03"),
+        batch_rows=5
+    ))
+    streamed = pd.concat(batches, ignore_index=True)
+    assert all(len(batch) <= 5 for batch in batches)
+    assert list(streamed.columns) == ["transaction_id", "amount", "timestamp"]
+    assert streamed["transaction_id"].tolist() == [f"t{i}" for i in range(24, 48)]
+
+    tiny = list(stream_transactions(path, columns=["amount"], max_batch_bytes=64))
+    assert all(batch.memory_usage(index=False).sum() <= 64 for batch in tiny)
+    assert sum(len(batch) for batch in tiny) == len(df)
+
+
+def test_stream_transactions_csv_types(tmp_path):
+    """
+    Test that CSV column types do not depend on the first block's values.
+    """
+    num_rows = 150_000
+    # Beyond the first 1 MB block: non-numeric IDs and the first device IDs.
+    df = pd.DataFrame({
+        'transaction_id': [str(i) for i in range(num_rows - 10)] + [f"t{i}" for i in range(10)],
+        'device_id': [None] * (num_rows - 10) + ["d0"] * 10,
+        'amount': ["1"] * num_rows,
+    })
+    path = tmp_path / "transactions.csv"
+    df.to_csv(path, index=False)
+    assert path.stat().st_size > 1024 * 1024
+
+    streamed = pd.concat(
+        stream_transactions(path, max_batch_bytes=1024 * 1024), ignore_index=True
+    )
+    assert streamed["transaction_id"].tolist() == df["transaction_id"].tolist()
+    assert streamed["device_id"].iloc[-10:].tolist() == ["d0"] * 10
+    assert streamed["amount"].dtype == np.float64
 
 
 def test_load_accounts():
@@ -66,23 +221,348 @@ def test_load_labels():
 def test_clean_data():
     """
     Test data cleaning function.
+    """
+    transactions = _sample_transactions(6)
+    transactions.loc[1, 'transaction_id'] = "t0"
+    transactions.loc[2, 'account_id'] = None
+    transactions.loc[3, 'amount'] = float("nan")
+    transactions.loc[4, 'amount'] = -5.0
+    accounts = pd.DataFrame({'account_id': ["a0", "a0", None, "a1"]})
+    devices = pd.DataFrame({'device_id': ["d0"]})
+    merchants = pd.DataFrame({'merchant_id': ["m0", "m1"]})
+
+    cleaned = clean_data(transactions, accounts, devices, merchants)
+    assert cleaned['transactions']['transaction_id'].tolist() == ["t0", "t5"]
+    assert cleaned['accounts']['account_id'].tolist() == ["a0", "a1"]
 
-    TODO: Implement test:
-    - Create sample data with issues (duplicates, missing values)
-    - Run clean_data
-    - Assert data is cleaned correctly
+    lenient = clean_data(
+        transactions, accounts, devices, merchants,
+        config={'deduplicate': False, 'min_amount': None}
+    )
+    assert lenient['transactions']['transaction_id'].tolist() == ["t0", "t0", "t4", "t5"]
+
+
+@pytest.mark.parametrize("strategy", ["hash_set", "spill"])
+def test_clean_data_chunked(tmp_path, strategy):
     """
-    pass
+    Test out-of-core cleaning of transaction chunks with duplicates across chunks.
+    """
+    transactions = _sample_transactions(60)
+    transactions.loc[25, 'transaction_id'] = "t3"
+    transactions.loc[50, 'transaction_id'] = "t49"
+    transactions = transactions.astype({'amount': object, 'timestamp': object})
+    transactions.loc[10, 'amount'] = "not a number"
+    transactions.loc[40, 'timestamp'] = "garbage"
+    transactions['device_id'] = transactions['device_id'].astype(object)
+    transactions.loc[:19, 'device_id'] = None
+    chunks = [transactions.iloc[i:i + 20].assign(channel="web") for i in range(0, 60, 20)]
+    # All missing in the first chunk: later chunks must still fit its schema.
+    chunks[0]['channel'] = pd.Series([None] * 20, dtype=object, index=chunks[0].index)
+    config = {
+        'dedup_strategy': strategy,
+        'spill_partitions': 4,
+        'chunked_output': tmp_path / "cleaned.parquet",
+    }
+
+    stats = clean_transactions_chunked(chunks, tmp_path / "cleaned.parquet", config)
+    assert stats == {
+        'rows_read': 60, 'rows_invalid': 2, 'rows_duplicate': 2, 'rows_written': 56,
+        **({'hash_set_bytes': 56 * 8} if strategy == "hash_set" else {}),
+    }
+
+    cleaned = clean_data(iter(chunks), pd.DataFrame({'account_id': ["a0"]}),
+                         pd.DataFrame({'device_id': ["d0"]}),
+                         pd.DataFrame({'merchant_id': ["m0"]}), config)
+    ids = cleaned['transactions']['transaction_id'].astype(str)
+    assert sorted(ids) == sorted(f"t{i}" for i in range(60) if i not in (10, 25, 40, 50))
+    assert cleaned['transactions']['timestamp'].dtype == np.int64
+    written = pd.read_parquet(tmp_path / "cleaned.parquet")
+    missing = written['transaction_id'].isin([f"t{i}" for i in range(20)])
+    assert written.loc[missing, 'device_id'].isna().all()
+    assert written.loc[~missing, 'device_id'].notna().all()
+    assert written.loc[~missing, 'channel'].eq("web").all()
+    if strategy == "hash_set":
+        assert ids.tolist()[:3] == ["t0", "t1", "t2"]
+
+    # Integer IDs keep their type, so they match the entity tables' IDs.
+    numeric = pd.DataFrame({
+        'transaction_id': [1, 2, 2, 3],
+        'account_id': [100, 200, 200, 100],
+        'device_id': [7, 7, 7, 8],
+        'merchant_id': [5, 6, 6, 5],
+        'amount': [1.0, 2.0, 2.0, 3.0],
+        'timestamp': [1, 2, 2, 3],
+    })
+    accounts = pd.DataFrame({'account_id': [100, 200]})
+    cleaned = clean_data(iter([numeric.iloc[:2], numeric.iloc[2:]]), accounts,
+                         pd.DataFrame({'device_id': [7, 8]}),
+                         pd.DataFrame({'merchant_id': [5, 6]}), config)
+    for column in ('transaction_id', 'account_id', 'device_id', 'merchant_id'):
+        assert has_integer_ids(cleaned['transactions'][column])
+    assert sorted(cleaned['transactions']['transaction_id']) == [1, 2, 3]
+    assert cleaned['transactions']['account_id'].isin(cleaned['accounts']['account_id']).all()
+
+
+def test_normalize_ip_addresses():
+    """
+    Test integer IP and subnet keys for mixed, inconsistently formatted input.
+    """
+    ips = pd.Series([
+        " 10.0.0.1", "010.000.000.001", "10.0.0.1:443", "::ffff:10.0.0.1",
+        "10.0.0.77", "2001:DB8::1", "[2001:db8:0:0:0:0:0:1]:80", "2001:db8::1.2.3.4",
+        "2001:db8:1::1", "256.1.1.1", "1::2::3", None,
+    ]).astype("category")
+    keys = normalize_ip_addresses(ips)
+
+    assert keys['ip_version'].tolist() == [4, 4, 4, 4, 4, 6, 6, 6, 6, 0, 0, 0]
+    assert keys['ip_v4'].iloc[0] == (10 << 24) + 1
+    assert keys['ip_v4'].dtype == "uint32"
+    # Spellings of the same address share one 128-bit key.
+    pairs = list(zip(keys['ip_hi'], keys['ip_lo']))
+    assert len(set(pairs[:4])) == 1
+    assert pairs[5] == pairs[6] == (0x20010DB800000000, 1)
+    assert pairs[7] == (0x20010DB800000000, 0x01020304)
+    # /24 and /48 subnets.
+    assert keys['ip_subnet'].iloc[0] == keys['ip_subnet'].iloc[4]
+    assert keys['ip_subnet'].iloc[5] == keys['ip_subnet'].iloc[7]
+    assert keys['ip_subnet'].iloc[5] != keys['ip_subnet'].iloc[8]
+
+
+def test_cleaned_table_cache(tmp_path):
+    """
+    Test cache keys, Arrow round trips and LRU eviction.
+    """
+    raw = tmp_path / "transactions.csv"
+    _sample_transactions().to_csv(raw, index=False)
+    cache = CleanedTableCache(tmp_path / "interim")
+
+    key = cache.key([raw], config={'min_amount': 0.0}, code_version="v1")
+    assert key == cache.key([raw], config={'min_amount': 0.0}, code_version="v1")
+    assert key != cache.key([raw], config={'min_amount': 1.0}, code_version="v1")
+    assert key != cache.key([raw], config={'min_amount': 0.0}, code_version="v2")
+    assert cache.load(key) is None
+
+    tables = {'transactions': load_transactions(raw), 'labels': None}
+    cache.store(key, tables)
+    loaded = cache.load(key)
+    assert loaded['labels'] is None
+    pd.testing.assert_frame_equal(loaded['transactions'], tables['transactions'])
+
+    cache.max_bytes = 1
+    cache.store("other", tables)
+    assert [entry.name for entry in cache.entries()] == ["cleaned-other"]
+
+    # Failed or conflicting writes leave no staging directory behind.
+    target = tmp_path / "interim" / "cleaned-other"
+    with pytest.raises(OSError):
+        with staged_directory(target, replace=False) as staging:
+            (staging / "partial.arrow").write_text("")
+    with pytest.raises(RuntimeError):
+        with staged_directory(tmp_path / "interim" / "new"):
+            raise RuntimeError("crash")
+    assert sorted(path.name for path in target.parent.iterdir()) == ["cleaned-other"]
 
 
 def test_engineer_features():
     """
     Test feature engineering function.
+    """
+    transactions, _ = apply_schema(_sample_transactions(48), "transactions")
+    accounts = pd.DataFrame({'account_id': ["a0", "a1", "unused"]})
+    devices = pd.DataFrame({'device_id': ["d0", "d1"]})
+    merchants = pd.DataFrame({'merchant_id': ["m0"]})
+
+    features = engineer_features(transactions, accounts, devices, merchants)
+    txns = features['transactions']
+    assert len(txns) == len(transactions)
+    assert {'log_amount', 'hour_of_day', 'account_txn_count_24h'} <= set(txns.columns)
+    assert txns.attrs['velocity_rows_per_second'] > 0
+
+    accounts = features['accounts'].set_index('account_id')
+    assert accounts.loc['a0', 'txn_count'] == 7
+    assert accounts.loc['a0', 'distinct_devices'] == 5
+    assert accounts.loc['unused', 'txn_count'] == 0
+    assert features['devices']['distinct_accounts'].tolist() == [7, 7]
 
-    TODO: Implement test:
-    - Create sample cleaned data
-    - Run engineer_features
-    - Assert features are created correctly
+
+def test_compute_velocity_features():
     """
-    pass
+    Test rolling-window counts, sums and distinct counts against a brute force.
+    """
+    rng = np.random.default_rng(0)
+    n = 400
+    transactions = pd.DataFrame({
+        'account_id': pd.Categorical(rng.integers(0, 5, n).astype(str)),
+        'merchant_id': pd.Categorical(rng.integers(0, 4, n).astype(str)),
+        'amount': rng.random(n),
+        'timestamp': rng.integers(0, 3 * 86400, n),
+    })
+    features = compute_velocity_features(
+        transactions, windows=("1h", "24h"), distinct_columns=("merchant_id",)
+    )
+
+    for i in range(0, n, 7):
+        row = transactions.iloc[i]
+        for window, seconds in (("1h", 3600), ("24h", 86400)):
+            t = row['timestamp']
+            earlier = (transactions['timestamp'] < t) | (
+                (transactions['timestamp'] == t) & (transactions.index <= i)
+            )
+            in_window = transactions[
+                (transactions['account_id'] == row['account_id'])
+                & (transactions['timestamp'] > t - seconds) & earlier
+            ]
+            assert features[f'account_txn_count_{window}'].iloc[i] == len(in_window)
+            assert features[f'account_amount_sum_{window}'].iloc[i] == pytest.approx(
+                in_window['amount'].sum(), rel=1e-5
+            )
+            assert features[f'account_distinct_merchant_{window}'].iloc[i] == (
+                in_window['merchant_id'].nunique()
+            )
+
+
+
+def test_incremental_feature_aggregator(tmp_path):
+    """
+    Test that applying deltas matches a full rebuild and rewrites only touched entities.
+    """
+    transactions, _ = apply_schema(_sample_transactions(60), "transactions")
+    accounts = pd.DataFrame({'account_id': [f"a{i}" for i in range(7)]})
+    devices = pd.DataFrame({'device_id': [f"d{i}" for i in range(5)]})
+    merchants = pd.DataFrame({'merchant_id': [f"m{i}" for i in range(4)]})
+    full = engineer_features(transactions, accounts, devices, merchants)
+
+    aggregator = IncrementalFeatureAggregator(tmp_path / "state")
+    aggregator.apply(transactions.iloc[:50])
+    aggregator.flush()
+
+    reopened = IncrementalFeatureAggregator(tmp_path / "state")
+    delta = transactions.iloc[50:52]
+    updated = reopened.apply(delta)
+    reopened.flush()
+    assert sorted(updated['accounts'].index) == sorted(delta['account_id'].astype(str).unique())
+    assert len(updated['merchants']) == delta['merchant_id'].nunique()
+
+    reopened = IncrementalFeatureAggregator(tmp_path / "state")
+    reopened.apply(transactions.iloc[52:])
+    for table, id_column in (('accounts', 'account_id'), ('devices', 'device_id')):
+        expected = full[table].set_index(id_column)
+        actual = reopened.features(table).loc[expected.index]
+        for column in actual.columns:
+            np.testing.assert_allclose(
+                actual[column].to_numpy(), expected[column].to_numpy(), rtol=1e-5
+            )
+
+
+def test_incremental_feature_aggregator_integer_ids():
+    """
+    Test that attach matches integer entity IDs as engineer_features does.
+    """
+    transactions = pd.DataFrame({
+        'transaction_id': [1, 2, 3],
+        'account_id': [100, 100, 200],
+        'device_id': [7, 8, 7],
+        'merchant_id': [5, 5, 6],
+        'amount': [10.0, 20.0, 30.0],
+        'timestamp': pd.to_datetime(["2026-01-01", "2026-01-02", "2026-01-03"]),
+    })
+    accounts = pd.DataFrame({'account_id': [100, 200, 300]})
+    devices = pd.DataFrame({'device_id': [7, 8]})
+    merchants = pd.DataFrame({'merchant_id': [5, 6]})
+    full = engineer_features(transactions, accounts, devices, merchants)
+
+    aggregator = IncrementalFeatureAggregator()
+    aggregator.apply(transactions.iloc[:2])
+    aggregator.apply(transactions.iloc[2:])
+    attached = aggregator.attach('accounts', accounts)
+    assert attached['account_id'].tolist() == [100, 200, 300]
+    assert attached['txn_count'].tolist() == full['accounts']['txn_count'].tolist() == [2, 1, 0]
+    np.testing.assert_allclose(attached['amount_mean'], full['accounts']['amount_mean'])
+
+
+def test_incremental_state_id_consolidation(tmp_path):
+    """
+    Test that consolidating ID chunks never loses flushed entities.
+    """
+    transactions, _ = apply_schema(_sample_transactions(40), "transactions")
+    batches = [
+        transactions.iloc[[i]].assign(account_id=f"n{i}") for i in range(34)
+    ]
+    aggregator = IncrementalFeatureAggregator(tmp_path / "state")
+    for batch in batches[:32]:
+        aggregator.apply(batch)
+        aggregator.flush()
+    # The 33rd chunk triggers consolidation; the batch is never flushed.
+    aggregator.apply(batches[32])
+    state_dir = tmp_path / "state" / "accounts"
+    assert len(list(state_dir.glob("ids-*.arrow"))) == 2
+
+    reopened = IncrementalFeatureAggregator(tmp_path / "state")
+    assert reopened.num_entities['accounts'] == 32
+    assert reopened.features('accounts').index.tolist() == [f"n{i}" for i in range(32)]
+    reopened.apply(batches[33])
+    reopened.flush()
+    reopened = IncrementalFeatureAggregator(tmp_path / "state")
+    assert reopened.features('accounts').index.tolist()[-2:] == ["n31", "n33"]
+
+
+@pytest.mark.parametrize("mode", ["process", "sharded"])
+def test_engineer_features_parallel(mode):
+    """
+    Test that the process-parallel modes reproduce the in-process features.
+    """
+    transactions, _ = apply_schema(_sample_transactions(80), "transactions")
+    accounts = pd.DataFrame({'account_id': [f"a{i}" for i in range(7)]})
+    devices = pd.DataFrame({'device_id': [f"d{i}" for i in range(5)]})
+    merchants = pd.DataFrame({'merchant_id': [f"m{i}" for i in range(4)]})
+    expected = engineer_features(transactions, accounts, devices, merchants)
+
+    config = {'parallel_mode': mode, 'num_workers': 2, 'num_shards': 3}
+    actual = engineer_features(transactions, accounts, devices, merchants, config)
+    for table in expected:
+        pd.testing.assert_frame_equal(actual[table], expected[table])
+
+
+def test_feature_store(tmp_path):
+    """
+    Test writing, versioning and memory-mapped lookups in the feature store.
+    """
+    transactions, _ = apply_schema(_sample_transactions(30), "transactions")
+    accounts = pd.DataFrame({'account_id': [f"a{i}" for i in range(7)]})
+    devices = pd.DataFrame({'device_id': [f"d{i}" for i in range(5)]})
+    merchants = pd.DataFrame({'merchant_id': [f"m{i}" for i in range(4)]})
+    features = engineer_features(transactions, accounts, devices, merchants)
+
+    store = FeatureStore(tmp_path / "features")
+    assert store.write(features, as_of=123) == "v00001"
+    snapshot = store.open()
+    assert set(snapshot.node_types) == {"transaction", "account", "device", "merchant"}
+    assert "first_seen" not in snapshot.columns("account")
+    matrix = snapshot.matrix("account")
+    assert isinstance(matrix, np.memmap) and matrix.dtype == np.float32
+    assert matrix.shape == (7, len(snapshot.columns("account")))
+
+    txn_count = snapshot.columns("account").index("txn_count")
+    rows = snapshot.get("account", ["a3", "missing"])
+    assert rows[0, txn_count] == (transactions['account_id'] == "a3").sum()
+    assert not rows[1].any()
+    assert snapshot.rows("device", ["d4"]).tolist() == [4]
+
+    features['merchants'] = features['merchants'].assign(amount_sum=1e6)
+    with pytest.raises(ValueError):
+        store.write(features, dtype="float16")
+    assert store.write(features, dtype="float16", normalize=True) == "v00002"
+    assert store.current() == "v00002"
+    assert store.open().matrix("transaction").dtype == np.float16
+    assert store.open("v00001").manifest['as_of'] == 123
 
+    # Tables are stored under the node type of their key, whatever the column order.
+    reordered = features['transactions'][
+        ['account_id', 'transaction_id', 'amount']
+    ].assign(amount=2.0)
+    store.write({'accounts': features['accounts'], 'transactions': reordered})
+    snapshot = store.open()
+    assert snapshot.columns("transaction") == ["amount"]
+    assert snapshot.matrix("account").shape[0] == 7
+    with pytest.raises(ValueError):
+        store.write({'ips': features['accounts']})
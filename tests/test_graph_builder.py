@@ -3,65 +3,727 @@ Tests for graph construction module.
 """
 
 import pytest
+import numpy as np
 import pandas as pd
 
 from src.nexusshield.data.graph_builder import (
+    append_transactions,
     build_heterogeneous_graph,
+    coalesce_edges,
     create_account_device_edges,
     create_account_transaction_edges,
     create_transaction_ip_edges,
-    create_transaction_merchant_edges
+    create_transaction_merchant_edges,
+    create_transaction_subnet_edges
 )
+from src.nexusshield.data.feature_store import FeatureStore
+from src.nexusshield.data.graph_stats import GraphStats, graph_stats
+from src.nexusshield.data.graph_store import load_graph, save_graph
+from src.nexusshield.data.partition import (
+    edge_cut,
+    extract_partition,
+    load_partition,
+    partition_graph,
+    save_partitions
+)
+from src.nexusshield.data.hetero_graph import HeteroGraph, NodeIndex
+from src.nexusshield.data.cleaning import normalize_ip_addresses
+from src.nexusshield.data.sampler import NeighborLoader, NeighborSampler
+from src.nexusshield.data.splits import split_edges, split_nodes
+from src.nexusshield.data.streaming_graph import StreamingGraphBuilder
+
+
+def _sample_graph():
+    """Graph over the sample transactions with entity tables and labels."""
+    transactions = _sample_transactions()
+    transactions = transactions.assign(**normalize_ip_addresses(transactions['ip_address']))
+    accounts = pd.DataFrame({
+        'account_id': ["a2", "a0", "a1", "a9"],
+        'txn_count': [1, 1, 2, 0],
+    })
+    devices = pd.DataFrame({'device_id': ["d0", "d1"]})
+    merchants = pd.DataFrame({'merchant_id': ["m0", "m1"], 'txn_count': [2, 2]})
+    labels = pd.DataFrame({
+        'entity_id': ["a1", "a9", "d1"],
+        'entity_type': ["account", "account", "device"],
+        'is_fraud': [1, 0, 1],
+    })
+
+    return build_heterogeneous_graph(transactions, accounts, devices, merchants, labels)
 
 
 def test_build_heterogeneous_graph():
     """
     Test building heterogeneous graph from data tables.
+    """
+    graph = _sample_graph()
+
+    # Entity tables seed the index, so an account without transactions is a node.
+    assert graph.node_index.ids['account'].tolist() == ["a2", "a0", "a1", "a9"]
+    assert graph.num_nodes('ip') == 3
+    assert 'subnet' not in graph.node_index.node_types
+    assert ('transaction', 'with', 'merchant') in graph.edge_types
+    edge_index = graph.edge_index[('account', 'uses', 'device')]
+    assert edge_index.dtype == np.int32
+    np.testing.assert_array_equal(edge_index, [[2, 1, 0], [0, 0, 1]])
+    np.testing.assert_array_equal(
+        graph.edge_attr[('account', 'uses', 'device')][:, 0], [10.0, 20.0, 40.0]
+    )
+
+    assert graph.feature_names['account'] == ['txn_count']
+    np.testing.assert_array_equal(graph.x['account'][:, 0], [1, 1, 2, 0])
+    np.testing.assert_array_equal(graph.y['account'], [-1, -1, 1, 0])
+    np.testing.assert_array_equal(graph.y['device'], [-1, 1])
+    assert 'ip' not in graph.x
 
-    TODO: Implement test:
-    - Create sample data tables
-    - Build graph using build_heterogeneous_graph
-    - Assert graph has correct node types and edge types
-    - Assert node features are correct
+
+def test_graph_adjacency():
+    """
+    Test CSR/CSC neighbor queries and k-hop expansion.
     """
-    pass
+    graph = _sample_graph()
+    uses = ('account', 'uses', 'device')
+
+    # Accounts a2, a0, a1, a9 are rows 0-3; devices d0, d1 rows 0-1.
+    csr, csc = graph.csr[uses], graph.csc[uses]
+    assert csr.indices.dtype == np.int32
+    np.testing.assert_array_equal(csr.degree(), [1, 1, 1, 0])
+    np.testing.assert_array_equal(graph.neighbors(uses, 0), [1])
+    np.testing.assert_array_equal(graph.neighbors(uses, 0, reverse=True), [1, 2])
+    assert len(graph.neighbors(uses, 3)) == 0
+    assert csr.has_edge(2, 0) and not csr.has_edge(2, 1)
+
+    # Edge ids point back into the COO edge_index in both directions.
+    edge_index = graph.edge_index[uses]
+    np.testing.assert_array_equal(edge_index[0, csc.edges(0)], [1, 2])
+    np.testing.assert_array_equal(csr.edge_ids, [2, 1, 0])
+
+    entries, owners = csc.gather(np.array([1, 0]))
+    np.testing.assert_array_equal(csc.indices[entries], [0, 1, 2])
+    np.testing.assert_array_equal(owners, [0, 1, 1])
+
+    reached = graph.k_hop('account', [2], num_hops=1)
+    assert {k: v.tolist() for k, v in reached.items()} == {
+        'account': [2], 'device': [0], 'transaction': [0, 2],
+    }
+    reached = graph.k_hop('account', [2], num_hops=2)
+    assert reached['account'].tolist() == [1, 2]
+    assert reached['merchant'].tolist() == [0, 1]
+    assert reached['ip'].tolist() == [0]
+
+
+def _sample_transactions() -> pd.DataFrame:
+    """Small transaction table with categorical ID columns."""
+    df = pd.DataFrame({
+        'transaction_id': ["t0", "t1", "t2", "t3"],
+        'account_id': ["a1", "a0", "a1", "a2"],
+        'device_id': ["d0", "d0", None, "d1"],
+        'ip_address': ["10.0.0.1", "10.0.0.2", "10.0.0.1", "10.0.0.3"],
+        'merchant_id': ["m0", "m1", "m1", "m0"],
+        'amount': [10.0, 20.0, 30.0, 40.0],
+    })
+    id_columns = ['transaction_id', 'account_id', 'device_id', 'ip_address', 'merchant_id']
+    df[id_columns] = df[id_columns].astype("category")
+    return df
 
 
 def test_create_account_device_edges():
     """
-    Test creating Account-Device edges.
+    Test creating Account-Device edges from categorical codes.
+    """
+    transactions = _sample_transactions()
+    edge_index, edge_attr = create_account_device_edges(transactions)
+
+    # The transaction with a missing device is skipped.
+    np.testing.assert_array_equal(edge_index, [[1, 0, 2], [0, 0, 1]])
+    np.testing.assert_array_equal(edge_attr[:, 0], [10.0, 20.0, 40.0])
+
+
+def test_coalesce_edges():
+    """
+    Test collapsing repeated account-device pairs into weighted edges.
+    """
+    edge_index = np.array([[1, 0, 1, 1, 0], [0, 2, 0, 0, 2]], dtype=np.int32)
+    amount = np.array([10.0, 5.0, 20.0, 30.0, 7.0], dtype=np.float32)
+    timestamp = np.array([300, 100, 200, 500, 400], dtype=np.int64)
+
+    coalesced, edge_attr, first, last = coalesce_edges(edge_index, amount, timestamp)
+
+    np.testing.assert_array_equal(coalesced, [[0, 1], [2, 0]])
+    assert coalesced.dtype == np.int32
+    np.testing.assert_allclose(edge_attr, [[2, 12.0, 6.0], [3, 60.0, 20.0]])
+    np.testing.assert_array_equal(first, [100, 200])
+    np.testing.assert_array_equal(last, [400, 500])
+
+    transactions = _sample_transactions()
+    transactions['device_id'] = pd.Categorical(["d0", "d0", "d0", "d1"])
+    transactions['account_id'] = pd.Categorical(["a1", "a1", "a1", "a2"])
+    transactions['timestamp'] = [30, 10, 20, 40]
+    graph = build_heterogeneous_graph(
+        transactions, None, None, None,
+        config={'coalesce_edges': ["account__uses__device"]}
+    )
+    uses = ('account', 'uses', 'device')
+    np.testing.assert_array_equal(graph.edge_index[uses], [[0, 1], [0, 1]])
+    assert graph.edge_attr_names[uses] == ["count", "amount_sum", "amount_mean"]
+    np.testing.assert_array_equal(graph.edge_time[uses], [10, 40])
+    np.testing.assert_array_equal(graph.edge_last_time[uses], [30, 40])
+    assert graph.metadata['coalesce']['account__uses__device']['compression_ratio'] == 2.0
+    # Other edge types keep one edge per transaction.
+    assert graph.num_edges(('account', 'makes', 'transaction')) == 4
+
+    with pytest.raises(ValueError):
+        build_heterogeneous_graph(
+            transactions, None, None, None, config={'coalesce_edges': ["a__b__c"]}
+        )
+
+
+def test_meta_path_edges():
+    """
+    Test Account-shares-Device edges and the hub degree cap.
+    """
+    transactions = _sample_transactions()
+    transactions['account_id'] = pd.Categorical(["a0", "a1", "a2", "a1"])
+    transactions['device_id'] = pd.Categorical(["d0", "d0", "d0", "d1"])
+    transactions = pd.concat([transactions, transactions.iloc[[0]].assign(
+        transaction_id="t4", device_id="d1"
+    )], ignore_index=True)
+    for column in ('transaction_id', 'account_id', 'device_id'):
+        transactions[column] = transactions[column].astype(str).astype("category")
+
+    # a0 and a1 share d0 and d1; a2 shares only d0 with both.
+    graph = build_heterogeneous_graph(
+        transactions, None, None, None, config={'meta_paths': ["device"]}
+    )
+    shares = ('account', 'shares_device', 'account')
+    np.testing.assert_array_equal(
+        graph.edge_index[shares], [[0, 0, 1, 1, 2, 2], [1, 2, 0, 2, 0, 1]]
+    )
+    np.testing.assert_array_equal(graph.edge_attr[shares][:, 0], [2, 1, 2, 1, 1, 1])
+    assert graph.csr[shares].num_edges == 6
+
+    # d0 has three accounts: over a cap of two it is sampled down or dropped.
+    graph = build_heterogeneous_graph(transactions, None, None, None, config={
+        'meta_paths': ["device"], 'meta_path_max_degree': 2,
+    })
+    stats = graph.metadata['meta_paths']['account__shares_device__account']
+    assert stats['hubs'] == 1 and stats['pairs_dropped'] == 1
+    graph = build_heterogeneous_graph(transactions, None, None, None, config={
+        'meta_paths': ["device"], 'meta_path_max_degree': 2,
+        'meta_path_hub_policy': "drop",
+    })
+    np.testing.assert_array_equal(graph.edge_index[shares], [[0, 1], [1, 0]])
+    np.testing.assert_array_equal(graph.edge_attr[shares][:, 0], [1, 1])
+
+
+def test_hub_policies():
+    """
+    Test degree statistics and the drop, sample and split hub policies.
+    """
+    transactions = pd.DataFrame({
+        'transaction_id': [f"t{i}" for i in range(6)],
+        'account_id': ["a0", "a1", "a2", "a3", "a4", "a5"],
+        'merchant_id': ["m0", "m0", "m1", "m0", "m0", "m0"],
+        'amount': [1.0, 2.0, 3.0, 4.0, 5.0, 6.0],
+        'timestamp': pd.date_range("2024-01-01", periods=6, freq="h"),
+    })
+    merchants = pd.DataFrame({'merchant_id': ["m0", "m1"], 'txn_count': [5, 1]})
+    with_merchant = ('transaction', 'with', 'merchant')
+
+    def build(policy):
+        return build_heterogeneous_graph(transactions, None, None, merchants, config={
+            'hub_policies': {"transaction__with__merchant": policy},
+            'hub_percentile': 50, 'hub_min_degree': 1, 'hub_max_degree': 2,
+        })
+
+    graph = build("drop")
+    stats = graph.metadata['degrees']['transaction__with__merchant']['dst']
+    assert stats['nodes'] == 2 and stats['max'] == 5
+    assert graph.metadata['hubs']['transaction__with__merchant'] == {
+        'policy': "drop", 'hubs': 1, 'edges_removed': 5, 'virtual_nodes': 0,
+    }
+    np.testing.assert_array_equal(graph.edge_index[with_merchant], [[2], [1]])
+
+    graph = build("sample")
+    assert graph.num_edges(with_merchant) == 3
+    assert np.bincount(graph.edge_index[with_merchant][1]).tolist() == [2, 1]
+    assert np.all(np.diff(graph.edge_time[with_merchant]) >= 0)
+
+    # m0's five edges are spread over m0, m0#1 and m0#2 in time order.
+    graph = build("split")
+    assert graph.metadata['hubs']['transaction__with__merchant']['virtual_nodes'] == 2
+    assert graph.node_index.ids['merchant'].tolist() == ["m0", "m1", "m0#1", "m0#2"]
+    np.testing.assert_array_equal(graph.node_parent['merchant'], [-1, -1, 0, 0])
+    np.testing.assert_array_equal(graph.x['merchant'][:, 0], [5, 1, 5, 5])
+    np.testing.assert_array_equal(
+        graph.edge_index[with_merchant], [[0, 1, 2, 3, 4, 5], [0, 0, 1, 2, 2, 3]]
+    )
+    np.testing.assert_array_equal(graph.neighbors(with_merchant, 2, reverse=True), [3, 4])
+
+    with pytest.raises(ValueError):
+        build("cap")
+
+
+def test_split_ip_hub_save_and_load(tmp_path):
+    """
+    Test that split IP and subnet hubs keep integer keys through save and load.
+    """
+    transactions = pd.DataFrame({
+        'transaction_id': [f"t{i}" for i in range(6)],
+        'account_id': [f"a{i}" for i in range(6)],
+        'ip_address': ["10.0.0.1"] * 5 + ["10.0.1.2"],
+        'amount': [1.0, 2.0, 3.0, 4.0, 5.0, 6.0],
+        'timestamp': pd.date_range("2024-01-01", periods=6, freq="h"),
+    })
+    transactions = transactions.assign(**normalize_ip_addresses(transactions['ip_address']))
+    graph = build_heterogeneous_graph(transactions, None, None, None, config={
+        'hub_policies': {"transaction__from__ip": "split"},
+        'hub_percentile': 50, 'hub_min_degree': 1, 'hub_max_degree': 2,
+    })
+    ids = graph.node_index.ids['ip']
+    assert ids.names[-1] == "hub_part"
+    assert ids.get_level_values("hub_part").tolist() == [0, 0, 1, 2]
+    np.testing.assert_array_equal(graph.node_parent['ip'], [-1, -1, 0, 0])
+
+    loaded = load_graph(save_graph(graph, tmp_path / "graph"))
+    assert loaded.node_index.ids['ip'].equals(ids)
+    np.testing.assert_array_equal(loaded.node_parent['ip'], [-1, -1, 0, 0])
+    # Keys without the hub part still find the real node.
+    appended = transactions.iloc[[5]].assign(transaction_id="t6")
+    append_transactions(loaded, appended)
+    assert loaded.num_nodes('ip') == 4
+
+
+def test_graph_window(tmp_path):
+    """
+    Test time-sorted edges and windowed views with as-of node features.
+    """
+    transactions = _sample_transactions()
+    transactions['timestamp'] = [30, 10, 20, 40]
+    graph = build_heterogeneous_graph(transactions, None, None, None)
+    makes = ('account', 'makes', 'transaction')
+
+    # Edges follow transaction time: t1, t2, t0, t3.
+    np.testing.assert_array_equal(graph.edge_index[makes], [[0, 1, 1, 2], [1, 2, 0, 3]])
+    np.testing.assert_array_equal(graph.edge_time[makes], [10, 20, 30, 40])
+
+    view = graph.window(15, 35)
+    np.testing.assert_array_equal(view.edge_index[makes], [[1, 1], [2, 0]])
+    np.testing.assert_array_equal(view.edge_attr[makes][:, 0], [30.0, 10.0])
+    assert np.shares_memory(view.edge_index[makes], graph.edge_index[makes])
+    assert view.num_nodes('transaction') == 4
+    np.testing.assert_array_equal(view.neighbors(makes, 1), [0, 2])
+    assert graph.window(50, 60).num_edges(makes) == 0
+
+    store = FeatureStore(tmp_path / "features")
+    for as_of, count in ((25, 1), (45, 9)):
+        accounts = pd.DataFrame({'account_id': ["a2", "a0", "a1"], 'txn_count': count})
+        store.write({'accounts': accounts}, as_of=as_of)
+    view = graph.window(15, 35, features=store)
+    assert view.metadata['feature_version'] == "v00001"
+    np.testing.assert_array_equal(view.x['account'][:, 0], [1, 1, 1])
+    assert graph.window(0, 100, features=store).metadata['feature_version'] == "v00002"
+    with pytest.raises(ValueError):
+        graph.window(0, 20, features=store)
+
+
+def _edge_set(graph, edge_type):
+    """Edges of a type as (source ID, destination ID, time, attributes) tuples."""
+    src_type, _, dst_type = edge_type
+    src_ids = graph.node_index.ids[src_type]
+    dst_ids = graph.node_index.ids[dst_type]
+    src, dst = graph.edge_index[edge_type]
+    return sorted(zip(
+        src_ids[src], dst_ids[dst], graph.edge_time[edge_type].tolist(),
+        map(tuple, graph.edge_attr[edge_type].tolist())
+    ))
+
+
+def test_append_transactions():
+    """
+    Test that appending a batch matches building from all transactions.
+    """
+    transactions = _sample_transactions()
+    transactions['timestamp'] = [10, 20, 30, 40]
+    transactions['device_id'] = pd.Categorical(["d0", "d0", "d1", "d0"])
+    transactions['account_id'] = pd.Categorical(["a0", "a0", "a1", "a0"])
+    config = {'coalesce_edges': ["account__uses__device"], 'compact_fraction': 10.0}
+    accounts = pd.DataFrame({'account_id': ["a0"], 'txn_count': [2]})
+
+    graph = build_heterogeneous_graph(
+        transactions.iloc[:2], accounts, None, None, config=config
+    )
+    stats = append_transactions(
+        graph, transactions.iloc[2:],
+        entities={'account': pd.DataFrame({'account_id': ["a1"], 'txn_count': [1]})},
+        config=config
+    )
+    full = build_heterogeneous_graph(transactions, accounts, None, None, config=config)
+
+    assert stats['new_nodes']['account'] == 1 and stats['new_nodes']['transaction'] == 2
+    assert stats['new_edges']['account__uses__device'] == 1
+    for edge_type in full.edge_types:
+        assert _edge_set(graph, edge_type) == _edge_set(full, edge_type)
+    uses = ('account', 'uses', 'device')
+    np.testing.assert_array_equal(graph.edge_last_time[uses], [40, 30])
+    assert graph.metadata['coalesce']['account__uses__device']['compression_ratio'] == 2.0
+    np.testing.assert_array_equal(graph.x['account'][:, 0], [2, 1])
+    np.testing.assert_array_equal(graph.x['transaction'], full.x['transaction'])
+    np.testing.assert_array_equal(graph.y.get('account', np.array([-1, -1])), [-1, -1])
+
+    # Appended edges are visible through the delta segment before compaction.
+    makes = ('account', 'makes', 'transaction')
+    assert graph.delta_edges(makes) == 2
+    np.testing.assert_array_equal(graph.neighbors(makes, 0), [0, 1, 3])
+    np.testing.assert_array_equal(graph.neighbors(makes, 2, reverse=True), [1])
+    assert graph.k_hop('account', [1], 1)['transaction'].tolist() == [2]
+    graph.compact_adjacency(background=True).result()
+    assert graph.delta_edges(makes) == 0
+    np.testing.assert_array_equal(graph.csr[makes].indices, [0, 1, 3, 2])
+    np.testing.assert_array_equal(graph.csc[makes].indices, [0, 0, 1, 0])
+
+    # Transactions already in the graph (or repeated in a batch) are skipped.
+    again = append_transactions(
+        graph, pd.concat([transactions.iloc[3:], transactions.iloc[3:]]), config=config
+    )
+    assert again['transactions'] == 0 and again['skipped'] == 2
+    assert not any(again['new_edges'].values())
+    for edge_type in full.edge_types:
+        assert _edge_set(graph, edge_type) == _edge_set(full, edge_type)
+
+
+def test_graph_stats():
+    """
+    Test that statistics maintained over appends match a recomputation.
+    """
+    graph = _sample_graph()
+    stats = graph_stats(graph).summary()
+    assert graph_stats(graph) is graph.stats
+    assert stats['nodes']['account'] == 4
+    assert stats['edges']['account__uses__device'] == 3
+    uses = stats['degrees']['account__uses__device']
+    assert uses['dst'] == {'max': 2, 'mean': 1.5, 'histogram': {'0': 0, '1': 1, '2-3': 1}}
+    assert uses['src']['histogram'] == {'0': 1, '1': 3}
+
+    # Random batches of edges, some to new nodes, across several types.
+    rng = np.random.default_rng(0)
+    transactions = pd.DataFrame({
+        'transaction_id': [f"t{i}" for i in range(400)],
+        'account_id': [f"a{i}" for i in rng.integers(0, 150, 400)],
+        'device_id': [f"d{i}" for i in rng.integers(0, 300, 400)],
+        'merchant_id': [f"m{i}" for i in rng.integers(0, 20, 400)],
+        'amount': rng.random(400),
+    })
+    graph = build_heterogeneous_graph(transactions.iloc[:100], None, None, None)
+    graph_stats(graph)
+    for start in range(100, 400, 60):
+        append_transactions(graph, transactions.iloc[start:start + 60])
+    full = build_heterogeneous_graph(transactions, None, None, None)
+    assert graph.stats.summary() == GraphStats(full).summary()
+
+
+def test_save_and_load_graph(tmp_path):
+    """
+    Test the on-disk graph format round trip with memory-mapped arrays.
+    """
+    graph = _sample_graph()
+    directory = save_graph(graph, tmp_path / "graph")
+    with pytest.raises(FileExistsError):
+        save_graph(graph, directory)
+
+    loaded = load_graph(directory)
+    uses = ('account', 'uses', 'device')
+    assert isinstance(loaded.edge_index[uses], np.memmap)
+    assert isinstance(loaded.csr[uses].indices, np.memmap)
+    assert loaded.node_types == graph.node_types
+    assert loaded.num_nodes('ip') == 3
+    assert loaded.edge_types == graph.edge_types
+    for edge_type in graph.edge_types:
+        np.testing.assert_array_equal(loaded.edge_index[edge_type], graph.edge_index[edge_type])
+        np.testing.assert_array_equal(loaded.csc[edge_type].edge_ids, graph.csc[edge_type].edge_ids)
+    np.testing.assert_array_equal(loaded.x['account'], graph.x['account'])
+    np.testing.assert_array_equal(loaded.y['device'], graph.y['device'])
+    assert loaded.feature_names['account'] == ['txn_count']
+    np.testing.assert_array_equal(loaded.neighbors(uses, 0, reverse=True), [1, 2])
+
+    # IDs are read on first lookup, including multi-level IP keys.
+    assert loaded.node_index.lookup('account', ["a1", "zz"]).tolist() == [2, -1]
+    assert loaded.node_index.ids['ip'].equals(graph.node_index.ids['ip'])
+    assert loaded.node_index.ids['transaction'].tolist() == ["t0", "t1", "t2", "t3"]
+
+    # Integer entity IDs keep their type through the entity-table seed and the files.
+    numeric = build_heterogeneous_graph(
+        pd.DataFrame({'transaction_id': [1, 2, 3], 'account_id': [100, 200, 100],
+                      'amount': [1.0, 2.0, 3.0]}),
+        pd.DataFrame({'account_id': [100, 200], 'txn_count': [2, 1]}), None, None
+    )
+    reloaded = load_graph(save_graph(numeric, tmp_path / "numeric"))
+    assert reloaded.node_index.ids['account'].dtype == np.int64
+    assert reloaded.node_index.lookup('account', [100, 200]).tolist() == [0, 1]
+
+
+def test_streaming_graph_builder_integer_ids(tmp_path):
+    """
+    Test that the streaming builder keeps integer IDs as the in-memory build does.
+    """
+    transactions = pd.DataFrame({
+        'transaction_id': [1, 2, 3, 4],
+        'account_id': [100, 200, 100, 200],
+        'device_id': [7, 7, 8, 8],
+        'merchant_id': [5, 6, 5, 6],
+        'amount': [1.0, 2.0, 3.0, 4.0],
+        'timestamp': pd.to_datetime(["2026-01-01", "2026-01-02", "2026-01-03", "2026-01-04"]),
+    })
+    accounts = pd.DataFrame({'account_id': [100, 200], 'txn_count': [2, 2]})
+    expected = build_heterogeneous_graph(transactions, accounts, None, None)
+
+    builder = StreamingGraphBuilder(tmp_path / "work", entities={'account': accounts})
+    builder.add(transactions.iloc[:2])
+    builder.add(transactions.iloc[2:])
+    graph = builder.finish(tmp_path / "graph", entities={'account': accounts})
+
+    for node_type in expected.node_types:
+        ids = graph.node_index.ids[node_type]
+        assert ids.dtype == np.int64
+        assert ids.tolist() == expected.node_index.ids[node_type].tolist()
+    np.testing.assert_array_equal(graph.x['account'], expected.x['account'])
+    assert graph.node_index.lookup('transaction', [3, 1]).tolist() == [2, 0]
+    for edge_type in expected.edge_types:
+        np.testing.assert_array_equal(
+            np.asarray(graph.edge_index[edge_type]), expected.edge_index[edge_type]
+        )
 
-    TODO: Implement test:
-    - Create sample transaction data
-    - Create edges
-    - Assert edge indices are correct
+
+def test_partition_graph(tmp_path):
+    """
+    Test partition assignment, halo subgraphs and the on-disk partitions.
     """
-    pass
+    graph = _sample_graph()
+    parts = partition_graph(graph, 2, imbalance=0.5)
+    assert set(parts) == set(graph.node_types)
+    sizes = np.bincount(np.concatenate(list(parts.values())), minlength=2)
+    assert sizes.max() <= np.ceil(sizes.sum() / 2 * 1.5)
+    random_parts = {t: np.arange(graph.num_nodes(t)) % 2 for t in graph.node_types}
+    assert edge_cut(graph, parts) <= edge_cut(graph, random_parts)
+
+    # Every node is owned by exactly one part; every edge is in the part of
+    # each of its endpoints, with both endpoints present.
+    uses = ('account', 'uses', 'device')
+    partitions = [extract_partition(graph, parts, part) for part in range(2)]
+    owned = sum(p.owned['account'].sum() for p in partitions)
+    assert owned == graph.num_nodes('account')
+    for partition in partitions:
+        src, dst = partition.graph.edge_index[uses]
+        global_src = partition.global_rows['account'][src]
+        global_dst = partition.global_rows['device'][dst]
+        assert np.all((parts['account'][global_src] == partition.part)
+                      | (parts['device'][global_dst] == partition.part))
+        ids = partition.graph.node_index.ids['account'].tolist()
+        assert ids == graph.node_index.ids['account'][partition.global_rows['account']].tolist()
+        local = partition.to_local('account', np.arange(graph.num_nodes('account')))
+        present = local >= 0
+        np.testing.assert_array_equal(partition.global_rows['account'][local[present]],
+                                      np.flatnonzero(present))
+    edges = {(int(s), int(d)) for p in partitions
+             for s, d in zip(p.global_rows['account'][p.graph.edge_index[uses][0]],
+                             p.global_rows['device'][p.graph.edge_index[uses][1]])}
+    assert edges == set(zip(*graph.edge_index[uses].tolist()))
+
+    save_partitions(graph, parts, tmp_path / "parts")
+    loaded = load_partition(tmp_path / "parts", 1)
+    np.testing.assert_array_equal(
+        loaded.global_rows['account'], partitions[1].global_rows['account']
+    )
+    np.testing.assert_array_equal(
+        loaded.graph.edge_index[uses], partitions[1].graph.edge_index[uses]
+    )
+    assert loaded.graph.metadata['partition'] == {'part': 1, 'num_parts': 2}
+    with pytest.raises(ValueError):
+        load_partition(tmp_path / "parts", 2)
+
+
+def _history_graph(num_accounts: int = 200, num_transactions: int = 1000):
+    """Random timed transaction graph with a label for every account."""
+    rng = np.random.default_rng(0)
+    transactions = pd.DataFrame({
+        'transaction_id': [f"t{i}" for i in range(num_transactions)],
+        'account_id': [f"a{i}" for i in rng.integers(0, num_accounts, num_transactions)],
+        'device_id': [f"d{i}" for i in rng.integers(0, 50, num_transactions)],
+        'amount': rng.random(num_transactions),
+        'timestamp': rng.permutation(num_transactions),
+    })
+    labels = pd.DataFrame({
+        'entity_id': [f"a{i}" for i in range(num_accounts)],
+        'entity_type': "account",
+        'is_fraud': (np.arange(num_accounts) % 5 == 0).astype(int),
+    })
+    return build_heterogeneous_graph(transactions, None, None, None, labels)
+
+
+def test_split_graph():
+    """
+    Test node and edge split masks and their leakage-free message-passing graphs.
+    """
+    graph = _history_graph()
+    y = graph.y['account']
+
+    for mode in ("random", "stratified", "temporal"):
+        splits = split_nodes(graph, (0.6, 0.2, 0.2), mode=mode)
+        masks = [splits[name]['nodes']['account'] for name in ("train", "val", "test")]
+        np.testing.assert_array_equal(sum(m.astype(int) for m in masks), y >= 0)
+        if mode == "stratified":
+            for mask, ratio in zip(masks, (0.6, 0.2, 0.2)):
+                assert y[mask].mean() == pytest.approx(0.2, abs=0.01)
+                assert mask.sum() == pytest.approx(ratio * len(y), abs=2)
+
+    # Temporal: later splits start after earlier ones, and no split's graph
+    # holds edges from the next split's period.
+    splits = split_nodes(graph, (0.6, 0.2, 0.2), mode="temporal")
+    makes = ('account', 'makes', 'transaction')
+    first_seen = np.full(graph.num_nodes('account'), np.iinfo(np.int64).max)
+    np.minimum.at(first_seen, graph.edge_index[makes][0], graph.edge_time[makes])
+    train, val = splits['train'], splits['val']
+    assert first_seen[train['nodes']['account']].max() < val['start']
+    assert first_seen[val['nodes']['account']].max() < splits['test']['start']
+    assert train['graph'].edge_time[makes].max() < val['start']
+    assert np.shares_memory(train['graph'].edge_index[makes], graph.edge_index[makes])
+    assert splits['test']['graph'] is graph
+
+    # Edge splits hold out validation and test edges from message passing.
+    uses = ('account', 'uses', 'device')
+    for mode in ("random", "temporal"):
+        splits = split_edges(graph, "account__uses__device", (0.8, 0.1, 0.1), mode=mode)
+        masks = [splits[name]['edges'] for name in ("train", "val", "test")]
+        np.testing.assert_array_equal(sum(m.astype(int) for m in masks), 1)
+        edges = {tuple(e) for e in graph.edge_index[uses].T.tolist()}
+        train_edges = {tuple(e) for e in splits['train']['graph'].edge_index[uses].T.tolist()}
+        test_edges = {tuple(e) for e in splits['test']['graph'].edge_index[uses].T.tolist()}
+        assert train_edges == {tuple(e) for e in graph.edge_index[uses][:, masks[0]].T.tolist()}
+        assert test_edges == {tuple(e) for e in graph.edge_index[uses][:, ~masks[2]].T.tolist()}
+        assert splits['val']['graph'] is splits['train']['graph']
+        assert splits['train']['graph'].x['transaction'] is graph.x['transaction']
+        assert train_edges < test_edges <= edges
+        assert splits['train']['graph'].adjacency(uses).indptr[-1] == masks[0].sum()
+    times = graph.edge_time[uses]
+    assert times[splits['train']['edges']].max() < times[splits['val']['edges']].min()
+    with pytest.raises(ValueError):
+        split_nodes(graph, (0.5, 0.2, 0.2))
+    with pytest.raises(ValueError):
+        split_edges(graph, uses, mode="stratified")
+
+
+def test_neighbor_sampler():
+    """
+    Test fanout limits, relabeling and batching of neighbor-sampled mini-batches.
+    """
+    graph = _history_graph()
+    makes = ('account', 'makes', 'transaction')
+    uses = ('account', 'uses', 'device')
+    seeds = np.array([5, 3, 5, 17])
+    batch = NeighborSampler(graph, [2, 3], seed=1).sample('account', seeds)
+
+    # Seeds come first; every local edge is a real edge of the full graph.
+    assert batch.batch_size == 3
+    np.testing.assert_array_equal(batch.seeds, [5, 3, 17])
+    np.testing.assert_array_equal(batch.y, graph.y['account'][[5, 3, 17]])
+    np.testing.assert_array_equal(
+        batch.graph.x['transaction'], graph.x['transaction'][batch.global_rows['transaction']]
+    )
+    assert (batch.graph.node_index.get_ids('account')[:3].tolist()
+            == graph.node_index.ids['account'][[5, 3, 17]].tolist())
+    for edge_type in (makes, uses):
+        src_type, _, dst_type = edge_type
+        src, dst = batch.graph.edge_index[edge_type]
+        edges = set(zip(batch.global_rows[src_type][src], batch.global_rows[dst_type][dst]))
+        assert edges <= set(zip(*graph.edge_index[edge_type].tolist()))
+        assert len(edges) == len(src)
+        assert np.all(np.diff(batch.graph.edge_time[edge_type]) >= 0)
+    # Layer 1 draws at most 2 transactions and 2 devices per seed.
+    src, dst = batch.graph.edge_index[makes]
+    seed_edges = src < 3
+    assert seed_edges.any()
+    assert np.bincount(src[seed_edges], minlength=3).max() <= 2
+
+    # Fanout -1 on one hop reproduces the full neighborhood; a hub costs its fanout.
+    full = NeighborSampler(graph, [-1]).sample('account', [7])
+    np.testing.assert_array_equal(
+        np.sort(full.global_rows['transaction']), graph.neighbors(makes, 7)
+    )
+    hub = HeteroGraph(NodeIndex({'account': pd.Index(["a0"]),
+                                 'transaction': pd.Index(np.arange(100_000))}))
+    hub.edge_index[makes] = np.vstack([np.zeros(100_000, np.int32), np.arange(100_000)])
+    sampled = NeighborSampler(hub, [5, 5]).sample('account', [0])
+    assert sampled.graph.num_nodes('transaction') == 5
+    assert len(np.unique(sampled.global_rows['transaction'])) == 5
+
+    # Per edge type fanouts; a loader visits every seed once per epoch.
+    no_devices = NeighborSampler(graph, [2, 2], {'account__uses__device': [0, 0]})
+    assert no_devices.sample('account', seeds).graph.num_nodes('device') == 0
+    mask = graph.y['account'] >= 0
+    loader = NeighborLoader(no_devices, 'account', mask, batch_size=64)
+    batches = list(loader)
+    assert len(batches) == len(loader) == int(np.ceil(mask.sum() / 64))
+    visited = np.concatenate([b.seeds for b in batches])
+    np.testing.assert_array_equal(np.sort(visited), np.flatnonzero(mask))
+    with pytest.raises(ValueError):
+        NeighborSampler(graph, [2, 2], {'account__uses__device': [1]})
 
 
 def test_create_account_transaction_edges():
     """
     Test creating Account-Transaction edges.
-
-    TODO: Implement test
     """
-    pass
+    edge_index, _ = create_account_transaction_edges(_sample_transactions())
+    np.testing.assert_array_equal(edge_index, [[1, 0, 1, 2], [0, 1, 2, 3]])
 
 
 def test_create_transaction_ip_edges():
     """
     Test creating Transaction-IP edges.
+    """
+    edge_index, _ = create_transaction_ip_edges(_sample_transactions())
+    np.testing.assert_array_equal(edge_index, [[0, 1, 2, 3], [0, 1, 0, 2]])
+
 
-    TODO: Implement test
+def test_create_transaction_ip_edges_normalized():
+    """
+    Test that normalized IP keys merge spellings and drop unparseable IPs.
     """
-    pass
+    transactions = _sample_transactions()
+    transactions['ip_address'] = pd.Categorical(
+        ["10.0.0.1", "010.0.0.1", "bad-ip", "10.0.1.9"]
+    )
+    transactions = transactions.assign(**normalize_ip_addresses(transactions['ip_address']))
+    edge_index, _ = create_transaction_ip_edges(transactions)
+    np.testing.assert_array_equal(edge_index, [[0, 1, 3], [0, 0, 1]])
 
 
-def test_create_transaction_merchant_edges():
+def test_create_transaction_subnet_edges():
+    """
+    Test creating Transaction-Subnet edges from integer subnet keys.
     """
-    Test creating Transaction-Merchant edges.
+    transactions = _sample_transactions()
+    transactions = transactions.assign(**normalize_ip_addresses(transactions['ip_address']))
+    edge_index, _ = create_transaction_subnet_edges(transactions)
+    np.testing.assert_array_equal(edge_index, [[0, 1, 2, 3], [0, 0, 0, 0]])
+
+    # Built into the graph only on request.
+    assert ('transaction', 'from', 'subnet') not in build_heterogeneous_graph(
+        transactions, None, None, None
+    ).edge_types
+    graph = build_heterogeneous_graph(
+        transactions, None, None, None, config={'subnet_edges': True}
+    )
+    assert graph.num_nodes('subnet') == 1
+    np.testing.assert_array_equal(graph.edge_index[('transaction', 'from', 'subnet')], edge_index)
 
-    TODO: Implement test
+
+def test_create_transaction_merchant_edges():
+    """
+    Test creating Transaction-Merchant edges, including non-categorical IDs.
     """
-    pass
+    transactions = _sample_transactions()
+    transactions['merchant_id'] = transactions['merchant_id'].astype(object)
+    edge_index, _ = create_transaction_merchant_edges(transactions)
+    np.testing.assert_array_equal(edge_index, [[0, 1, 2, 3], [0, 1, 1, 0]])
 
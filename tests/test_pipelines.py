@@ -0,0 +1,315 @@
+"""
+Tests for pipeline modules.
+"""
+
+from pathlib import Path
+
+import pytest
+import numpy as np
+import pandas as pd
+
+from src.nexusshield.data import cleaning, preprocess
+from src.nexusshield.pipelines import build_graph_pipeline as pipeline
+from src.nexusshield.pipelines import sweep
+
+
+def _write_raw_tables(data_dir) -> None:
+    """Write a minimal set of raw CSV tables."""
+    pd.DataFrame({
+        'transaction_id': ["t0", "t1", "t1", "t2"],
+        'account_id': ["a0", "a1", "a1", "a0"],
+        'device_id': ["d0", "d0", "d0", "d1"],
+        'ip_address': ["10.0.0.1", "10.0.0.2", "10.0.0.2", "10.0.0.1"],
+        'merchant_id': ["m0", "m1", "m1", "m0"],
+        'amount': [5.0, 7.5, 7.5, 12.0],
+        'timestamp': ["2026-10-01T00:00:00", "2026-10-01T01:00:00",
+                      "2026-10-01T01:00:00", "2026-10-01T02:00:00"],
+    }).to_csv(data_dir / "transactions.csv", index=False)
+    pd.DataFrame({'account_id': ["a0", "a1"]}).to_csv(data_dir / "accounts.csv", index=False)
+    pd.DataFrame({'device_id': ["d0", "d1"]}).to_csv(data_dir / "devices.csv", index=False)
+    pd.DataFrame({'merchant_id': ["m0", "m1"]}).to_csv(data_dir / "merchants.csv", index=False)
+
+
+def test_load_cleaned_data_uses_cache(tmp_path, monkeypatch):
+    """
+    Test that a second load of unchanged inputs skips parsing and cleaning.
+    """
+    _write_raw_tables(tmp_path)
+    config = {'data': {'cache_enabled': True, 'interim_dir': str(tmp_path / "interim")}}
+
+    first = pipeline.load_cleaned_data(tmp_path, config)
+    assert len(first['transactions']) == 3
+
+    def _fail(*args, **kwargs):
+        raise AssertionError("raw tables were parsed on a cache hit")
+
+    monkeypatch.setattr(pipeline, "load_all_data", _fail)
+    second = pipeline.load_cleaned_data(tmp_path, config)
+    pd.testing.assert_frame_equal(first['transactions'], second['transactions'])
+
+    config['preprocess'] = {'min_amount': 6.0}
+    with pytest.raises(AssertionError):
+        pipeline.load_cleaned_data(tmp_path, config)
+
+    # Read options of the transactions table are part of the key too.
+    config['preprocess'] = {}
+    config['data']['stream_columns'] = ["transaction_id", "amount"]
+    with pytest.raises(AssertionError):
+        pipeline.load_cleaned_data(tmp_path, config)
+
+    # Feature code is not part of the key; cleaning code is.
+    del config['data']['stream_columns']
+    for module, hit in ((preprocess, True), (cleaning, False)):
+        edited = tmp_path / f"{module.__name__.rsplit('.', 1)[-1]}.py"
+        edited.write_text(Path(module.__file__).read_text() + "\n# edited\n")
+        with monkeypatch.context() as patch:
+            patch.setattr(module, "__file__", str(edited))
+            if hit:
+                pipeline.load_cleaned_data(tmp_path, config)
+            else:
+                with pytest.raises(AssertionError):
+                    pipeline.load_cleaned_data(tmp_path, config)
+
+
+def test_build_graph_pipeline_stages(tmp_path, monkeypatch):
+    """
+    Test that unchanged stages are reused and a failed build resumes.
+    """
+    data_dir = tmp_path / "raw"
+    data_dir.mkdir()
+    _write_raw_tables(data_dir)
+    config = {'data': {'stage_dir': str(tmp_path / "stages")}, 'graph': {}}
+    graph = pipeline.build_graph_pipeline(data_dir, config)
+    assert graph.num_nodes('transaction') == 3
+
+    def _fail(*args, **kwargs):
+        raise AssertionError("stage ran although its inputs are unchanged")
+
+    # Nothing changed: the graph is loaded from its stage artifact.
+    with monkeypatch.context() as patch:
+        for name in ("load_all_data", "engineer_features", "build_heterogeneous_graph"):
+            patch.setattr(pipeline, name, _fail)
+        reloaded = pipeline.build_graph_pipeline(data_dir, config)
+    assert reloaded.num_nodes('transaction') == 3
+
+    # A graph config change that crashes the build keeps clean and features;
+    # the next run resumes with the graph stage only.
+    config['graph'] = {'coalesce_edges': ["account__uses__device"]}
+    with monkeypatch.context() as patch:
+        patch.setattr(pipeline, "build_heterogeneous_graph", _fail)
+        with pytest.raises(AssertionError):
+            pipeline.build_graph_pipeline(data_dir, config)
+    with monkeypatch.context() as patch:
+        for name in ("load_all_data", "engineer_features"):
+            patch.setattr(pipeline, name, _fail)
+        graph = pipeline.build_graph_pipeline(data_dir, config)
+    assert 'account__uses__device' in graph.metadata['coalesce']
+
+    # Export-only keys do not invalidate the graph stage.
+    config['graph']['save_dir'] = str(tmp_path / "graph")
+    with monkeypatch.context() as patch:
+        patch.setattr(pipeline, "build_heterogeneous_graph", _fail)
+        pipeline.build_graph_pipeline(data_dir, config)
+    assert (tmp_path / "graph" / "manifest.json").exists()
+
+    # A change to the feature code reruns features and graph but not clean.
+    edited = tmp_path / "preprocess.py"
+    edited.write_text(Path(preprocess.__file__).read_text() + "\n# edited\n")
+    ran = []
+
+    def _spy(name):
+        original = getattr(pipeline, name)
+
+        def run(*args, **kwargs):
+            ran.append(name)
+            return original(*args, **kwargs)
+        return run
+
+    with monkeypatch.context() as patch:
+        patch.setattr(preprocess, "__file__", str(edited))
+        patch.setattr(pipeline, "load_all_data", _fail)
+        for name in ("engineer_features", "build_heterogeneous_graph"):
+            patch.setattr(pipeline, name, _spy(name))
+        pipeline.build_graph_pipeline(data_dir, config)
+    assert ran == ["engineer_features", "build_heterogeneous_graph"]
+
+
+def _write_raw_history(data_dir, num_rows: int = 400) -> None:
+    """Write raw CSV tables with a time-ordered transaction history."""
+    rng = np.random.default_rng(0)
+    transactions = pd.DataFrame({
+        'transaction_id': [f"t{i}" for i in range(num_rows)],
+        'account_id': rng.choice([f"a{i}" for i in range(20)], num_rows),
+        'device_id': rng.choice([f"d{i}" for i in range(12)], num_rows),
+        'ip_address': rng.choice([f"10.0.{i}.{j}" for i in range(3) for j in range(5)],
+                                 num_rows),
+        'merchant_id': rng.choice([f"m{i}" for i in range(6)], num_rows),
+        'amount': rng.gamma(2.0, 40.0, num_rows).round(2),
+        'timestamp': pd.Timestamp("2026-09-01") + pd.to_timedelta(
+            np.sort(rng.integers(0, 30 * 86400, num_rows)), unit="s"
+        ),
+    })
+    transactions.loc[7, 'amount'] = -1.0
+    transactions = pd.concat([transactions, transactions.iloc[[30, 31]]]).sort_values(
+        "timestamp", kind="stable"
+    )
+    transactions.to_csv(data_dir / "transactions.csv", index=False)
+    pd.DataFrame({'account_id': [f"a{i}" for i in range(21)]}).to_csv(
+        data_dir / "accounts.csv", index=False
+    )
+    pd.DataFrame({'device_id': [f"d{i}" for i in range(12)]}).to_csv(
+        data_dir / "devices.csv", index=False
+    )
+    pd.DataFrame({'merchant_id': [f"m{i}" for i in range(6)]}).to_csv(
+        data_dir / "merchants.csv", index=False
+    )
+    pd.DataFrame({
+        'entity_id': ["a1", "a2", "d3"],
+        'entity_type': ["account", "account", "device"],
+        'is_fraud': [1, 0, 1],
+    }).to_csv(data_dir / "labels.csv", index=False)
+
+
+def _edges_by_id(graph, edge_type):
+    """Sorted (source ID, destination ID, time) triples of an edge type."""
+    src_type, _, dst_type = edge_type
+    src, dst = np.asarray(graph.edge_index[edge_type])
+    src_ids = graph.node_index.ids[src_type][src]
+    dst_ids = graph.node_index.ids[dst_type][dst]
+    return sorted(zip(map(str, src_ids), map(str, dst_ids), graph.edge_time[edge_type].tolist()))
+
+
+def test_build_graph_numeric_csv_ids(tmp_path):
+    """
+    Test that numeric-looking CSV IDs give the same nodes with and without streaming.
+    """
+    pd.DataFrame({
+        'transaction_id': [1, 2, 2, 3],
+        'account_id': [100, 200, 200, 100],
+        'device_id': [7, 7, 7, 8],
+        'merchant_id': [5, 6, 6, 5],
+        'amount': [5.0, 7.5, 7.5, 12.0],
+        'timestamp': ["2026-10-01T00:00:00", "2026-10-01T01:00:00",
+                      "2026-10-01T01:00:00", "2026-10-01T02:00:00"],
+    }).to_csv(tmp_path / "transactions.csv", index=False)
+    pd.DataFrame({'account_id': [100, 200]}).to_csv(tmp_path / "accounts.csv", index=False)
+    pd.DataFrame({'device_id': [7, 8]}).to_csv(tmp_path / "devices.csv", index=False)
+    pd.DataFrame({'merchant_id': [5, 6]}).to_csv(tmp_path / "merchants.csv", index=False)
+
+    for stream in (False, True):
+        config = {'data': {'stream_transactions': stream}, 'graph': {}}
+        graph = pipeline.build_graph_pipeline(tmp_path, config)
+        assert graph.node_index.ids['account'].tolist() == ["100", "200"]
+        assert graph.node_index.ids['device'].tolist() == ["7", "8"]
+        assert graph.node_index.ids['transaction'].tolist() == ["1", "2", "3"]
+
+
+def test_build_graph_streaming(tmp_path):
+    """
+    Test that the streaming build matches the in-memory build.
+    """
+    data_dir = tmp_path / "raw"
+    data_dir.mkdir()
+    _write_raw_history(data_dir)
+    graph_config = {'coalesce_edges': ["account__uses__device"]}
+    expected = pipeline.build_graph_pipeline(data_dir, {'graph': graph_config})
+
+    config = {
+        'data': {'stream_batch_rows': 64},
+        'graph': {**graph_config, 'streaming': True, 'streaming_block_size': 50,
+                  'save_dir': str(tmp_path / "graph")},
+    }
+    graph = pipeline.build_graph_streaming(data_dir, config)
+    assert graph.metadata['streaming']['transactions'] == 399
+    assert not (tmp_path / ".streaming").exists()
+
+    for node_type in expected.node_types:
+        ids = expected.node_index.ids[node_type]
+        assert sorted(map(str, graph.node_index.ids[node_type])) == sorted(map(str, ids))
+        if node_type in expected.x:
+            assert graph.feature_names[node_type] == expected.feature_names[node_type]
+            rows = graph.node_index.lookup(node_type, ids)
+            np.testing.assert_allclose(
+                graph.x[node_type][rows], expected.x[node_type], rtol=1e-5
+            )
+    rows = graph.node_index.lookup('account', pd.Index(["a1", "a2", "a20"]))
+    assert graph.y['account'][rows].tolist() == [1, 0, -1]
+
+    for edge_type in expected.edge_types:
+        assert _edges_by_id(graph, edge_type) == _edges_by_id(expected, edge_type)
+        times = np.asarray(graph.edge_time[edge_type])
+        assert (np.diff(times) >= 0).all()
+        src, dst = np.asarray(graph.edge_index[edge_type])
+        for reverse, (rows, cols) in ((False, (src, dst)), (True, (dst, src))):
+            adjacency = graph.adjacency(edge_type, reverse=reverse)
+            degree = np.bincount(rows, minlength=adjacency.num_rows)
+            np.testing.assert_array_equal(np.diff(adjacency.indptr), degree)
+            np.testing.assert_array_equal(cols[adjacency.edge_ids], adjacency.indices)
+            owner = np.repeat(np.arange(adjacency.num_rows), degree)
+            np.testing.assert_array_equal(rows[adjacency.edge_ids], owner)
+            key = owner * adjacency.num_cols + adjacency.indices
+            assert (np.diff(key) >= 0).all()
+    coalesced = ('account', 'uses', 'device')
+    assert graph.metadata['coalesce'] == expected.metadata['coalesce']
+    assert graph.num_edges(coalesced) == expected.num_edges(coalesced)
+
+    with pytest.raises(ValueError):
+        config['graph']['hub_policies'] = {'transaction__with__merchant': "drop"}
+        pipeline.build_graph_streaming(data_dir, config)
+
+
+def _sweep_trial(graph, config, epochs, checkpoint_dir):
+    """Trial whose loss falls with epochs and with distance of dropout from 0.2."""
+    from pathlib import Path
+
+    checkpoint = Path(checkpoint_dir) / "epochs.txt"
+    resumed = int(checkpoint.read_text()) if checkpoint.exists() else 0
+    checkpoint.parent.mkdir(parents=True, exist_ok=True)
+    checkpoint.write_text(str(epochs))
+    if config['model']['dropout'] == 0.9:
+        raise RuntimeError("diverged")
+    return {
+        'val_loss': abs(config['model']['dropout'] - 0.2) + 1.0 / epochs,
+        'resumed_from': resumed,
+        'num_accounts': graph.num_nodes('account'),
+    }
+
+
+def test_run_sweep(tmp_path):
+    """
+    Test a successive-halving sweep over a shared graph in worker processes.
+    """
+    data_dir = tmp_path / "raw"
+    data_dir.mkdir()
+    _write_raw_tables(data_dir)
+    graph = pipeline.build_graph_pipeline(data_dir, {'graph': {}})
+    config = {
+        'model': {'dropout': 0.5, 'gnn_type': "gat"},
+        'training': {'num_epochs': 9},
+        'sweep': {
+            'space': {'model.dropout': [0.0, 0.2, 0.4, 0.6, 0.9], 'model.gnn_type': ["gat"]},
+            'num_workers': 2,
+            'min_epochs': 1,
+            'reduction_factor': 3,
+            'work_dir': str(tmp_path / "sweep"),
+            'shared_dir': str(tmp_path),
+        },
+    }
+    results = sweep.run_sweep(graph, config, _sweep_trial)
+
+    # Rungs of 1, 3 and 9 epochs keep 5 -> 2 -> 1 trials; the failed trial drops out.
+    assert results.groupby('rung')['trial'].nunique().tolist() == [5, 2, 1]
+    best = results.iloc[0]
+    assert (best['rung'], best['epochs'], best['model.dropout']) == (2, 9, 0.2)
+    assert best['status'] == "completed" and best['resumed_from'] == 3
+    assert (results['num_accounts'].dropna() == graph.num_nodes('account')).all()
+    assert set(results.loc[results['rung'] == 0, 'status']) == {
+        "continued", "stopped", "failed"
+    }
+    assert config['model']['dropout'] == 0.5
+    assert sweep.halving_rungs(2, 10, 3) == [2, 6, 10]
+    with pytest.raises(ValueError):
+        sweep.run_sweep(graph, {**config, 'sweep': {'space': {}}}, _sweep_trial)
+    diverging = {**config['sweep'], 'space': {'model.dropout': [0.9]}}
+    with pytest.raises(RuntimeError, match="All 1 sweep trials failed"):
+        sweep.run_sweep(graph, {**config, 'sweep': diverging}, _sweep_trial)